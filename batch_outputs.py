@@ -0,0 +1,176 @@
+import numpy as np
+import casadi as cas
+import os
+from typing import Dict, List, Any, Tuple
+
+
+def _output_function(source: Any) -> cas.Function:
+    """
+    The output Function of a CompiledProblem (`outputs`), an OutputRegistry (`function()`), or a CasADi Function of
+    ("x", "p") as-is.
+    """
+    if isinstance(source, cas.Function):
+        return source
+    elif hasattr(source, "function"):  # An OutputRegistry
+        return source.function()
+    elif hasattr(source, "outputs") and isinstance(source.outputs, cas.Function):  # A CompiledProblem
+        return source.outputs
+    raise TypeError(f"Cannot find an output Function on a {type(source)}!")
+
+
+class BatchEvaluator:
+    """
+    Evaluates a few outputs at many solutions at once, with a mapped CasADi Function, rather than solution by solution:
+
+        >>> evaluator = BatchEvaluator(problem, ["transport_efficiency_MJ_per_seat_km", "mass_props_TOGW.mass"])
+        >>> values = evaluator(x, p)  # x: (n_points, n_variables); values: (n_points, 2)
+
+    Only the requested outputs are evaluated: they are cut out of the output Function into one that returns them
+    stacked as a single column, which is mapped over `batch_size` points at a time.
+    """
+
+    def __init__(self,
+                 source: Any,
+                 outputs: List[str],
+                 parallelization: str = "serial",
+                 n_threads: int = None,
+                 batch_size: int = 1024,
+                 ):
+        """
+        Args:
+            source: The outputs to draw from: a CompiledProblem, an OutputRegistry, or a CasADi Function with inputs
+                "x" and "p" (like `CompiledProblem.outputs`).
+            outputs: The names of the outputs to evaluate. Vector-valued outputs take one column per entry (see
+                `columns`).
+            parallelization: "serial", or "thread" to evaluate each batch on `n_threads` threads (CasADi's
+                `Function.map()`).
+            n_threads: The number of threads, if `parallelization` is "thread". Defaults to the number of CPUs.
+            batch_size: The number of points per mapped call.
+        """
+        if parallelization not in ["serial", "thread"]:
+            raise ValueError("Bad value of `parallelization`! Options: \"serial\", \"thread\"")
+        function = _output_function(source)
+        missing = [name for name in outputs if name not in function.name_out()]
+        if len(missing) > 0:
+            raise KeyError(f"No outputs named {missing}! Options: {function.name_out()}")
+
+        x = cas.MX.sym("x", function.sparsity_in("x"))
+        p = cas.MX.sym("p", function.sparsity_in("p"))
+        values = function(x=x, p=p)
+        self.columns: List[str] = []
+        for name in outputs:
+            n = function.numel_out(name)
+            self.columns.extend([name] if n == 1 else [f"{name}[{i}]" for i in range(n)])
+        self.function = cas.Function(
+            "batch_outputs",
+            [x, p],
+            [cas.vertcat(*[cas.vec(cas.densify(values[name])) for name in outputs])],
+            ["x", "p"],
+            ["values"],
+        )
+        self.outputs = list(outputs)
+        self.parallelization = parallelization
+        self.n_threads = n_threads or os.cpu_count()
+        self.batch_size = batch_size
+        self._mapped: Dict[int, cas.Function] = {}
+
+    def mapped(self, n_points: int) -> cas.Function:
+        """
+        Returns the Function mapped over `n_points` points (built on first use).
+        """
+        if n_points not in self._mapped:
+            self._mapped[n_points] = self.function.map(
+                n_points,
+                self.parallelization,
+                *([] if self.parallelization == "serial" else [self.n_threads]),
+            )
+        return self._mapped[n_points]
+
+    def __call__(self,
+                 x: np.ndarray,
+                 p: np.ndarray,
+                 ) -> np.ndarray:
+        """
+        Args:
+            x: The decision vectors, one row per point: an array of shape (n_points, n_variables).
+            p: The parameter vectors, one row per point: an array of shape (n_points, n_parameters); or a single
+                vector of shape (n_parameters,), shared by every point.
+
+        Returns: An array of shape (n_points, len(columns)).
+        """
+        x = np.atleast_2d(np.asarray(x, dtype=float))
+        p = np.asarray(p, dtype=float)
+        shared_p = p.ndim < 2
+        n_points = x.shape[0]
+        results = np.empty((n_points, len(self.columns)))
+        for start in range(0, n_points, self.batch_size):
+            stop = min(start + self.batch_size, n_points)
+            values = self.mapped(stop - start)(
+                x[start:stop].T,
+                p.reshape(-1, 1) if shared_p else p[start:stop].T,  # A single column is broadcast to every point.
+            )
+            results[start:stop] = np.array(values, dtype=float).T
+        return results
+
+
+def evaluate_batch(
+        source: Any,
+        outputs: List[str],
+        x: np.ndarray,
+        p: np.ndarray,
+        **kwargs,
+) -> np.ndarray:
+    """
+    Evaluates outputs at many solutions at once; shorthand for `BatchEvaluator(source, outputs, **kwargs)(x, p)`.
+
+    Returns: An array of shape (n_points, n_columns); see `BatchEvaluator`.
+    """
+    return BatchEvaluator(source, outputs, **kwargs)(x, p)
+
+
+def stored_inputs(
+        problem: Any,
+        store: Any,
+        where: Dict[str, Any] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Loads the decision and parameter vectors of a CompiledProblem's solutions from a `results_store.ResultsStore`:
+    the rows written by solves of this very problem (same `graph_hash()`), matching `where` (as in
+    `ResultsStore.query()`).
+
+    Returns: A tuple of (x, p): arrays of shape (n_rows, n_variables) and (n_rows, n_parameters).
+    """
+    x_columns = [f"x.{name}" for name in problem.variable_names]
+    p_columns = [f"parameter.{name}" for name in problem.parameter_names]
+    rows = store.query(
+        columns=x_columns + p_columns,
+        where={"problem": problem.graph_hash(), **(where or {})},
+    )
+    return (
+        rows[x_columns].to_numpy(dtype=float).reshape(len(rows), len(x_columns)),
+        rows[p_columns].to_numpy(dtype=float).reshape(len(rows), len(p_columns)),
+    )
+
+
+def evaluate_stored(
+        problem: Any,
+        store: Any,
+        outputs: List[str],
+        where: Dict[str, Any] = None,
+        **kwargs,
+) -> np.ndarray:
+    """
+    Evaluates outputs of a CompiledProblem at its solutions in a `results_store.ResultsStore` (see `stored_inputs()`),
+    without re-solving them - e.g., outputs added to the problem after the solves.
+
+    Args:
+        problem: The CompiledProblem.
+        store: The ResultsStore.
+        outputs: The names of the outputs to evaluate.
+        where: [Optional] Conditions on the rows, as in `ResultsStore.query()` (e.g., `{"stats.success": True}`).
+        **kwargs: Any other arguments of `BatchEvaluator` (e.g., `parallelization="thread"`).
+
+    Returns: An array of shape (n_rows, n_columns); see `BatchEvaluator`.
+    """
+    x, p = stored_inputs(problem, store, where=where)
+    return evaluate_batch(problem, outputs, x, p, **kwargs)
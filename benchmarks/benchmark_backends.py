@@ -0,0 +1,77 @@
+"""
+Benchmarks the NLP evaluation backends of `CompiledProblem` on the `design_opt` problem:
+
+* "mx": The MX virtual machine.
+* "sx": The graph expanded to SX.
+* "c": Generated C code, compiled into a shared library (cached in `cache/nlp/`).
+
+Reports the time spent in each IPOPT callback, per call and in total, along with the backend that was actually used
+after any fallback. Pick the fastest backend that does not fall back for production sweeps.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+repo_directory = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_directory))
+os.chdir(repo_directory)  # `design_opt` reads its polar caches relative to the repository directory.
+
+from compiled_problem import backends, callback_timings
+from design_opt import get_compiled_problem
+
+compile_timeout = 600  # seconds; the "c" backend falls back if the compiler takes longer than this
+n_repeats = 2  # The fastest of the repeats is reported; the first solve with each backend includes its setup
+
+problem = get_compiled_problem(verbose=True)
+
+results = {}
+for backend in backends[::-1]:
+    start = time.perf_counter()
+    solver = problem.nlpsol(
+        options={
+            "print_time"      : False,
+            "ipopt.print_level": 0,
+        },
+        backend=backend,
+        compile_timeout=compile_timeout,
+        verbose=True,
+    )
+    time_setup = time.perf_counter() - start
+
+    sols = [
+        problem.solve(solver=solver)
+        for _ in range(n_repeats)
+    ]
+    sol = min(sols, key=lambda sol: sol.stats()["t_wall_total"])
+    results[backend] = {
+        "backend_used": sol.stats()["backend"],
+        "setup"       : time_setup,
+        "iterations"  : sol.stats()["iter_count"],
+        "objective"   : sol.f,
+        "timings"     : callback_timings(sol.stats()),
+    }
+
+### Report
+print()
+for backend, result in results.items():
+    print(
+        f"Backend \"{backend}\" (used: \"{result['backend_used']}\"): "
+        f"setup {result['setup']:.1f} s, "
+        f"{result['iterations']} iterations, "
+        f"objective {result['objective']:.6g}"
+    )
+    for name, timing in result["timings"].items():
+        print(
+            f"{name.rjust(14)}: "
+            f"{timing['n_calls']:5d} calls, "
+            f"{timing['t_wall']:8.3f} s total, "
+            f"{1e3 * timing['t_wall'] / max(timing['n_calls'], 1):8.2f} ms/call"
+        )
+    print()
+
+fastest = min(
+    [backend for backend, result in results.items() if result["backend_used"] == backend],
+    key=lambda backend: results[backend]["timings"]["total"]["t_wall"],
+)
+print(f"Fastest backend: \"{fastest}\"")
@@ -0,0 +1,55 @@
+"""
+Benchmarks batch evaluation of outputs over many stored solutions (`batch_outputs.evaluate_batch()`) against
+evaluating them one at a time, on the `design_opt` problem: 20 outputs at 10^4 solution vectors (the solution,
+perturbed). The references are one `CompiledProblem.outputs` call per output per solution (as a sweep callable that
+evaluates one expression at a time does), and one call per solution (all outputs at once).
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+repo_directory = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_directory))
+os.chdir(repo_directory)  # `design_opt` reads its polar caches relative to the repository directory.
+
+import numpy as np
+from design_opt import get_compiled_problem
+from batch_outputs import evaluate_batch
+
+n_points = 10000
+n_outputs = 20
+n_points_per_solution = 200  # Solution-by-solution evaluation is timed on this many points, and extrapolated.
+
+problem = get_compiled_problem(verbose=True)
+sol = problem.solve(verbose=False)
+outputs = [name for name in problem.output_names if problem.outputs.numel_out(name) == 1][:n_outputs]
+
+rng = np.random.default_rng(0)
+x = sol.x + 0.01 * problem.variable_scales * rng.standard_normal((n_points, problem.n_variables))
+
+start = time.perf_counter()
+for i in range(n_points_per_solution):
+    for name in outputs:
+        problem.outputs(x=x[i], p=sol.p)[name]
+t_per_output = (time.perf_counter() - start) / n_points_per_solution * n_points
+print(f"Output by output: {t_per_output:.2f} s (extrapolated from {n_points_per_solution} points)")
+
+start = time.perf_counter()
+reference = np.array([
+    [float(values[name]) for name in outputs]
+    for values in (problem.outputs(x=x[i], p=sol.p) for i in range(n_points_per_solution))
+])
+t_per_solution = (time.perf_counter() - start) / n_points_per_solution * n_points
+print(f"Solution by solution: {t_per_solution:.2f} s (extrapolated from {n_points_per_solution} points)")
+
+for parallelization in ["serial", "thread"]:
+    start = time.perf_counter()
+    values = evaluate_batch(problem, outputs, x, sol.p, parallelization=parallelization)
+    t_batch = time.perf_counter() - start
+    error = np.max(np.abs(values[:n_points_per_solution] - reference) / (1 + np.abs(reference)))
+    print(
+        f"Batch ({parallelization}, {os.cpu_count()} CPU(s)): {t_batch:.2f} s "
+        f"({t_per_output / t_batch:.0f}x output by output, {t_per_solution / t_batch:.1f}x solution by solution), "
+        f"max. relative difference {error:.1e}"
+    )
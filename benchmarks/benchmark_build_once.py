@@ -0,0 +1,87 @@
+"""
+Benchmarks build-once/solve-many against the rebuild-per-point loop that `get_market_coverage()` used to run, for
+every fuel type.
+
+* Rebuild per point: `get_problem()` + `opti.solve()` at every sweep point.
+* Build once: `compile_problem()` once, then `CompiledProblem.solve()` at every sweep point, reusing one solver.
+
+Both should reach the same objective in the same number of IPOPT iterations. Iteration counts are also reported
+against those of the model before its constants were made parameters, which took a different IPOPT path near the edge
+of closure.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+study_directory = Path(__file__).parent.parent / "study_market_segmentation"
+sys.path[:0] = [str(study_directory), str(study_directory.parent)]
+os.chdir(study_directory)  # `get_problem()` reads its polar caches relative to the study directory.
+
+import aerosandbox.numpy as np
+from aerosandbox.tools import units as u
+from design_opt_wrapped import get_problem, compile_problem, get_parameter_values
+
+design_ranges = {  # nmi; GH2 does not close past ~3750 nmi.
+    "kerosene": [2000, 3750, 5500, 7500],
+    "LH2"     : [2000, 3750, 5500, 7500],
+    "GH2"     : [2000, 3000, 3500, 3750],
+}
+
+constant_model_iterations = {  # IPOPT iterations at each of `design_ranges`, with every parameter inlined as a constant
+    "kerosene": [17, 18, 35, 69],
+    "LH2"     : [19, 12, 140, 27],  # At 5500 nmi, the constant model stops at a worse local optimum (1.229 MJ/seat-km).
+    "GH2"     : [14, 28, 297, 97],
+}
+
+for fuel_type, ranges in design_ranges.items():
+    ### Rebuild per point
+    start = time.perf_counter()
+    objectives_rebuild = []
+    iterations_rebuild = []
+    for design_range in ranges:
+        vars = get_problem(fuel_type=fuel_type)
+        sol = vars["opti"].solve(
+            parameter_mapping={
+                vars["mission_range"]: design_range * u.naut_mile
+            },
+            verbose=False,
+        )
+        objectives_rebuild.append(sol(vars["transport_efficiency_MJ_per_seat_km"]))
+        iterations_rebuild.append(sol.stats()["iter_count"])
+    time_rebuild = time.perf_counter() - start
+
+    ### Build once
+    start = time.perf_counter()
+    problem = compile_problem(fuel_type=fuel_type)
+    time_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    objectives_build_once = []
+    iterations_build_once = []
+    for design_range in ranges:
+        sol = problem.solve(
+            parameter_values={
+                **get_parameter_values(fuel_type=fuel_type),
+                "mission_range": design_range * u.naut_mile,
+            },
+            verbose=False,
+        )
+        objectives_build_once.append(sol("transport_efficiency_MJ_per_seat_km"))
+        iterations_build_once.append(sol.stats()["iter_count"])
+    time_solves = time.perf_counter() - start
+    time_build_once = time_build + time_solves
+
+    ### Report
+    n = len(ranges)
+    print(f"{fuel_type}, design ranges {ranges} nmi")
+    print(f"{'Rebuild per point'.rjust(25)} = {time_rebuild:.1f} s ({time_rebuild / n:.1f} s/point)")
+    print(f"{'Build once, solve many'.rjust(25)} = {time_build_once:.1f} s "
+          f"(build {time_build:.1f} s + {time_solves / n:.1f} s/point)")
+    print(f"{'Speedup'.rjust(25)} = {time_rebuild / time_build_once:.2f}x")
+    print(f"{'Max. objective mismatch'.rjust(25)} = "
+          f"{np.max(np.abs(np.array(objectives_build_once) / np.array(objectives_rebuild) - 1)):.2e}")
+    print(f"{'Iterations'.rjust(25)} = {iterations_build_once} (rebuild: {iterations_rebuild}, "
+          f"constant model: {constant_model_iterations[fuel_type]})")
+    if iterations_build_once != iterations_rebuild:
+        print(f"{'WARNING'.rjust(25)} = build-once and rebuild took different IPOPT paths")
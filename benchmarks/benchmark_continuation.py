@@ -0,0 +1,95 @@
+"""
+Benchmarks `continuation()` against the fixed-grid sweep that `asb.Opti.solve_sweep()` runs (each point starting from
+the last one, with failed points left as NaN), for the two parameters we sweep most:
+
+* Tank fuel mass fraction, on the model of `study_tank_gravimetric_efficiency` (the study's own grid).
+* Mission range, on the LH2 model of `study_market_segmentation`.
+
+Continuation is run with both of its predictors. The first sensitivity evaluation includes building the KKT
+derivative Function (several seconds, once per problem).
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+repo_directory = Path(__file__).parent.parent
+sys.path[:0] = [
+    str(repo_directory),
+    str(repo_directory / "study_market_segmentation"),
+    str(repo_directory / "study_tank_gravimetric_efficiency"),
+]
+
+import aerosandbox.numpy as np
+from aerosandbox.tools import units as u
+from compiled_problem import CompiledProblem
+from continuation import continuation
+
+max_iter = 50  # As in `study_tank_gravimetric_efficiency`
+
+
+def fixed_grid_sweep(problem, parameter, values):
+    """
+    Solves at each value in turn, each from the last solution (converged or not), as `solve_sweep()` does.
+    """
+    successes = []
+    iterations = 0
+    x0 = None
+    start = time.perf_counter()
+    for value in values:
+        sol = problem.solve(
+            parameter_values={parameter: value},
+            x0=x0,
+            max_iter=max_iter,
+            verbose=False,
+            behavior_on_failure="return_last",
+        )
+        successes.append(sol.stats()["success"])
+        iterations += sol.stats()["iter_count"]
+        x0 = sol.x
+    return np.array(successes), iterations, time.perf_counter() - start
+
+
+def get_tank_problem():
+    os.chdir(repo_directory / "study_tank_gravimetric_efficiency")
+    import design_opt_variable_gravimetric_efficiency as model
+    return CompiledProblem.from_opti(
+        opti=model.opti,
+        parameters={"fuel_tank_fuel_mass_fraction": model.fuel_tank_fuel_mass_fraction},
+        outputs={"transport_efficiency_MJ_per_seat_km": model.transport_efficiency_MJ_per_seat_km},
+    )
+
+
+def get_range_problem():
+    os.chdir(repo_directory / "study_market_segmentation")
+    from design_opt_wrapped import get_compiled_problem
+    return get_compiled_problem(fuel_type="LH2")
+
+
+sweeps = [
+    ("fuel_tank_fuel_mass_fraction", get_tank_problem, np.sinspace(0.2221, 1, 21)[::-1]),
+    ("mission_range", get_range_problem, np.linspace(2000, 9000, 15) * u.naut_mile),
+]
+
+results = []
+for parameter, get_problem, values in sweeps:
+    problem = get_problem()
+    problem.get_solver(max_iter=max_iter, verbose=False)  # Solver creation is excluded from the timings.
+    successes, iterations, wall_time = fixed_grid_sweep(problem, parameter, values)
+    results.append((parameter, "Fixed grid", successes, iterations, wall_time))
+
+    for predictor in ["previous", "sensitivity"]:
+        start = time.perf_counter()
+        result = continuation(problem, parameter, values, predictor=predictor, max_iter=max_iter)
+        wall_time = time.perf_counter() - start
+        print(result.report())
+        results.append((
+            parameter, f"Cont., {predictor}", result.success, sum(r["iterations"] for r in result.path), wall_time
+        ))
+
+print()
+print(f"{'Parameter'.ljust(30)} {'Method'.ljust(22)} {'Reached'.rjust(8)} {'Iter.'.rjust(6)} "
+      f"{'Iter./point'.rjust(12)} {'Wall [s]'.rjust(9)}")
+for parameter, method, successes, iterations, wall_time in results:
+    print(f"{parameter.ljust(30)} {method.ljust(22)} {f'{np.sum(successes)}/{len(successes)}'.rjust(8)} "
+          f"{iterations:6d} {iterations / max(np.sum(successes), 1):12.1f} {wall_time:9.1f}")
@@ -0,0 +1,62 @@
+"""
+Benchmarks the market-coverage lower envelope (`market_envelope`) at scale: 10^3 designs x 10^3 range points, from
+arrays in memory and streamed from a results store. The designs are the `design_opt` solution's record
+(`payload_range.design_record()`), with its masses, L/D and Isp randomly perturbed by up to +/-20%.
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+repo_directory = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_directory))
+os.chdir(repo_directory)  # `design_opt` reads its polar caches relative to the repository directory.
+
+import numpy as np
+from design_opt import get_compiled_problem
+from payload_range import design_record, design_record_outputs, market_coverage
+from market_envelope import lower_envelope, market_coverage_envelope_from_store
+from results_store import ResultsStore
+
+n_designs = 1000
+n_range_points = 1000
+
+record = design_record(get_compiled_problem(verbose=True).solve(verbose=False))
+rng = np.random.default_rng(0)
+records = {
+    field: value * (
+        rng.uniform(0.8, 1.2, n_designs)
+        if field in ["mass_empty", "mass_fuel", "LD_cruise", "Isp"]
+        else np.ones(n_designs)
+    )
+    for field, value in record.items()
+}
+range_grid = np.linspace(0, 1.5, n_range_points) * np.max(market_coverage(record)[0])
+
+start = time.perf_counter()
+flight_ranges, transport_efficiencies = market_coverage(records, n_points=n_range_points // 2)
+t_curves = time.perf_counter() - start
+start = time.perf_counter()
+envelope = lower_envelope(flight_ranges, transport_efficiencies, range_grid)
+t_envelope = time.perf_counter() - start
+print(f"{n_designs} designs x {n_range_points} points: curves {t_curves:.3f} s, envelope {t_envelope:.3f} s; "
+      f"{len(envelope.segments())} segments")
+
+with tempfile.TemporaryDirectory() as directory:
+    store = ResultsStore(directory, flush_every=100)
+    for i in range(n_designs):
+        store.append({
+            **{output: records[field][i] for field, output in design_record_outputs.items()},
+            "stats.success": True,
+            "design"       : float(i),
+        })
+    start = time.perf_counter()
+    streamed = market_coverage_envelope_from_store(
+        store,
+        range_grid,
+        label_columns=["design"],
+        n_points=n_range_points // 2,
+    )
+    print(f"Streamed from a store of {len(store.chunks())} chunks: {time.perf_counter() - start:.3f} s; "
+          f"identical: {np.array_equal(streamed.values, envelope.values, equal_nan=True)}")
@@ -0,0 +1,42 @@
+"""
+Runs a multi-start exploration of the `design_opt` optimum (`multistart()`), and reports the distinct local minima
+found and the throughput of the starts.
+
+With `n_workers` workers, the starts are solved concurrently; since starts are independent, throughput should scale
+with the number of CPUs up to `n_starts`.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+repo_directory = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_directory))
+os.chdir(repo_directory)  # `design_opt` reads its polar caches relative to the repository directory.
+
+from design_opt import get_compiled_problem
+from multistart import multistart
+
+n_starts = 16
+n_workers = os.cpu_count()
+outputs = [
+    "transport_efficiency_MJ_per_seat_km",
+    "mass_props_TOGW.mass",
+    "wing_span",
+    "fuselage_cabin_diameter",
+]
+
+problem = get_compiled_problem(verbose=True)
+problem.get_solver(verbose=False)
+
+for method in ["sobol", "lhs"]:
+    result = multistart(
+        problem,
+        n_starts=n_starts,
+        method=method,
+        n_workers=n_workers,
+        max_iter=300,
+    )
+    print(f"\n{method}, {n_workers} worker(s):")
+    print(result.report(outputs=outputs))
+    print(f"Throughput: {n_starts / result.time * 60:.1f} starts/min")
@@ -0,0 +1,46 @@
+"""
+Traces Pareto fronts of the `design_opt` problem (`pareto_front()`): transport efficiency against takeoff gross
+weight (by epsilon-constraint), and against forward fuel tank length (by weighted sums). Reports each front and the
+number of IPOPT iterations it took.
+
+Points are warm-started from their converged neighbours, so the iterations per point should be well below those of a
+cold solve.
+"""
+import os
+import sys
+from pathlib import Path
+
+repo_directory = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_directory))
+os.chdir(repo_directory)  # `design_opt` reads its polar caches relative to the repository directory.
+
+from design_opt import get_compiled_problem, pareto_objectives
+from pareto import pareto_front
+
+n_points = 9
+n_workers = os.cpu_count()
+
+problem = get_compiled_problem(verbose=True, trade_study=True)
+problem.get_solver(verbose=False)
+
+cold = problem.solve(verbose=False)
+print(f"Cold solve: {cold.stats()['iter_count']} iterations")
+
+for names, method in [
+    (["transport_efficiency_MJ_per_seat_km", "design_mass_TOGW"], "epsilon"),
+    (["transport_efficiency_MJ_per_seat_km", "fwd_fuel_tank_length"], "weighted_sum"),
+]:
+    front = pareto_front(
+        problem,
+        pareto_objectives,
+        names=names,
+        method=method,
+        n_points=n_points,
+        n_workers=n_workers,
+        filename=Path("benchmarks") / "results" / f"pareto_{names[1]}.npz",
+        verbose=True,
+        max_iter=300,
+    )
+    print(f"\n{method}, {n_workers} worker(s):")
+    print(front.report())
+    print(f"Iterations per point: {front.iterations.mean():.1f}")
@@ -0,0 +1,43 @@
+"""
+Benchmarks the results store (`results_store.ResultsStore`) at the size of a large sweep: 2000 rows of 600 numeric
+columns, written by one process, then queried for 2 columns (by a fresh store, as another process would, and again
+with its chunk index cached), and compacted. Run with the default buffering, and with a chunk per row
+(`flush_every=1`), the worst case.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from results_store import ResultsStore
+
+n_rows = 2000
+columns = [f"column_{i}" for i in range(600)]
+
+for flush_every in [100, 1]:
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultsStore(directory, flush_every=flush_every)
+        start = time.perf_counter()
+        for i in range(n_rows):
+            store.append({column: float(i) for column in columns})
+        store.flush()
+        t_write = time.perf_counter() - start
+
+        store = ResultsStore(directory)
+        n_chunks = len(store.chunks())
+        start = time.perf_counter()
+        store.query([columns[0], columns[-1]])
+        t_query = time.perf_counter() - start
+        start = time.perf_counter()
+        store.query([columns[0], columns[-1]])
+        t_query_cached = time.perf_counter() - start
+        start = time.perf_counter()
+        store.compact()
+        t_compact = time.perf_counter() - start
+        assert np.array_equal(store.query([columns[1]])[columns[1]], np.arange(n_rows))
+
+        print(f"flush_every={flush_every} ({n_chunks} chunks): write {t_write:.2f} s, query {t_query:.2f} s "
+              f"({t_query_cached:.2f} s with the index cached), compact {t_compact:.2f} s")
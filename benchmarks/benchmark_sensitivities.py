@@ -0,0 +1,78 @@
+"""
+Benchmarks parametric sensitivities from the KKT system (`CompiledSolution.sensitivities()`) against central
+finite differences from re-solves, on the `design_opt` problem: accuracy, and cost.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+repo_directory = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_directory))
+os.chdir(repo_directory)  # `design_opt` reads its polar caches relative to the repository directory.
+
+import aerosandbox.numpy as np
+from design_opt import get_compiled_problem
+
+outputs = [
+    "transport_efficiency_MJ_per_seat_km",
+    "mass_props_TOGW.mass",
+    "LD_cruise",
+    "fuselage_cabin_diameter",
+]
+parameters = [
+    "mission_range",
+    "fuel_tank_fuel_mass_fraction",
+]
+relative_step = 1e-3  # For finite differences
+solve_options = {"ipopt.tol": 1e-10}  # Tight, so that finite differences are meaningful
+
+problem = get_compiled_problem(verbose=True)
+problem.get_solver(verbose=False, options=solve_options)
+
+start = time.perf_counter()
+sol = problem.solve(verbose=False, options=solve_options)
+time_solve = time.perf_counter() - start
+
+start = time.perf_counter()
+problem.kkt()
+problem.output_jacobian()
+time_build = time.perf_counter() - start
+
+start = time.perf_counter()
+sensitivities = sol.sensitivities(outputs, parameters)
+time_sensitivities = time.perf_counter() - start
+
+start = time.perf_counter()
+finite_differences = {output: {} for output in outputs}
+for parameter in parameters:
+    value = sol(parameter)
+    step = relative_step * abs(value)
+    sols = [
+        problem.solve(
+            parameter_values={parameter: value + sign * step},
+            x0=sol.x,
+            verbose=False,
+            options=solve_options,
+        )
+        for sign in [-1, 1]
+    ]
+    for output in outputs:
+        finite_differences[output][parameter] = (sols[1](output) - sols[0](output)) / (2 * step)
+time_finite_differences = time.perf_counter() - start
+
+### Report
+print(f"{'Output'.ljust(38)} {'Parameter'.ljust(30)} {'KKT'.rjust(12)} {'Finite diff.'.rjust(12)} "
+      f"{'Rel. error'.rjust(10)}")
+for output in outputs:
+    for parameter in parameters:
+        kkt = sensitivities[output][parameter]
+        fd = finite_differences[output][parameter]
+        print(f"{output.ljust(38)} {parameter.ljust(30)} {kkt:12.5g} {fd:12.5g} "
+              f"{abs(kkt - fd) / max(abs(fd), 1e-300):10.1e}")
+print()
+print(f"{'Solve'.rjust(40)} = {time_solve:.2f} s")
+print(f"{'Sensitivities, one-time build'.rjust(40)} = {time_build:.2f} s")
+print(f"{'Sensitivities, per solution'.rjust(40)} = {time_sensitivities:.3f} s")
+print(f"{'Finite differences (central)'.rjust(40)} = {time_finite_differences:.2f} s "
+      f"({time_finite_differences / time_sensitivities:.0f}x the per-solution cost)")
@@ -0,0 +1,62 @@
+"""
+Benchmarks the throughput (solves per minute) of `SolvePool` as the number of workers grows.
+
+The parent loads the problem once; workers inherit it. For comparison, the cost that each worker would otherwise pay
+to rebuild the problem itself is also reported.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+study_directory = Path(__file__).parent.parent / "study_market_segmentation"
+sys.path[:0] = [str(study_directory), str(study_directory.parent)]
+os.chdir(study_directory)  # `get_problem()` reads its polar caches relative to the study directory.
+
+import aerosandbox.numpy as np
+from aerosandbox.tools import units as u
+from design_opt_wrapped import compile_problem, get_compiled_problem
+from solve_pool import SolvePool
+
+fuel_type = "LH2"
+start_method = "fork"
+tasks_per_worker = 3
+max_workers = os.cpu_count()
+worker_counts = sorted(set([2 ** i for i in range(int(np.log2(max(max_workers, 2))) + 1)] + [max_workers]))
+
+if __name__ == '__main__':
+    ### The cost that every worker would pay if it built the problem itself
+    start = time.perf_counter()
+    compile_problem(fuel_type=fuel_type)
+    time_build = time.perf_counter() - start
+
+    problem = get_compiled_problem(fuel_type=fuel_type)  # Loaded (or built) once, in the parent.
+
+    print(f"Build in each worker (avoided by the pool): {time_build:.1f} s/worker")
+    print(f"{os.cpu_count()} CPUs, start method \"{start_method}\"")
+    print(f"{'Workers'.rjust(8)} {'Startup [s]'.rjust(12)} {'Solves'.rjust(7)} {'Wall [s]'.rjust(9)} "
+          f"{'Iter./solve'.rjust(12)} {'Solves/min'.rjust(11)} {'Speedup'.rjust(8)}")
+
+    throughput_serial = None
+    for n_workers in worker_counts:
+        tasks = [
+            {"mission_range": design_range}
+            for design_range in np.linspace(3000, 7500, tasks_per_worker) * u.naut_mile
+        ] * n_workers  # The same work per worker, so that only the parallelism changes.
+        n_tasks = len(tasks)
+
+        start = time.perf_counter()
+        pool = SolvePool(problem, n_workers=n_workers, start_method=start_method, verbose=False)
+        time_startup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sols = pool.map(tasks)
+        time_solves = time.perf_counter() - start
+        pool.close()
+
+        throughput = n_tasks / time_solves * 60
+        if throughput_serial is None:
+            throughput_serial = throughput
+        iterations = np.mean([sol.stats()["iter_count"] for sol in sols])
+        print(f"{n_workers:8d} {time_startup:12.1f} {n_tasks:7d} {time_solves:9.1f} "
+              f"{iterations:12.1f} {throughput:11.1f} {throughput / throughput_serial:7.2f}x")
@@ -0,0 +1,73 @@
+"""
+Benchmarks the startup cost of `design_opt`: the import time, and the time to a first solve.
+
+Each measurement runs in a fresh interpreter. The import of `design_opt` is compared against the import of its
+dependencies alone, and this script exits with an error if the difference exceeds `import_overhead_budget`.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+repo_directory = Path(__file__).parent.parent
+
+import_overhead_budget = 0.25  # seconds, over the import time of the dependencies of `design_opt`
+n_repeats = 3  # The minimum over repeats is reported, to filter out noise from the OS
+
+dependency_imports = """
+import aerosandbox as asb
+import aerosandbox.numpy as np
+from aerosandbox.library import aerodynamics as lib_aero
+from aerosandbox.library.weights import torenbeek_weights, raymer_cargo_transport_weights, raymer_miscellaneous
+from aerosandbox.tools import units as u
+import compiled_problem
+"""
+
+
+def time_in_fresh_interpreter(code: str) -> float:
+    """
+    Runs `code` in a fresh Python interpreter (in the repository directory), and returns the wall time it took [sec].
+    """
+    timed_code = "\n".join([
+        "import time",
+        "_start = time.perf_counter()",
+        code,
+        "print(time.perf_counter() - _start)",
+    ])
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", timed_code],
+        cwd=repo_directory,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    time_dependencies = min(time_in_fresh_interpreter(dependency_imports) for _ in range(n_repeats))
+    time_import = min(time_in_fresh_interpreter("import design_opt") for _ in range(n_repeats))
+    time_first_solve = time_in_fresh_interpreter("\n".join([
+        "import design_opt",
+        "design_opt.opti.solve(max_iter=500, behavior_on_failure='return_last', verbose=False)",
+    ]))
+    time_first_compiled_solve = time_in_fresh_interpreter("\n".join([
+        "import design_opt",
+        "design_opt.get_compiled_problem().solve(max_iter=500, behavior_on_failure='return_last', verbose=False)",
+    ]))  # Builds and caches the compiled problem if this is the first run since a model change.
+
+    import_overhead = time_import - time_dependencies
+
+    for k, v in {
+        "Dependency import"            : f"{time_dependencies:.3f} s",
+        "`import design_opt`"          : f"{time_import:.3f} s",
+        "Import overhead"              : f"{import_overhead:.3f} s (budget: {import_overhead_budget:.3f} s)",
+        "Time to first solve"          : f"{time_first_solve:.1f} s",
+        "Time to first compiled solve" : f"{time_first_compiled_solve:.1f} s",
+    }.items():
+        print(f"{k.rjust(30)} = {v}")
+
+    if import_overhead > import_overhead_budget:
+        sys.exit(
+            f"`import design_opt` exceeds its budget by {import_overhead - import_overhead_budget:.3f} s. "
+            f"Is something being built at import time?"
+        )
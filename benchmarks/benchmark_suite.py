@@ -0,0 +1,243 @@
+"""
+Benchmarks the point designs end-to-end, for each fuel type (LH2, GH2, kerosene), so that a model change that makes
+the production sweeps slower is caught:
+
+* Polar loading: `asb.Airfoil.generate_polars()` for the three airfoils, from their caches.
+* Problem construction: `get_problem()`, including polar loading.
+* IPOPT solve of the `asb.Opti` problem: iterations and wall time.
+* `sol(...)` substitution of `airplane`, `dyn` and `mass_props`.
+* Solve of the compiled problem, as the market-segmentation sweep runs it: iterations and wall time.
+* The post-processing of `get_market_coverage()` (`market_coverage_from_solution()`).
+
+Results are written as JSON. If a baseline (from an earlier run, with `--save-baseline`) exists, each result is
+compared against it, and this script exits with an error if any exceeds its regression threshold. Timings depend on
+the machine, so no baseline is committed: create one on the reference commit, on the machine that will run the
+comparison, before checking a change:
+
+    python benchmarks/benchmark_suite.py --save-baseline  # On the reference commit
+    python benchmarks/benchmark_suite.py  # After a change; compares against the baseline
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+benchmark_directory = Path(__file__).parent.absolute()
+study_directory = benchmark_directory.parent / "study_market_segmentation"
+sys.path[:0] = [str(study_directory), str(study_directory.parent)]
+os.chdir(study_directory)  # `get_problem()` reads its polar caches relative to the study directory.
+
+import aerosandbox as asb
+import aerosandbox.numpy as np
+import casadi as cas
+from aerosandbox.tools import units as u
+from design_opt_wrapped import get_problem, get_compiled_problem, get_parameter_values
+from market_coverage import market_coverage_from_solution
+
+design_ranges = {  # The design range benchmarked for each fuel type
+    "LH2"     : 5500 * u.naut_mile,
+    "GH2"     : 3750 * u.naut_mile,  # The baseline model closes GH2 here, in 97 iterations.
+    "kerosene": 5500 * u.naut_mile,
+}
+fuel_types = list(design_ranges.keys())
+airfoils = {
+    "b737c"   : "cache/b737c.json",
+    "naca0012": "cache/naca0012.json",
+    "naca0008": "cache/naca0008.json",
+}
+
+default_results_filename = benchmark_directory / "results" / "benchmark_suite.json"
+default_baseline_filename = benchmark_directory / "results" / "benchmark_suite_baseline.json"
+
+### Regression thresholds: a result regresses if it exceeds its baseline by both the relative and absolute margins.
+# The absolute margins keep timer noise on fast steps from being reported as regressions.
+thresholds = {
+    "time"      : dict(relative=0.25, absolute=0.05),  # [sec]
+    "iterations": dict(relative=0.10, absolute=2),
+}
+
+
+def best_time(f, n_repeats: int) -> float:
+    """
+    Returns the minimum wall time [sec] of `n_repeats` calls of `f()`, to filter out noise from the OS.
+    """
+    times = []
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark_fuel_type(fuel_type: str, n_repeats: int) -> dict:
+    results = {}
+
+    ### Polar loading
+    def load_polars():
+        for name, cache_filename in airfoils.items():
+            asb.Airfoil(name).generate_polars(
+                cache_filename=cache_filename,
+                include_compressibility_effects=True,
+            )
+
+    results["time.polar_loading"] = best_time(load_polars, n_repeats)
+
+    ### Problem construction
+    problem_vars = {}
+
+    def construct():
+        problem_vars.update(get_problem(fuel_type=fuel_type))
+
+    results["time.construction"] = best_time(construct, n_repeats)
+
+    ### asb.Opti solve
+    opti = problem_vars["opti"]
+    start = time.perf_counter()
+    sol = opti.solve(
+        parameter_mapping={
+            problem_vars["mission_range"]: design_ranges[fuel_type]
+        },
+        max_iter=500,
+        behavior_on_failure="return_last",
+        verbose=False,
+    )
+    results["time.solve"] = time.perf_counter() - start
+    results["iterations.solve"] = int(sol.stats()["iter_count"])
+    results["success.solve"] = bool(sol.stats()["success"])
+
+    ### Substitution
+    for name in ["airplane", "dyn", "mass_props"]:
+        results[f"time.substitution.{name}"] = best_time(lambda: sol(problem_vars[name]), n_repeats)
+
+    ### Compiled solve, as in the market-segmentation sweep
+    problem = get_compiled_problem(fuel_type=fuel_type)
+    problem.get_solver(verbose=False)  # Solver creation is a one-time cost per process, so it is not timed here.
+    start = time.perf_counter()
+    compiled_sol = problem.solve(
+        parameter_values={
+            **get_parameter_values(fuel_type=fuel_type),
+            "mission_range": design_ranges[fuel_type],
+        },
+        verbose=False,
+        behavior_on_failure="return_last",
+    )
+    results["time.compiled_solve"] = time.perf_counter() - start
+    results["iterations.compiled_solve"] = int(compiled_sol.stats()["iter_count"])
+    results["success.compiled_solve"] = bool(compiled_sol.stats()["success"])
+
+    ### Market coverage post-processing
+    compiled_sol.outputs()  # Evaluated once per solution in any case; not part of the post-processing.
+    results["time.market_coverage"] = best_time(
+        lambda: market_coverage_from_solution(compiled_sol),
+        max(n_repeats, 10),
+    )
+
+    return results
+
+
+def get_metadata() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=benchmark_directory,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        commit = None
+    return {
+        "timestamp"  : time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit"     : commit,
+        "python"     : platform.python_version(),
+        "casadi"     : cas.__version__,
+        "aerosandbox": asb.__version__,
+        "machine"    : platform.platform(),
+        "n_cpus"     : os.cpu_count(),
+    }
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """
+    Compares results against a baseline, and returns a list of rows of (fuel type, metric, baseline value, value,
+    status), where status is "ok", "REGRESSION", "improved", or "new".
+    """
+    rows = []
+    for fuel_type, fuel_results in results.items():
+        for metric, value in fuel_results.items():
+            base = baseline.get(fuel_type, {}).get(metric)
+            kind = metric.split(".")[0]
+            if base is None:
+                status = "new"
+            elif kind == "success":
+                status = "ok" if value or not base else "REGRESSION"
+            else:
+                threshold = thresholds[kind]
+                margin = max(threshold["relative"] * abs(base), threshold["absolute"])
+                if value > base + margin:
+                    status = "REGRESSION"
+                elif value < base - margin:
+                    status = "improved"
+                else:
+                    status = "ok"
+            rows.append((fuel_type, metric, base, value, status))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fuel-types", nargs="+", default=fuel_types, choices=fuel_types)
+    parser.add_argument("--repeats", type=int, default=1,
+                        help="Repeats of each cheap measurement; the minimum is reported.")
+    parser.add_argument("--output", type=Path, default=default_results_filename)
+    parser.add_argument("--baseline", type=Path, default=default_baseline_filename)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Also save the results as the new baseline.")
+    args = parser.parse_args()
+
+    results = {}
+    for fuel_type in args.fuel_types:
+        print(f"Benchmarking {fuel_type}...")
+        results[fuel_type] = benchmark_fuel_type(fuel_type, n_repeats=args.repeats)
+
+    output = {
+        "metadata"  : get_metadata(),
+        "thresholds": thresholds,
+        "results"   : results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(output, indent=4))
+    print(f"Results written to {args.output}.")
+
+    baseline = None
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text())
+        print(f"Comparing against the baseline from commit {baseline['metadata'].get('commit')} "
+              f"({baseline['metadata'].get('timestamp')}).")
+    elif not args.save_baseline:
+        print(f"No baseline at {args.baseline}; nothing to compare against. Create one on the reference commit with "
+              f"`--save-baseline`.")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(output, indent=4))
+        print(f"Baseline written to {args.baseline}.")
+
+    rows = compare(results, {} if baseline is None else baseline["results"])
+    print(f"{'Fuel'.ljust(9)} {'Metric'.ljust(34)} {'Baseline'.rjust(10)} {'Value'.rjust(10)}  Status")
+    for fuel_type, metric, base, value, status in rows:
+        print(
+            f"{fuel_type.ljust(9)} {metric.ljust(34)} "
+            f"{'-' if base is None else f'{base:.4g}':>10} {value:10.4g}  "
+            f"{status if baseline is not None else ''}"
+        )
+
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    if len(regressions) > 0:
+        sys.exit(
+            f"{len(regressions)} regression(s) against the baseline: " +
+            ", ".join(f"{fuel_type} {metric}" for fuel_type, metric, *_ in regressions)
+        )
@@ -0,0 +1,83 @@
+"""
+Benchmarks warm starts from a `WarmStartDatabase` against cold starts (from the `init_guess` values of the model), on
+our standard studies:
+
+* Market segmentation: kerosene and LH2, at each design range.
+* Tank gravimetric efficiency: LH2, at a sweep of tank fuel mass fractions.
+
+Each study is solved three ways:
+* Cold: every point from the model's initial guess.
+* Warm, empty database: points in study order, each seeded from the nearest point solved so far.
+* Warm, nearby: a second set of points, 2% below the first, seeded from the filled database. This is the common
+    case in practice, where most queries land close to designs already solved.
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+study_directory = Path(__file__).parent.parent / "study_market_segmentation"
+sys.path[:0] = [str(study_directory), str(study_directory.parent)]
+os.chdir(study_directory)  # `get_problem()` reads its polar caches relative to the study directory.
+
+import aerosandbox.numpy as np
+from aerosandbox.tools import units as u
+from design_opt_wrapped import get_compiled_problem
+from warm_start import WarmStartDatabase
+
+studies = {
+    "Market segmentation"        : [
+        (fuel_type, {"mission_range": design_range})
+        for fuel_type in ["kerosene", "LH2"]
+        for design_range in np.array([2000, 3750, 5500, 7500]) * u.naut_mile
+    ],
+    "Tank gravimetric efficiency": [
+        ("LH2", {"fuel_tank_fuel_mass_fraction": fraction})
+        for fraction in np.sinspace(0.2221, 1, 21)[::-1][:-1][::4]  # Nearby points below the last would be infeasible
+    ],
+}
+nearby_offset = 0.98  # Nearby queries scale each swept parameter by this factor
+
+
+def run(points, warm_starts=None):
+    iterations = []
+    n_failures = 0
+    start = time.perf_counter()
+    for fuel_type, parameter_values in points:
+        problem = get_compiled_problem(fuel_type=fuel_type)
+        if warm_starts is None:
+            sol = problem.solve(
+                parameter_values=parameter_values, verbose=False, behavior_on_failure="return_last"
+            )
+        else:
+            sol = warm_starts.solve(
+                problem, parameter_values=parameter_values, verbose=False, behavior_on_failure="return_last"
+            )
+        iterations.append(sol.stats()["iter_count"])
+        n_failures += not sol.stats()["success"]
+    return np.array(iterations), time.perf_counter() - start, n_failures
+
+
+for fuel_type in ["kerosene", "LH2"]:  # Load the problems, and create their solvers, before timing.
+    get_compiled_problem(fuel_type=fuel_type).get_solver(verbose=False)
+
+print(f"{'Study'.ljust(28)} {'Case'.ljust(22)} {'Solves'.rjust(7)} {'Iter.'.rjust(7)} {'Wall [s]'.rjust(9)} "
+      f"{'Iter. saved'.rjust(12)} {'Time saved'.rjust(11)} {'Failures'.rjust(9)}")
+for study, points in studies.items():
+    nearby_points = [
+        (fuel_type, {k: v * nearby_offset for k, v in parameter_values.items()})
+        for fuel_type, parameter_values in points
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        warm_starts = WarmStartDatabase(directory)
+        cases = {
+            "Cold"                : run(points),
+            "Warm, empty database": run(points, warm_starts),
+            "Cold, nearby"        : run(nearby_points),
+            "Warm, nearby"        : run(nearby_points, warm_starts),
+        }
+    for case, (iterations, wall_time, n_failures) in cases.items():
+        cold_iterations, cold_time, _ = cases[case.replace("Warm", "Cold").replace("Cold, empty database", "Cold")]
+        print(f"{study.ljust(28)} {case.ljust(22)} {len(iterations):7d} {iterations.sum():7d} {wall_time:9.1f} "
+              f"{1 - iterations.sum() / cold_iterations.sum():11.0%} {1 - wall_time / cold_time:10.0%} {n_failures:9d}")
@@ -0,0 +1,325 @@
+import aerosandbox as asb
+import numpy as np
+import casadi as cas
+import ast
+import inspect
+import re
+import sys
+import textwrap
+import time
+from types import ModuleType, FunctionType
+from typing import Callable, Dict, List, Any, Tuple, Optional
+
+
+def n_nodes(expressions: List[cas.MX]) -> int:
+    """
+    Returns the number of nodes in the CasADi graph of a set of expressions, counting shared subexpressions once.
+    """
+    if len(expressions) == 0:
+        return 0
+    expression = cas.vertcat(*[cas.vec(e) for e in expressions])
+    return cas.Function("n_nodes", cas.symvar(expression), [expression]).n_nodes()
+
+
+def _collect_mx(
+        value: Any,
+        found: Dict[int, cas.MX],
+        seen: set,
+        depth: int = 4,
+) -> None:
+    """
+    Collects every CasADi MX expression held by `value` - directly, or in its containers and attributes, up to `depth`
+    levels deep - into `found`, keyed by id.
+    """
+    if id(value) in seen or depth < 0:
+        return
+    seen.add(id(value))
+    if isinstance(value, cas.MX):
+        found[id(value)] = value
+    elif isinstance(value, (cas.Opti, ModuleType, FunctionType, type, str, bytes, int, float)):
+        return
+    elif isinstance(value, dict):
+        for v in value.values():
+            _collect_mx(v, found, seen, depth - 1)
+    elif isinstance(value, (list, tuple, set)):
+        for v in value:
+            _collect_mx(v, found, seen, depth - 1)
+    elif isinstance(value, np.ndarray):
+        if value.dtype == object:
+            for v in value.flat:
+                _collect_mx(v, found, seen, depth - 1)
+    elif hasattr(value, "__dict__"):
+        for v in vars(value).values():
+            _collect_mx(v, found, seen, depth - 1)
+
+
+def _regions(function: Callable) -> Tuple[Dict[int, Tuple[str, Optional[str]]], List[str], List[str]]:
+    """
+    Maps each source line of `function` to the region it belongs to: its `##### Section:` block, and, within the
+    block, the `mass_props[...]` entry whose computation it is part of (or None).
+
+    A `mass_props` entry's region runs from the end of the previous `mass_props[...] = ...` assignment in the same
+    section (or the start of the section) to the end of its own assignment, so it includes the sub-model that computes
+    the entry (e.g., the Torenbeek wing weight estimate before `mass_props["wing"] = ...`).
+
+    Returns: A tuple of ({line number: (section, entry)}, section names, entry names), with names in source order.
+    """
+    lines, first_line = inspect.getsourcelines(function)
+    source = textwrap.dedent("".join(lines))
+
+    section_starts = []  # (line number, name)
+    for i, line in enumerate(lines):
+        match = re.match(r"\s*##### Section:\s*(.+?)\s*$", line)
+        if match is not None:
+            section_starts.append((first_line + i, match.group(1)))
+
+    assignment_ends = []  # (last line of the assignment, key)
+    for node in ast.walk(ast.parse(source)):
+        if not isinstance(node, ast.Assign):
+            continue
+        target = node.targets[0]
+        if (
+                isinstance(target, ast.Subscript) and
+                isinstance(target.value, ast.Name) and
+                target.value.id == "mass_props" and
+                isinstance(target.slice, ast.Constant)
+        ):
+            assignment_ends.append((first_line + node.end_lineno - 1, str(target.slice.value)))
+    assignment_ends.sort()
+
+    line_regions = {}
+    section = "(before first section)"
+    entry_ends = iter(assignment_ends + [(np.inf, None)])
+    next_entry_end, next_entry = next(entry_ends)
+    section_index = 0
+    for line_number in range(first_line, first_line + len(lines)):
+        if section_index < len(section_starts) and line_number >= section_starts[section_index][0]:
+            section = section_starts[section_index][1]
+            section_index += 1
+        next_section_start = (
+            section_starts[section_index][0]
+            if section_index < len(section_starts)
+            else np.inf
+        )
+        if next_entry_end < next_section_start:
+            line_regions[line_number] = (section, next_entry)
+        else:
+            line_regions[line_number] = (section, None)
+        if line_number >= next_entry_end:
+            next_entry_end, next_entry = next(entry_ends)
+
+    sections = list(dict.fromkeys([name for _, name in section_starts]))
+    entries = list(dict.fromkeys([key for _, key in assignment_ends]))
+    return line_regions, sections, entries
+
+
+class BuildProfile:
+    """
+    The result of `profile_build()`: the wall time and graph growth attributed to each section of a problem build,
+    and to each `mass_props[...]` entry within it.
+
+    Attributes:
+        sections: A list with one dictionary per `##### Section:` block, in source order, with keys:
+            * "name": The section name.
+            * "time": The wall time spent in the section [sec].
+            * "new_nodes": The growth in the CasADi graph of every expression alive in the build, counting shared
+                subexpressions once. This is a proxy for the cost that the section adds to IPOPT's callbacks.
+            * "new_variables", "new_constraints", "new_parameters": The growth in the number of (scalar) decision
+                variables, constraints, and parameters of the `opti` problem.
+        entries: The same, per `mass_props[...]` entry, with the additional keys:
+            * "section": The section the entry is computed in.
+            * "entry_nodes": The size of the graph of the entry's own mass properties, on its own (including
+                whatever it shares with other entries).
+        result: Whatever the build returned.
+        overhead: The wall time spent measuring the graph, which is excluded from the above [sec].
+    """
+
+    def __init__(self,
+                 sections: List[Dict[str, Any]],
+                 entries: List[Dict[str, Any]],
+                 result: Any,
+                 overhead: float,
+                 ):
+        self.sections = sections
+        self.entries = entries
+        self.result = result
+        self.overhead = overhead
+
+    def report(self) -> str:
+        """
+        Returns printable tables of the sections and of the `mass_props` entries, each with its share of the total
+        time and graph growth.
+        """
+        total_time = max(sum(row["time"] for row in self.sections), 1e-100)
+        total_nodes = max(sum(row["new_nodes"] for row in self.sections), 1)
+
+        def table(title, rows):
+            lines = [
+                f"{title.ljust(34)} {'Time [s]'.rjust(9)} {'%'.rjust(5)} {'New nodes'.rjust(10)} {'%'.rjust(5)} "
+                f"{'Vars.'.rjust(6)} {'Cons.'.rjust(6)} {'Params.'.rjust(7)}"
+                + (f" {'Entry nodes'.rjust(11)}" if title == "mass_props entry" else "")
+            ]
+            for row in rows:
+                lines.append(
+                    f"{row['name'][:34].ljust(34)} {row['time']:9.3f} {row['time'] / total_time:5.0%} "
+                    f"{row['new_nodes']:10d} {row['new_nodes'] / total_nodes:5.0%} "
+                    f"{row['new_variables']:6d} {row['new_constraints']:6d} {row['new_parameters']:7d}"
+                    + (f" {row['entry_nodes']:11d}" if "entry_nodes" in row else "")
+                )
+            return lines
+
+        lines = table("Section", self.sections)
+        lines.append("")
+        lines += table("mass_props entry", self.entries)
+        lines.append("")
+        lines.append(
+            f"Total: {total_time:.2f} s, {total_nodes} nodes "
+            f"(+ {self.overhead:.2f} s spent measuring the graph, excluded)."
+        )
+        return "\n".join(lines)
+
+
+def profile_build(
+        build: Callable,
+        *args,
+        **kwargs,
+) -> BuildProfile:
+    """
+    Runs a problem build (such as `design_opt.build_problem()`), attributing wall time and CasADi graph growth to each
+    of its `##### Section:` blocks and `mass_props[...]` entries.
+
+    The build is traced line-by-line (`sys.settrace`, on the build function's own frame only). Whenever execution
+    crosses into a different section or entry, the graph is measured: the number of nodes reachable from every
+    expression in the build's local variables (including those inside `mass_props`, `airplane`, `aero`, etc.), and
+    the size of the `opti` problem. Measuring is slow on large graphs, but its time is excluded from the results.
+
+    Args:
+        build: The function that builds the problem. Its local variables should include the `asb.Opti` instance,
+            and (optionally) a `mass_props` dictionary.
+        *args, **kwargs: Arguments to `build`.
+
+    Returns: A BuildProfile.
+    """
+    line_regions, section_names, entry_names = _regions(build)
+    code = build.__code__
+
+    totals = {}  # (section, entry) : {"time", "new_nodes", "new_variables", "new_constraints", "new_parameters"}
+    entry_nodes = {}  # entry : nodes
+    state = {
+        "region"  : None,
+        "clock"   : None,
+        "graph"   : (0, 0, 0, 0),
+        "overhead": 0.,
+    }
+
+    def measure(frame) -> Tuple[int, int, int, int]:
+        found = {}
+        _collect_mx(dict(frame.f_locals), found, set())
+        opti = next((v for v in frame.f_locals.values() if isinstance(v, asb.Opti)), None)
+        if opti is None:
+            return n_nodes(list(found.values())), 0, 0, 0
+        ### Count declared symbols; `opti.nx` and `opti.np` only count those already used in the problem.
+        symbols = opti.advanced.symvar()
+        return (
+            n_nodes(list(found.values())),
+            sum(s.numel() for s in symbols if "_x_" in s.name()),
+            opti.ng,
+            sum(s.numel() for s in symbols if "_p_" in s.name()),
+        )
+
+    def close_region(frame):
+        now = time.perf_counter()
+        region = state["region"]
+        if region is not None:
+            graph = measure(frame)
+            row = totals.setdefault(region, {
+                "time"           : 0.,
+                "new_nodes"      : 0,
+                "new_variables"  : 0,
+                "new_constraints": 0,
+                "new_parameters" : 0,
+            })
+            row["time"] += now - state["clock"]
+            for k, new, old in zip(
+                    ["new_nodes", "new_variables", "new_constraints", "new_parameters"],
+                    graph,
+                    state["graph"],
+            ):
+                row[k] += new - old
+            state["graph"] = graph
+
+            section, entry = region
+            mass_props = frame.f_locals.get("mass_props", {})
+            if entry is not None and isinstance(mass_props, dict) and entry in mass_props:
+                found = {}
+                _collect_mx(mass_props[entry], found, set())
+                entry_nodes[entry] = n_nodes(list(found.values()))
+
+        state["overhead"] += time.perf_counter() - now
+        state["clock"] = time.perf_counter()
+
+    def trace_lines(frame, event, arg):
+        if event == "line":
+            region = line_regions.get(frame.f_lineno)
+            if region is not None and region != state["region"]:
+                close_region(frame)
+                state["region"] = region
+        elif event == "return":
+            close_region(frame)
+            state["region"] = None
+        return trace_lines
+
+    def trace_calls(frame, event, arg):
+        if event == "call" and frame.f_code is code:
+            return trace_lines
+        return None
+
+    previous_trace = sys.gettrace()
+    sys.settrace(trace_calls)
+    try:
+        result = build(*args, **kwargs)
+    finally:
+        sys.settrace(previous_trace)
+
+    def sum_rows(name, regions):
+        row = {
+            "name"           : name,
+            "time"           : 0.,
+            "new_nodes"      : 0,
+            "new_variables"  : 0,
+            "new_constraints": 0,
+            "new_parameters" : 0,
+        }
+        for region in regions:
+            for k, v in totals[region].items():
+                row[k] += v
+        return row
+
+    sections = [
+        sum_rows(name, [region for region in totals if region[0] == name])
+        for name in ["(before first section)"] + section_names
+        if any(region[0] == name for region in totals)
+    ]
+    entries = []
+    for name in entry_names:
+        regions = [region for region in totals if region[1] == name]
+        if len(regions) == 0:  # E.g., an entry in a branch that was not taken
+            continue
+        row = sum_rows(name, regions)
+        row["section"] = regions[0][0]
+        row["entry_nodes"] = entry_nodes.get(name, 0)
+        entries.append(row)
+
+    return BuildProfile(
+        sections=sections,
+        entries=entries,
+        result=result,
+        overhead=state["overhead"],
+    )
+
+
+if __name__ == '__main__':
+    from design_opt import build_problem
+
+    profile = profile_build(build_problem)
+    print(profile.report())
@@ -0,0 +1,961 @@
+import aerosandbox as asb
+import numpy as np
+import casadi as cas
+import hashlib
+import os
+import pickle
+import re
+import time
+from pathlib import Path
+from typing import Union, Callable, Dict, List, Any, Optional, Tuple
+
+default_solve_options = {
+    "ipopt.sb"                   : 'yes',  # Hide the IPOPT banner.
+    "ipopt.mu_strategy"          : "adaptive",
+    "ipopt.fast_step_computation": "yes",
+}  # Mirrors the defaults of `asb.Opti.solve()`, so that compiled solves take the same path as uncompiled ones.
+
+backends = ["c", "sx", "mx"]  # NLP evaluation backends, in fallback order.
+
+cache_format_version = 2  # Part of `problem_hash()`; bump when what a CompiledProblem stores changes.
+
+
+class CompiledProblem:
+    """
+    A built `asb.Opti` problem, detached from the Python objects that built it.
+
+    Holds the NLP as CasADi Functions of the decision vector `x` and the parameter vector `p`:
+        * `nlp`: (x, p) -> (f, g)
+        * `bounds`: (p) -> (lbg, ubg)
+        * `outputs`: (x, p) -> named outputs
+
+    along with the initial guess, the default parameter values, the scale of each variable (`variable_scales`: the
+    change in `x` for a 100% change in the variable's value), and the names of every variable, parameter, and output.
+    Because everything is a CasADi Function, the whole problem can be pickled to disk and loaded again in a fraction of
+    the time it takes to rebuild the expression graph.
+    """
+
+    def __init__(self,
+                 nlp: cas.Function,
+                 bounds: cas.Function,
+                 outputs: cas.Function,
+                 x0: np.ndarray,
+                 p0: np.ndarray,
+                 variable_names: List[str],
+                 parameter_names: List[str],
+                 unused_parameter_names: List[str] = None,
+                 variable_scales: np.ndarray = None,
+                 ):
+        self.nlp = nlp
+        self.bounds = bounds
+        self.outputs = outputs
+        self.x0 = np.array(x0, dtype=float).flatten()
+        self.p0 = np.array(p0, dtype=float).flatten()
+        self.variable_names = list(variable_names)
+        self.parameter_names = list(parameter_names)
+        self.unused_parameter_names = [] if unused_parameter_names is None else list(unused_parameter_names)
+        self.variable_scales = (
+            np.maximum(np.abs(self.x0), 1)
+            if variable_scales is None
+            else np.array(variable_scales, dtype=float).flatten()
+        )
+        self._solvers = {}  # Solvers are expensive to create, so they are reused across solves with the same options.
+        self._graph_hash = None
+        self._derivatives = {}  # Derivative Functions, built on first use and shared between copies.
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_solvers"] = {}
+        state["_derivatives"] = {}
+        return state
+
+    def __copy__(self):
+        problem = self.__class__.__new__(self.__class__)
+        problem.__dict__.update(self.__dict__)  # Copies share one solver cache, unlike pickled problems.
+        return problem
+
+    def __setstate__(self, state):
+        self.__dict__.update({"_graph_hash": None, "_derivatives": {}, **state})
+        if "variable_scales" not in state:  # Pickled before variable scales were recorded
+            self.variable_scales = np.maximum(np.abs(self.x0), 1)
+
+    @classmethod
+    def from_opti(cls,
+                  opti: asb.Opti,
+                  parameters: Dict[str, cas.MX] = None,
+                  outputs: Dict[str, Any] = None,
+                  ) -> "CompiledProblem":
+        """
+        Compiles an `asb.Opti` problem (with its objective and all constraints already declared).
+
+        Args:
+            opti: The problem to compile.
+            parameters: A dictionary of {name: parameter}, where each parameter is the result of a call to
+                `opti.parameter()`. Unnamed parameters are named `p0`, `p1`, etc. by their position in `opti.p`.
+                Parameters that the problem does not depend on are dropped from `opti.p` by CasADi; their names are
+                kept in `unused_parameter_names`, and values given for them at solve time are ignored.
+            outputs: A dictionary of {name: expression} of quantities to make available on the solution. Non-symbolic
+                values (e.g., floats) are allowed and are stored as constants.
+
+        Returns: A CompiledProblem.
+        """
+        if parameters is None:
+            parameters = {}
+        if outputs is None:
+            outputs = {}
+
+        x = opti.x
+        p = opti.p
+
+        variable_names = opti_variable_names(opti)
+
+        ### Name the parameters by their position in `opti.p`
+        parameter_symbols = cas.symvar(p)
+        parameter_names = [f"p{i}" for i in range(p.shape[0])]
+        unused_parameter_names = []
+        for name, param in parameters.items():
+            offset = 0
+            for symbol in parameter_symbols:
+                if cas.is_equal(symbol, param):
+                    n_params = symbol.shape[0] * symbol.shape[1]
+                    if n_params == 1:
+                        parameter_names[offset] = name
+                    else:
+                        for i in range(n_params):
+                            parameter_names[offset + i] = f"{name}[{i}]"
+                    break
+                offset += symbol.shape[0] * symbol.shape[1]
+            else:
+                unused_parameter_names.append(name)
+
+        ### Find the scale of each decision variable: the change in x for a 100% change in the variable's value.
+        # `asb.Opti.variable()` scales each variable (value = scale * x) or log-transforms it (value = exp(k * x)),
+        # so that equal steps in x are not equal changes in value. Found from each variable's expression, at x0.
+        x0 = opti.value(x, opti.initial())
+        variable_expressions = cas.vertcat(*[
+            cas.vec(var)
+            for category in opti.variables_categorized.values()
+            for var in category
+            if isinstance(var, cas.MX)
+        ])
+        jacobian = cas.Function("jacobian", [x, p], [variable_expressions, cas.jacobian(variable_expressions, x)])
+        values, derivatives = jacobian(x0, opti.value(p, opti.value_parameters()))
+        values = np.array(values, dtype=float).flatten()
+        derivatives = derivatives.sparse().tocsr()
+        rows, columns = jacobian.sparsity_out(1).get_triplet()
+        row_counts = np.bincount(rows, minlength=len(values))
+        variable_scales = np.maximum(np.abs(np.array(x0, dtype=float).flatten()), 1)
+        found = set()
+        for i, j in zip(rows, columns):
+            if row_counts[i] != 1 or j in found or derivatives[i, j] == 0:
+                continue
+            variable_scales[j] = (
+                    (abs(values[i]) if values[i] != 0 else 1) /
+                    abs(derivatives[i, j])
+            )
+            found.add(j)
+
+        ### Build the output function
+        output_names = []
+        output_exprs = []
+        for name, value in outputs.items():
+            try:
+                output_exprs.append(cas.MX(value))
+            except (NotImplementedError, TypeError):
+                continue
+            output_names.append(name)
+
+        return cls(
+            nlp=cas.Function("nlp", [x, p], [opti.f, opti.g], ["x", "p"], ["f", "g"]),
+            bounds=cas.Function("bounds", [p], [opti.lbg, opti.ubg], ["p"], ["lbg", "ubg"]),
+            outputs=cas.Function("outputs", [x, p], output_exprs, ["x", "p"], output_names),
+            x0=x0,
+            p0=opti.value(p, opti.value_parameters()),
+            variable_names=variable_names,
+            parameter_names=parameter_names,
+            unused_parameter_names=unused_parameter_names,
+            variable_scales=variable_scales,
+        )
+
+    @property
+    def n_variables(self) -> int:
+        return len(self.x0)
+
+    @property
+    def n_parameters(self) -> int:
+        return len(self.p0)
+
+    @property
+    def n_constraints(self) -> int:
+        return self.bounds.numel_out(0)
+
+    @property
+    def output_names(self) -> List[str]:
+        return self.outputs.name_out()
+
+    def parameter_vector(self,
+                         parameter_values: Dict[str, Union[float, np.ndarray]] = None,
+                         ) -> np.ndarray:
+        """
+        Assembles a full parameter vector from the default parameter values, overridden by `parameter_values`
+        ({name: value}).
+        """
+        p = np.array(self.p0)
+        if parameter_values is None:
+            return p
+        for name, value in parameter_values.items():
+            if name in self.unused_parameter_names:
+                continue
+            elif name in self.parameter_names:
+                p[self.parameter_names.index(name)] = value
+            else:
+                indices = [
+                    i for i, n in enumerate(self.parameter_names)
+                    if n.startswith(f"{name}[")
+                ]
+                if len(indices) == 0:
+                    raise KeyError(f"No parameter named `{name}`! Options: {self.parameter_names}")
+                p[indices] = np.array(value).flatten()
+        return p
+
+    def kkt(self) -> cas.Function:
+        """
+        Returns a Function that evaluates the derivatives needed for parametric sensitivities, at a primal-dual point:
+            (x, p, lam_g) -> (hess_x_L, jac_p_grad_x_L, g, jac_x_g, jac_p_g, lbg, ubg, jac_p_lbg, jac_p_ubg)
+        where L = f + lam_g' g is the Lagrangian. Built on first use (which takes about as long as creating a
+        solver), then reused.
+        """
+        if "kkt" not in self._derivatives:
+            x = cas.MX.sym("x", self.n_variables)
+            p = cas.MX.sym("p", self.n_parameters)
+            lam_g = cas.MX.sym("lam_g", self.n_constraints)
+            f, g = self.nlp.call([x, p], True, False)
+            lbg, ubg = self.bounds.call([p], True, False)
+            grad_x_L = cas.gradient(f + cas.dot(lam_g, g), x)
+            self._derivatives["kkt"] = cas.Function(
+                "kkt",
+                [x, p, lam_g],
+                [
+                    cas.jacobian(grad_x_L, x),
+                    cas.jacobian(grad_x_L, p),
+                    g,
+                    cas.jacobian(g, x),
+                    cas.jacobian(g, p),
+                    lbg,
+                    ubg,
+                    cas.jacobian(lbg, p),
+                    cas.jacobian(ubg, p),
+                ],
+                ["x", "p", "lam_g"],
+                ["hess_x_L", "jac_p_grad_x_L", "g", "jac_x_g", "jac_p_g", "lbg", "ubg", "jac_p_lbg", "jac_p_ubg"],
+            )
+        return self._derivatives["kkt"]
+
+    def variable_bounds(self,
+                        parameter_values: Dict[str, Union[float, np.ndarray]] = None,
+                        ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the bounds on each element of the decision vector (in its scaled, as-optimized form) that are implied
+        by the constraints.
+
+        `asb.Opti.variable(lower_bound=..., upper_bound=...)` declares bounds as constraints that are linear in a
+        single element of the decision vector (also for log-transformed variables, whose bounds are on the log). Those
+        constraints are found here by their structure - one nonzero in their row of the constraint Jacobian, with the
+        same value at two different points - and turned back into bounds.
+
+        Args:
+            parameter_values: [Optional] A dictionary of {parameter name: value}, as in `solve()`. Matters only where
+                a bound depends on a parameter.
+
+        Returns: A tuple of (lower bounds, upper bounds), each of length `n_variables`; -inf and inf where unbounded.
+        """
+        if "jac_g" not in self._derivatives:
+            x = cas.MX.sym("x", self.n_variables)
+            p = cas.MX.sym("p", self.n_parameters)
+            f, g = self.nlp.call([x, p], True, False)
+            self._derivatives["jac_g"] = cas.Function(
+                "jac_g",
+                [x, p],
+                [g, cas.jacobian(g, x)],
+                ["x", "p"],
+                ["g", "jac_x_g"],
+            )
+        jac_g = self._derivatives["jac_g"]
+
+        p = self.parameter_vector(parameter_values)
+        lbg, ubg = [np.array(b, dtype=float).flatten() for b in self.bounds(p)]
+        x_a = self.x0
+        x_b = self.x0 + 0.1 * np.maximum(np.abs(self.x0), 1)
+        g_a, J_a = jac_g(x_a, p)
+        g_b, J_b = jac_g(x_b, p)
+        g_a = np.array(g_a, dtype=float).flatten()
+        J_a = J_a.sparse().tocsr()
+        J_b = J_b.sparse().tocsr()
+        rows, columns = jac_g.sparsity_out(1).get_triplet()
+        row_counts = np.bincount(rows, minlength=self.n_constraints)
+
+        lbx = np.full(self.n_variables, -np.inf)
+        ubx = np.full(self.n_variables, np.inf)
+        for i, j in zip(rows, columns):
+            if row_counts[i] != 1:
+                continue
+            a = J_a[i, j]
+            if a == 0 or not np.isclose(J_b[i, j], a, rtol=1e-10, atol=0):
+                continue
+            c = g_a[i] - a * x_a[j]  # g_i = a * x_j + c
+            lower, upper = (lbg[i] - c) / a, (ubg[i] - c) / a
+            if a < 0:
+                lower, upper = upper, lower
+            lbx[j] = max(lbx[j], lower)
+            ubx[j] = min(ubx[j], upper)
+        return lbx, ubx
+
+    def output_jacobian(self) -> cas.Function:
+        """
+        Returns a Function that evaluates the Jacobians of all outputs (flattened and stacked, in the order of
+        `output_names`) with respect to x and p:
+            (x, p) -> (jac_x, jac_p)
+        Built on first use, then reused.
+        """
+        if "output_jacobian" not in self._derivatives:
+            x = cas.MX.sym("x", self.n_variables)
+            p = cas.MX.sym("p", self.n_parameters)
+            outputs = cas.vertcat(*[
+                cas.vec(output)
+                for output in self.outputs.call([x, p], True, False)
+            ])
+            self._derivatives["output_jacobian"] = cas.Function(
+                "output_jacobian",
+                [x, p],
+                [cas.jacobian(outputs, x), cas.jacobian(outputs, p)],
+                ["x", "p"],
+                ["jac_x", "jac_p"],
+            )
+        return self._derivatives["output_jacobian"]
+
+    def graph_hash(self) -> str:
+        """
+        A hash of the NLP expression graph alone. Identifies the generated C code for the "c" backend.
+        """
+        if self._graph_hash is None:
+            self._graph_hash = hashlib.sha256(self.nlp.serialize().encode()).hexdigest()[:16]
+        return self._graph_hash
+
+    def nlpsol(self,
+               options: Dict = None,
+               backend: str = "mx",
+               codegen_directory: Union[str, Path] = "cache/nlp",
+               compile_timeout: float = 1800,
+               verbose: bool = False,
+               ) -> cas.Function:
+        """
+        Creates an IPOPT solver for this problem. Solver options are merged on top of `default_solve_options`.
+
+        Args:
+            options: [Optional] A dictionary of options to pass to the solver.
+            backend: How IPOPT's callbacks (objective, gradient, constraint Jacobian, Lagrangian Hessian) are
+                evaluated. Options are:
+                * "mx": The MX virtual machine. Always works; this is the default.
+                * "sx": The graph is expanded to SX first, which evaluates faster but fails on some operations
+                    (e.g., B-spline interpolants).
+                * "c": The callbacks are generated as C code and compiled into a shared library with the system C
+                    compiler. The library is cached in `codegen_directory`, keyed by `graph_hash()`.
+                If a backend fails, the next one down this list is tried (c -> sx -> mx), with a warning. Use
+                `backend_of()` to find which backend a solver actually ended up with.
+            codegen_directory: Where to cache compiled shared libraries for the "c" backend.
+            compile_timeout: The maximum time [sec] to spend compiling for the "c" backend before falling back.
+            verbose: If True, prints progress of code generation and compilation.
+
+        Returns: An nlpsol Function.
+        """
+        if options is None:
+            options = {}
+        options = {
+            **default_solve_options,
+            **options,
+        }
+        if backend not in backends:
+            raise ValueError(f"Bad value of `backend`! Options: {backends}")
+
+        for fallback in backends[backends.index(backend):]:
+            try:
+                if fallback == "mx":
+                    nlp = self._nlp_expressions()
+                elif fallback == "sx":
+                    nlp = self._nlp_expressions(expand=True)
+                elif fallback == "c":
+                    nlp = str(self._compile_library(
+                        codegen_directory=codegen_directory,
+                        timeout=compile_timeout,
+                        verbose=verbose,
+                    ))
+                return cas.nlpsol(f"solver_{fallback}", "ipopt", nlp, options)
+            except Exception as e:
+                import warnings
+                warnings.warn(f"The \"{fallback}\" backend failed ({str(e).strip().splitlines()[-1]}); falling back.")
+        raise RuntimeError("All NLP backends failed!")  # Unreachable, since "mx" always works.
+
+    def backend_of(self, solver: cas.Function) -> str:
+        """
+        Returns the backend ("mx", "sx", or "c") that a solver from `nlpsol()` actually uses, after any fallback.
+        """
+        return solver.name().split("_")[-1]
+
+    def _nlp_expressions(self, expand: bool = False) -> Dict[str, Union[cas.MX, cas.SX]]:
+        if expand:
+            nlp = self.nlp.expand()
+            x = cas.SX.sym("x", self.n_variables)
+            p = cas.SX.sym("p", self.n_parameters)
+            f, g = nlp(x, p)
+        else:
+            x = cas.MX.sym("x", self.n_variables)
+            p = cas.MX.sym("p", self.n_parameters)
+            f, g = self.nlp.call([x, p], True, False)  # Inlined, so that derivatives are taken through the full graph.
+        return {"x": x, "p": p, "f": f, "g": g}
+
+    def _compile_library(self,
+                         codegen_directory: Union[str, Path] = "cache/nlp",
+                         compiler: str = "cc",
+                         flags: List[str] = None,
+                         timeout: float = 1800,
+                         verbose: bool = False,
+                         ) -> Path:
+        """
+        Generates C code for IPOPT's callbacks and compiles it into a shared library, unless one already exists for
+        this graph. Returns the path to the library.
+        """
+        import shutil
+        import subprocess
+
+        if flags is None:
+            flags = ["-O1", "-fPIC", "-shared"]
+        codegen_directory = Path(codegen_directory)
+        codegen_directory.mkdir(parents=True, exist_ok=True)
+        name = f"nlp_{self.graph_hash()}"
+        library = codegen_directory / f"{name}.so"
+        failure_log = codegen_directory / f"{name}.failed"  # Records a failed compile, so that it is not retried.
+        if library.exists():
+            return library
+        if failure_log.exists():
+            raise RuntimeError(f"Compilation failed previously; see {failure_log}.")
+        if shutil.which(compiler) is None:
+            raise RuntimeError(f"No C compiler `{compiler}` found.")
+
+        ### Generate C code for the callbacks.
+        start = time.time()
+        solver = cas.nlpsol("codegen", "ipopt", self._nlp_expressions(), default_solve_options)
+        tmp_source = codegen_directory / f"{name}_{os.getpid()}.c"  # Must be a valid C identifier.
+        solver.generate_dependencies(tmp_source.name)  # CasADi writes to the working directory.
+        os.replace(tmp_source.name, tmp_source)
+        if verbose:
+            print(f"Generated {tmp_source.stat().st_size / 1e6:.1f} MB of C in {time.time() - start:.1f} s.")
+
+        ### Compile it. Large graphs can generate more C than the compiler can handle, so this is bounded in time.
+        start = time.time()
+        tmp_library = codegen_directory / f"{name}.{os.getpid()}.so"
+        try:
+            result = subprocess.run(
+                [compiler, *flags, str(tmp_source), "-o", str(tmp_library)],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+            if result.returncode != 0:
+                raise RuntimeError(
+                    f"`{compiler}` exited with code {result.returncode}: {result.stderr.strip()[-500:]}"
+                )
+            os.replace(tmp_library, library)
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            if isinstance(e, subprocess.TimeoutExpired):
+                e = RuntimeError(f"`{compiler}` timed out after {timeout} s.")
+            failure_log.write_text(f"{e}\n")
+            raise e
+        finally:
+            tmp_source.unlink(missing_ok=True)
+            tmp_library.unlink(missing_ok=True)
+        if verbose:
+            print(f"Compiled {library} in {time.time() - start:.1f} s.")
+        return library
+
+    def get_solver(self,
+                   max_iter: int = 1000,
+                   max_runtime: float = 1e20,
+                   verbose: bool = True,
+                   options: Dict = None,
+                   backend: str = "mx",
+                   ) -> cas.Function:
+        """
+        Returns the solver that `solve()` uses with these settings, creating it on first use. Arguments follow
+        `solve()`.
+
+        Creating a solver takes several seconds on large problems (CasADi builds the derivative graphs), so it is done
+        once per set of settings and reused.
+        """
+        solver_options = {
+            "ipopt.max_iter"    : max_iter,
+            "ipopt.max_cpu_time": max_runtime,
+        }
+        if verbose:
+            solver_options["ipopt.print_level"] = 5
+        else:
+            solver_options["print_time"] = False
+            solver_options["ipopt.print_level"] = 0
+        if options is not None:
+            solver_options.update(options)
+        key = repr((backend, sorted(solver_options.items())))
+        if key not in self._solvers:
+            self._solvers[key] = self.nlpsol(options=solver_options, backend=backend)
+        return self._solvers[key]
+
+    def solve(self,
+              parameter_values: Dict[str, Union[float, np.ndarray]] = None,
+              x0: np.ndarray = None,
+              lam_g0: np.ndarray = None,
+              max_iter: int = 1000,
+              max_runtime: float = 1e20,
+              verbose: bool = True,
+              options: Dict = None,
+              behavior_on_failure: str = "raise",
+              solver: cas.Function = None,
+              backend: str = "mx",
+              telemetry: Any = None,
+              results_store: Any = None,
+              ) -> "CompiledSolution":
+        """
+        Solves the problem with IPOPT. Arguments follow `asb.Opti.solve()`.
+
+        Args:
+            parameter_values: [Optional] A dictionary of {parameter name: value}. Parameters not given take their
+                default values.
+            x0: [Optional] An initial guess for the decision vector. Defaults to the initial guess the problem was
+                built with.
+            lam_g0: [Optional] An initial guess for the constraint multipliers.
+            max_iter: The maximum number of iterations allowed before giving up.
+            max_runtime: The maximum allowable runtime [sec] before giving up.
+            verbose: If True, IPOPT will print its progress to the console.
+            options: [Optional] A dictionary of options to pass to the solver.
+            behavior_on_failure: What should we do if the optimization fails? Options are:
+                * "raise": Raise a RuntimeError. This is the default behavior.
+                * "return_last": Returns the solution from the last iteration, and raise a warning.
+            solver: [Optional] A pre-built solver from `CompiledProblem.nlpsol()`. If given, `max_iter`,
+                `max_runtime`, `verbose` and `options` are ignored. Otherwise, a solver is created on first use and
+                reused by later solves with the same settings.
+            backend: How IPOPT's callbacks are evaluated: "mx", "sx", or "c". See `CompiledProblem.nlpsol()`. The
+                backend actually used (after any fallback) is reported in `sol.stats()["backend"]`.
+            telemetry: [Optional] A `telemetry.TelemetryLog` (or anything with a `write(sol)` method) to record the
+                solve to - its per-iteration history and callback timings. Failed solves are recorded too.
+            results_store: [Optional] A `results_store.ResultsStore` (or anything with a `write(sol)` method) to
+                append the solution to, as one row: its parameters, decision vector, outputs, and solver stats. Failed
+                solves are recorded too.
+
+        Returns: A CompiledSolution.
+        """
+        if solver is None:
+            solver = self.get_solver(
+                max_iter=max_iter,
+                max_runtime=max_runtime,
+                verbose=verbose,
+                options=options,
+                backend=backend,
+            )
+
+        p = self.parameter_vector(parameter_values)
+        lbg, ubg = self.bounds(p)
+        kwargs = dict(
+            x0=self.x0 if x0 is None else x0,
+            p=p,
+            lbg=lbg,
+            ubg=ubg,
+        )
+        if lam_g0 is not None:
+            kwargs["lam_g0"] = lam_g0
+
+        start = time.perf_counter()
+        result = solver(**kwargs)
+        time_solve = time.perf_counter() - start
+        sol = CompiledSolution(
+            problem=self,
+            x=result["x"],
+            p=p,
+            f=result["f"],
+            lam_g=result["lam_g"],
+            stats={
+                "t_wall_total": time_solve,
+                **solver.stats(),
+                "backend"     : self.backend_of(solver),
+            },
+        )
+        if telemetry is not None:
+            telemetry.write(sol)
+        if results_store is not None:
+            results_store.write(sol)
+
+        if not sol.stats()["success"]:
+            if behavior_on_failure == "raise":
+                raise RuntimeError(f"Optimization failed: {sol.stats()['return_status']}")
+            elif behavior_on_failure == "return_last":
+                import warnings
+                warnings.warn("Optimization failed. Returning last solution.")
+            else:
+                raise ValueError("Bad value of `behavior_on_failure`!")
+
+        return sol
+
+    def save(self, filename: Union[str, Path]) -> None:
+        """
+        Saves the problem to disk. The write is atomic, so concurrent readers never see a partial file.
+        """
+        filename = Path(filename)
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        tmp_filename = filename.with_name(f"{filename.name}.{os.getpid()}.tmp")
+        with open(tmp_filename, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filename, filename)
+
+    @classmethod
+    def load(cls, filename: Union[str, Path]) -> "CompiledProblem":
+        with open(filename, "rb") as f:
+            return pickle.load(f)
+
+
+class CompiledSolution:
+    """
+    The solution of a CompiledProblem. Outputs and variables are looked up by name:
+
+        >>> sol = problem.solve()
+        >>> sol("transport_efficiency_MJ_per_seat_km")
+    """
+
+    def __init__(self,
+                 problem: CompiledProblem,
+                 x: np.ndarray,
+                 p: np.ndarray,
+                 f: float,
+                 lam_g: np.ndarray,
+                 stats: Dict[str, Any],
+                 ):
+        self.problem = problem
+        self.x = np.array(x, dtype=float).flatten()
+        self.p = np.array(p, dtype=float).flatten()
+        self.f = float(f)
+        self.lam_g = np.array(lam_g, dtype=float).flatten()
+        self._stats = stats
+        self._outputs = None
+        self._sensitivities = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["problem"] = None  # The problem is large; whoever unpickles this should reattach it.
+        return state
+
+    def __call__(self, name: str) -> Union[float, np.ndarray]:
+        return self.value(name)
+
+    def value(self, name: str) -> Union[float, np.ndarray]:
+        """
+        Gets the value of an output, a decision variable (in its scaled, as-optimized form), or a parameter, by name.
+        """
+        outputs = self.outputs()
+        if name in outputs:
+            return outputs[name]
+        elif name in self.problem.variable_names:
+            return self.x[self.problem.variable_names.index(name)]
+        elif name in self.problem.parameter_names:
+            return self.p[self.problem.parameter_names.index(name)]
+        else:
+            raise KeyError(f"No output, variable, or parameter named `{name}`!")
+
+    def outputs(self) -> Dict[str, Union[float, np.ndarray]]:
+        """
+        Returns all outputs as a dictionary of {name: value}, evaluated in a single Function call.
+        """
+        if self._outputs is None:
+            self._outputs = {
+                k: _to_python(v)
+                for k, v in self.problem.outputs(x=self.x, p=self.p).items()
+            }
+        return self._outputs
+
+    def stats(self) -> Dict[str, Any]:
+        return self._stats
+
+    def variable_sensitivities(self) -> np.ndarray:
+        """
+        Computes the derivatives of the optimal decision vector with respect to every parameter, dx*/dp, by
+        differentiating the KKT conditions at this solution (no re-solve is needed).
+
+        A constraint is taken as active if its multiplier is larger than its slack (assuming strict complementarity,
+        which holds for well-posed problems solved to IPOPT's default tolerance). The derivatives are exact for
+        parameter changes small enough that the active set does not change.
+
+        Returns: An array of shape (n_variables, n_parameters). Column j is dx*/dp_j, in the same (scaled) form as
+        `sol.x`.
+        """
+        if "dx_dp" not in self._sensitivities:
+            kkt = {
+                k: np.array(v, dtype=float)
+                for k, v in self.problem.kkt()(x=self.x, p=self.p, lam_g=self.lam_g).items()
+            }
+            g = kkt["g"].flatten()
+            lbg = kkt["lbg"].flatten()
+            ubg = kkt["ubg"].flatten()
+
+            ### Find the active set, and the bound each active constraint sits on.
+            is_equality = lbg == ubg
+            on_lower = is_equality | ((self.lam_g < 0) & (-self.lam_g > g - lbg))
+            on_upper = ~is_equality & (self.lam_g > 0) & (self.lam_g > ubg - g)
+            active = on_lower | on_upper
+            jac_p_bound = np.where(on_lower[:, None], kkt["jac_p_lbg"], kkt["jac_p_ubg"])[active]
+
+            ### Solve the linearized KKT system: [H, J'; J, 0] [dx; dlam] = -[dL_x/dp; dg/dp - dbound/dp]
+            J = kkt["jac_x_g"][active]
+            n_x = self.problem.n_variables
+            n_a = J.shape[0]
+            K = np.block([
+                [kkt["hess_x_L"], J.T],
+                [J, np.zeros((n_a, n_a))],
+            ])
+            rhs = -np.concatenate([
+                kkt["jac_p_grad_x_L"],
+                kkt["jac_p_g"][active] - jac_p_bound,
+            ], axis=0)
+            try:
+                solution = np.linalg.solve(K, rhs)
+            except np.linalg.LinAlgError:  # Degenerate active set; take the least-squares solution.
+                solution = np.linalg.lstsq(K, rhs, rcond=None)[0]
+            self._sensitivities["dx_dp"] = solution[:n_x]
+            self._sensitivities["dlam_g_dp"] = np.zeros((self.problem.n_constraints, self.problem.n_parameters))
+            self._sensitivities["dlam_g_dp"][active] = solution[n_x:]
+        return self._sensitivities["dx_dp"]
+
+    def sensitivities(self,
+                      outputs: List[str] = None,
+                      parameters: List[str] = None,
+                      ) -> Dict[str, Dict[str, Union[float, np.ndarray]]]:
+        """
+        Computes the derivatives of outputs with respect to parameters, at the optimum: how each output would change
+        if the problem were re-solved with a slightly different parameter value. Accounts for the re-optimization of
+        every decision variable (via `variable_sensitivities()`), so no re-solve is needed.
+
+        For example, the change in transport energy if the tank fuel mass fraction were 5% better is, to first order:
+
+            >>> d = sol.sensitivities(["transport_efficiency_MJ_per_seat_km"], ["fuel_tank_fuel_mass_fraction"])
+            >>> d["transport_efficiency_MJ_per_seat_km"]["fuel_tank_fuel_mass_fraction"] * 0.05 * fraction
+
+        Args:
+            outputs: [Optional] The names of the outputs (or decision variables) to differentiate. Defaults to all
+                outputs.
+            parameters: [Optional] The names of the parameters to differentiate with respect to. Defaults to all
+                parameters. Parameters that the problem does not depend on have zero derivatives.
+
+        Returns: A nested dictionary of {output name: {parameter name: d(output)/d(parameter)}}. Derivatives of vector
+        outputs are arrays.
+        """
+        problem = self.problem
+        if outputs is None:
+            outputs = problem.output_names
+        if parameters is None:
+            parameters = problem.parameter_names + problem.unused_parameter_names
+        for parameter in parameters:
+            if parameter not in problem.parameter_names + problem.unused_parameter_names:
+                raise KeyError(f"No parameter named `{parameter}`! Options: {problem.parameter_names}")
+
+        if "doutputs_dp" not in self._sensitivities:
+            jacobians = problem.output_jacobian()(x=self.x, p=self.p)
+            self._sensitivities["doutputs_dp"] = (
+                    np.array(jacobians["jac_x"], dtype=float) @ self.variable_sensitivities() +
+                    np.array(jacobians["jac_p"], dtype=float)
+            )
+        doutputs_dp = self._sensitivities["doutputs_dp"]
+        offsets = np.cumsum([0] + [problem.outputs.numel_out(i) for i in range(problem.outputs.n_out())])
+
+        sensitivities = {}
+        for output in outputs:
+            if output in problem.output_names:
+                i = problem.output_names.index(output)
+                rows = doutputs_dp[offsets[i]:offsets[i + 1]]
+            elif output in problem.variable_names:
+                rows = self.variable_sensitivities()[[problem.variable_names.index(output)]]
+            else:
+                raise KeyError(f"No output or variable named `{output}`!")
+            sensitivities[output] = {
+                parameter: (
+                    _to_python(rows[:, problem.parameter_names.index(parameter)])
+                    if parameter in problem.parameter_names else
+                    _to_python(np.zeros(len(rows)))
+                )
+                for parameter in parameters
+            }
+        return sensitivities
+
+    def sensitivity(self, output: str, parameter: str) -> Union[float, np.ndarray]:
+        """
+        The derivative of one output with respect to one parameter, at the optimum. See `sensitivities()`.
+        """
+        return self.sensitivities([output], [parameter])[output][parameter]
+
+    def multiplier_sensitivities(self) -> np.ndarray:
+        """
+        Computes the derivatives of the optimal constraint multipliers with respect to every parameter, dlam_g*/dp,
+        alongside `variable_sensitivities()` (see there). Inactive constraints have zero multipliers, and zero
+        derivatives.
+
+        Returns: An array of shape (n_constraints, n_parameters).
+        """
+        self.variable_sensitivities()
+        return self._sensitivities["dlam_g_dp"]
+
+    def opti_sol(self, opti: asb.Opti) -> asb.OptiSol:
+        """
+        Returns this solution as an `asb.OptiSol` of the `asb.Opti` problem that the CompiledProblem was compiled
+        from (or of an identical rebuild of it, such as `design_opt.get_problem()["opti"]`), so that whole objects
+        can be substituted, as with an `asb.Opti` solve:
+
+            >>> sol = problem.solve().opti_sol(opti)
+            >>> airplane = sol(airplane)
+
+        Parameters that the compiled problem does not depend on take their values in `opti`.
+        """
+        return _CompiledOptiSol(opti, self)
+
+
+class _CompiledOptiSol(asb.OptiSol):
+    """
+    An `asb.OptiSol` backed by a CompiledSolution, rather than by a CasADi OptiSol. See `CompiledSolution.opti_sol()`.
+    """
+
+    def __init__(self,
+                 opti: asb.Opti,
+                 sol: CompiledSolution,
+                 ):
+        if opti.x.shape[0] != len(sol.x) or opti.p.shape[0] != len(sol.p):
+            raise ValueError("The solution is not of this `opti` problem (the number of variables or parameters "
+                             "differs).")
+        super().__init__(opti=opti, cas_optisol=None)
+        self.compiled_solution = sol
+
+    def _value_scalar(self, x: Union[cas.MX, np.ndarray, float, int]) -> Union[float, np.ndarray]:
+        if not isinstance(x, cas.MX):
+            return x
+        x = cas.substitute(
+            [x],
+            [self.opti.x, self.opti.p],
+            [cas.MX(cas.DM(self.compiled_solution.x)), cas.MX(cas.DM(self.compiled_solution.p))],
+        )[0]
+        return cas.Opti.value(self.opti, x, self.opti.value_parameters())
+
+    def stats(self) -> Dict[str, Any]:
+        return self.compiled_solution.stats()
+
+    def value_variables(self):
+        return self.compiled_solution.x
+
+    def value_parameters(self):
+        return self.compiled_solution.p
+
+
+def opti_variable_names(opti: asb.Opti) -> List[str]:
+    """
+    Names each entry of an `asb.Opti` problem's decision vector (`opti.x`) by the variable it was declared as (e.g.,
+    `wing_span = opti.variable(...)` is "wing_span"; a vector variable `x` is "x[0]", "x[1]", ...).
+    """
+    variable_names = []
+    for index, (filename, lineno, code_context, n_vars) in opti._variable_declarations.items():
+        match = re.match(r"\s*(\w+)\s*=", code_context)
+        name = match.group(1) if match is not None else f"x{index}"
+        if name in variable_names:
+            name = f"{name}_{index}"
+        if n_vars == 1:
+            variable_names.append(name)
+        else:
+            variable_names.extend([f"{name}[{i}]" for i in range(n_vars)])
+    return variable_names
+
+
+def _to_python(value: cas.DM) -> Union[float, np.ndarray]:
+    value = np.array(value, dtype=float)
+    if value.size == 1:
+        return float(value.flatten()[0])
+    return value.flatten()
+
+
+def callback_timings(stats: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """
+    Extracts per-callback timing from solver stats (e.g., `sol.stats()`).
+
+    Returns: A dictionary of {callback name: {"n_calls": ..., "t_wall": ..., "t_proc": ...}}, with times in seconds,
+    for each of IPOPT's callbacks ("nlp_f", "nlp_g", "nlp_grad_f", "nlp_jac_g", "nlp_hess_l") and for the solver's
+    whole solve ("total", which includes the callbacks).
+    """
+    timings = {}
+    for name in ["nlp_f", "nlp_g", "nlp_grad_f", "nlp_jac_g", "nlp_hess_l", "total"]:
+        if f"t_wall_{name}" not in stats:
+            continue
+        timings[name] = {
+            "n_calls": int(stats.get(f"n_call_{name}", 1)),
+            "t_wall" : float(stats[f"t_wall_{name}"]),
+            "t_proc" : float(stats.get(f"t_proc_{name}", np.nan)),
+        }
+    return timings
+
+
+def problem_hash(
+        source_files: List[Union[str, Path]],
+        **kwargs,
+) -> str:
+    """
+    Computes a hash that identifies a built problem: the contents of every file the build reads (model source,
+    polar caches), any build arguments (`kwargs`), the CasADi and AeroSandbox versions (which affect both the
+    graph and the serialization format), and `cache_format_version`.
+    """
+    h = hashlib.sha256()
+    for source_file in source_files:
+        h.update(Path(source_file).name.encode())
+        h.update(Path(source_file).read_bytes())
+    for k in sorted(kwargs.keys()):
+        h.update(f"{k}={kwargs[k]!r}".encode())
+    h.update(cas.__version__.encode())
+    h.update(asb.__version__.encode())
+    h.update(f"format={cache_format_version}".encode())
+    return h.hexdigest()[:16]
+
+
+def load_or_build(
+        build: Callable[[], CompiledProblem],
+        source_files: List[Union[str, Path]],
+        cache_directory: Union[str, Path] = "cache/nlp",
+        verbose: bool = False,
+        **kwargs,
+) -> CompiledProblem:
+    """
+    Loads a CompiledProblem from the on-disk cache if one exists with a matching `problem_hash()`; otherwise, builds it
+    with `build()` and saves it to the cache.
+
+    Args:
+        build: A function that builds the CompiledProblem from scratch.
+        source_files: All files that the build reads. Editing any of them invalidates the cache.
+        cache_directory: Where to store the compiled problems.
+        verbose: If True, prints whether the problem was loaded or built.
+        **kwargs: Any build arguments (e.g., `fuel_type`). These are part of the hash.
+
+    Returns: A CompiledProblem.
+    """
+    filename = Path(cache_directory) / f"{problem_hash(source_files, **kwargs)}.pkl"
+
+    if filename.exists():
+        try:
+            problem = CompiledProblem.load(filename)
+            problem.graph_hash()  # Computed once here, so that copies of this problem share it.
+            if verbose:
+                print(f"Loaded compiled problem from {filename}.")
+            return problem
+        except Exception as e:  # A corrupt or incompatible cache file is just a cache miss.
+            if verbose:
+                print(f"Could not load {filename} ({e}); rebuilding.")
+
+    problem = build()
+    problem.graph_hash()  # Stored with the problem, so that it is not recomputed on every load.
+    problem.save(filename)
+    if verbose:
+        print(f"Built compiled problem; saved to {filename}.")
+    return problem
@@ -0,0 +1,313 @@
+import numpy as np
+import time
+from typing import Union, Dict, List, Any, Optional
+from compiled_problem import CompiledProblem, CompiledSolution
+from solve_pool import SolvePool
+from batch_outputs import evaluate_batch
+
+
+class ContinuationResult:
+    """
+    The result of `continuation()`: a solution at each requested parameter value, and the path taken between them.
+
+    Outputs are looked up by name across all requested values, like `asb.Opti.solve_sweep(return_callable=True)`:
+
+        >>> result = continuation(problem, "fuel_tank_fuel_mass_fraction", np.linspace(1, 0.25, 21))
+        >>> result("transport_efficiency_MJ_per_seat_km")  # One value per requested fraction; NaN where unreachable.
+
+    Several outputs are best evaluated together, in one batch over all solutions (see `batch_outputs`):
+
+        >>> result.evaluate(["transport_efficiency_MJ_per_seat_km", "wing_span"])  # Shape (len(values), 2)
+
+    Attributes:
+        problem: The CompiledProblem solved.
+        parameter: The name of the swept parameter.
+        values: The requested parameter values.
+        solutions: A CompiledSolution at each requested value, or None where it could not be reached.
+        path: Every solve attempted along the way, in order, as a list of dictionaries with keys:
+            * "value": The parameter value solved at.
+            * "step": The step taken from the last converged point.
+            * "predictor": "sensitivity", "previous", or "cold" - how the initial guess was made.
+            * "success": Whether the solve converged.
+            * "return_status": The solver's return status, or "Timed_Out", etc. (see `continuation()`'s `timeout`).
+            * "iterations": The number of IPOPT iterations.
+            * "time": The wall time of the solve [sec].
+            * "requested": Whether the value is one of `values` (rather than an intermediate step).
+    """
+
+    def __init__(self,
+                 problem: CompiledProblem,
+                 parameter: str,
+                 values: np.ndarray,
+                 solutions: List[Optional[CompiledSolution]],
+                 path: List[Dict[str, Any]],
+                 ):
+        self.problem = problem
+        self.parameter = parameter
+        self.values = values
+        self.solutions = solutions
+        self.path = path
+
+    def __call__(self, name: str) -> np.ndarray:
+        if name not in self.problem.output_names:  # A decision variable or parameter
+            return np.array([
+                np.nan if sol is None else sol(name)
+                for sol in self.solutions
+            ])
+        values = self.evaluate([name])
+        return values[:, 0] if values.shape[1] == 1 else values
+
+    def evaluate(self,
+                 outputs: List[str],
+                 **kwargs,
+                 ) -> np.ndarray:
+        """
+        Evaluates outputs at every requested value, in one batch over all solutions (`batch_outputs.evaluate_batch()`).
+
+        Args:
+            outputs: The names of the outputs.
+            **kwargs: Any other arguments of `batch_outputs.BatchEvaluator` (e.g., `parallelization="thread"`).
+
+        Returns: An array of shape (len(values), n_columns), with one column per output (or per entry of a
+        vector-valued output), and NaN rows where the value could not be reached.
+        """
+        reached = [sol for sol in self.solutions if sol is not None]
+        if len(reached) == 0:
+            n_columns = sum(self.problem.outputs.numel_out(name) for name in outputs)
+            return np.full((len(self.solutions), n_columns), np.nan)
+        values = evaluate_batch(
+            self.problem,
+            outputs,
+            x=np.stack([sol.x for sol in reached]),
+            p=np.stack([sol.p for sol in reached]),
+            **kwargs,
+        )
+        result = np.full((len(self.solutions), values.shape[1]), np.nan)
+        result[self.success] = values
+        return result
+
+    @property
+    def success(self) -> np.ndarray:
+        return np.array([sol is not None for sol in self.solutions])
+
+    def report(self) -> str:
+        """
+        Returns a table of the path taken, with a summary line.
+        """
+        lines = [
+            f"{self.parameter.rjust(30)} {'Step'.rjust(12)} {'Predictor'.rjust(11)} {'Iter.'.rjust(6)} "
+            f"{'Time [s]'.rjust(9)}  Result"
+        ]
+        for record in self.path:
+            result = "converged" if record["success"] else f"failed ({record['return_status']})"
+            lines.append(
+                f"{record['value']:30.6g} {record['step']:12.4g} {record['predictor'].rjust(11)} "
+                f"{record['iterations']:6d} {record['time']:9.2f}  {result}"
+                f"{'' if record['requested'] else ' (intermediate)'}"
+            )
+        iterations = sum(record["iterations"] for record in self.path)
+        lines.append(
+            f"{int(np.sum(self.success))}/{len(self.values)} requested points reached; "
+            f"{len(self.path)} solves, {iterations} iterations "
+            f"({iterations / max(np.sum(self.success), 1):.1f} per requested point), "
+            f"{sum(record['time'] for record in self.path):.1f} s."
+        )
+        return "\n".join(lines)
+
+
+def continuation(
+        problem: CompiledProblem,
+        parameter: str,
+        values: Union[np.ndarray, List[float]],
+        parameter_values: Dict[str, Union[float, np.ndarray]] = None,
+        initial_solution: CompiledSolution = None,
+        predictor: str = "sensitivity",
+        max_step: float = None,
+        min_step: float = None,
+        use_duals: bool = True,
+        max_bisections: int = 3,
+        target_iterations: int = 15,
+        step_growth: float = 2,
+        timeout: float = None,
+        max_rss: float = None,
+        verbose: bool = False,
+        **solve_kwargs,
+) -> ContinuationResult:
+    """
+    Solves a problem at a sequence of values of one parameter, each solve starting from a prediction made from the last
+    converged one.
+
+    Between two requested values, the step size adapts: it grows by `step_growth` after a solve that converges in
+    `target_iterations` or fewer, shrinks after one that takes more, and is bisected after a failed solve. If bisection
+    reaches `min_step` or `max_bisections` without converging, a cold start (from the problem's own initial guess) is tried at the
+    requested value; if that fails too, the value is marked unreachable. Continuation has then stalled (typically at
+    the edge of the feasible region), so later values further in the same direction are only tried cold, until one
+    converges.
+
+    Args:
+        problem: The CompiledProblem to solve.
+        parameter: The name of the (scalar) parameter to sweep, e.g. "mission_range" or "fuel_tank_fuel_mass_fraction".
+        values: The values of `parameter` at which solutions are wanted, in the order to visit them. Start where the
+            problem is easiest (e.g., the least demanding mission).
+        parameter_values: [Optional] Values of any other parameters, held fixed, as in `CompiledProblem.solve()`.
+        initial_solution: [Optional] A converged solution at `values[0]`. If not given, `values[0]` is solved from
+            the problem's initial guess.
+        predictor: How to make the initial guess for each step:
+            * "sensitivity": A first-order prediction, x + (dx*/dp) * step, with dx*/dp from
+                `CompiledSolution.variable_sensitivities()` (and likewise for the multipliers). This is the default.
+            * "previous": The last converged solution, as-is.
+        use_duals: If True, the constraint multipliers are warm-started too (IPOPT's `warm_start_init_point`). This
+            typically halves the iterations of each step.
+        max_bisections: The most times a step toward any one requested value is bisected before giving up. Each
+            failed attempt costs up to `max_iter` iterations, so this bounds the time spent probing (for instance) the
+            edge of the feasible region.
+        max_step: The largest step allowed. Defaults to the span of `values`.
+        min_step: The smallest step allowed, below which bisection gives up. Defaults to 1e-4 of the span of `values`.
+        target_iterations: The number of IPOPT iterations per step that the step size adapts toward.
+        step_growth: The factor by which the step grows (or shrinks) after each converged step.
+        timeout: [Optional] The longest any one solve may run [sec]. If this or `max_rss` is given, each solve runs
+            in a worker process (see `SolvePool`), which is killed if it breaches either; the solve then counts as
+            failed, and continuation carries on.
+        max_rss: [Optional] The most memory a solve's worker process may use [bytes].
+        verbose: If True, prints each solve as it happens.
+        **solve_kwargs: Any other keyword arguments of `CompiledProblem.solve()` (e.g., `max_iter`).
+
+    Returns: A ContinuationResult.
+    """
+    values = np.array(values, dtype=float).flatten()
+    if parameter not in problem.parameter_names:
+        raise KeyError(f"No (scalar) parameter named `{parameter}`! Options: {problem.parameter_names}")
+    if predictor not in ["sensitivity", "previous"]:
+        raise ValueError("Bad value of `predictor`! Options: \"sensitivity\", \"previous\"")
+    parameter_index = problem.parameter_names.index(parameter)
+    span = np.ptp(values) if len(values) > 1 else 0
+    if max_step is None:
+        max_step = span
+    if min_step is None:
+        min_step = 1e-4 * span
+    parameter_values = {} if parameter_values is None else dict(parameter_values)
+    solve_kwargs = {
+        "verbose": False,
+        **solve_kwargs,
+        "behavior_on_failure": "return_last",
+    }
+
+    path = []
+    pool = None if timeout is None and max_rss is None else SolvePool(
+        problem,
+        n_workers=1,
+        timeout=timeout,
+        max_rss=max_rss,
+        **solve_kwargs,
+    )
+
+    def solve_at(value, guess, step, predictor_used, requested):
+        start = time.perf_counter()
+        kwargs = dict(solve_kwargs)
+        if guess is not None:
+            kwargs["x0"] = guess[0]
+            if use_duals:
+                kwargs["lam_g0"] = guess[1]
+                kwargs["options"] = {
+                    "ipopt.warm_start_init_point": "yes",
+                    **kwargs.get("options", {}),
+                }
+        if pool is None:
+            sol = problem.solve(
+                parameter_values={**parameter_values, parameter: value},
+                **kwargs,
+            )
+        else:
+            sol = pool.map([{
+                **kwargs,
+                "parameter_values": {**parameter_values, parameter: value},
+            }])[0]
+        record = {
+            "value"        : value,
+            "step"         : step,
+            "predictor"    : predictor_used,
+            "success"      : bool(sol.stats()["success"]),
+            "return_status": sol.stats()["return_status"],
+            "iterations"   : int(sol.stats()["iter_count"]),
+            "time"         : time.perf_counter() - start,
+            "requested"    : requested,
+        }
+        path.append(record)
+        if verbose:
+            print(
+                f"{parameter} = {value:.6g} (step {step:.4g}, {predictor_used}): "
+                f"{'converged' if record['success'] else 'failed'} in {record['iterations']} iterations"
+            )
+        return sol if record["success"] else None
+
+    def predict(sol, step):
+        if predictor == "sensitivity":
+            try:
+                return (
+                    sol.x + sol.variable_sensitivities()[:, parameter_index] * step,
+                    sol.lam_g + sol.multiplier_sensitivities()[:, parameter_index] * step,
+                ), "sensitivity"
+            except Exception:  # E.g., a singular KKT system; fall back to the zeroth-order predictor.
+                pass
+        return (sol.x, sol.lam_g), "previous"
+
+    ### Solve the first point.
+    if initial_solution is not None:
+        last = initial_solution
+    else:
+        last = solve_at(values[0], None, 0., "cold", True)
+    solutions = [last]
+    last_value = values[0]
+    step_size = max_step if len(values) < 2 else min(max_step, abs(values[1] - values[0]))
+
+    ### Walk to each of the other points.
+    stalled_direction = 0  # Set when bisection fails; later points beyond it are only tried cold.
+    for target in values[1:]:
+        sol = None
+        remaining = target - last_value
+        if last is not None and np.sign(remaining) != stalled_direction:
+            n_bisections = 0
+            while True:
+                remaining = target - last_value
+                step = remaining if abs(remaining) <= step_size else np.sign(remaining) * step_size
+                value = target if step == remaining else last_value + step
+                guess, predictor_used = predict(last, step)
+                sol = solve_at(value, guess, step, predictor_used, value == target)
+
+                if sol is None:
+                    step_size = abs(step) / 2
+                    n_bisections += 1
+                    if step_size < min_step or n_bisections > max_bisections:
+                        stalled_direction = np.sign(remaining)
+                        break
+                    continue
+
+                if abs(step) >= step_size:  # Only adapt on full-size steps; steps clipped to a target say little.
+                    if sol.stats()["iter_count"] <= target_iterations:
+                        step_size = min(step_size * step_growth, max_step)
+                    else:
+                        step_size = max(step_size / step_growth, min_step)
+                last, last_value = sol, value
+                if value == target:
+                    break
+
+        if sol is None:  # Continuation could not reach the target; try a cold start there as a last resort.
+            sol = solve_at(target, None, target - last_value, "cold", True)
+            if sol is not None:
+                last, last_value = sol, target
+                stalled_direction = 0
+                step_size = max_step
+            step_size = max(step_size, min_step)
+
+        solutions.append(sol)
+
+    if pool is not None:
+        pool.close()
+
+    return ContinuationResult(
+        problem=problem,
+        parameter=parameter,
+        values=values,
+        solutions=solutions,
+        path=path,
+    )
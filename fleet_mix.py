@@ -0,0 +1,152 @@
+import numpy as np
+from typing import Dict, List, Any, Tuple
+from market_envelope import resample
+
+
+class FleetMix:
+    """
+    The result of `fleet_mix()`: the designs chosen, and the routes each one flies.
+
+    Attributes:
+        designs: The labels of the chosen designs, in order of the route lengths they serve.
+        route_lengths: The route lengths of the histogram [m], sorted.
+        demand: The demand on each route length (e.g., seats flown per year), sorted with `route_lengths`.
+        assignment: The index (into `designs`) of the design that flies each route length.
+        route_energies: The energy of each route length's demand, flown by its design [MJ].
+        total_energy: The total energy of all demand [MJ].
+        energies_by_n_designs: The total energy of the best fleet of each size 1, 2, ..., up to `n_designs` [MJ]
+            (infinite where no fleet of that size can fly every route), to show what each added design buys.
+    """
+
+    def __init__(self,
+                 designs: List[Any],
+                 route_lengths: np.ndarray,
+                 demand: np.ndarray,
+                 assignment: np.ndarray,
+                 route_energies: np.ndarray,
+                 energies_by_n_designs: np.ndarray,
+                 ):
+        self.designs = designs
+        self.route_lengths = route_lengths
+        self.demand = demand
+        self.assignment = assignment
+        self.route_energies = route_energies
+        self.total_energy = float(np.sum(route_energies))
+        self.energies_by_n_designs = energies_by_n_designs
+
+    def report(self) -> str:
+        """
+        Returns a table of the chosen designs, with the routes and share of the energy of each.
+        """
+        lines = [f"{'Design'.rjust(30)} {'Routes [km]'.rjust(21)} {'Demand'.rjust(12)} {'Energy [%]'.rjust(11)}"]
+        for i, design in enumerate(self.designs):
+            served = self.assignment == i
+            lengths = self.route_lengths[served] / 1e3
+            lines.append(
+                f"{str(design).rjust(30)} {f'{lengths.min():.0f} - {lengths.max():.0f}'.rjust(21)} "
+                f"{np.sum(self.demand[served]):12.4g} "
+                f"{100 * np.sum(self.route_energies[served]) / self.total_energy:11.1f}"
+            )
+        lines.append(
+            f"Total energy: {self.total_energy:.6g} MJ. By fleet size: " +
+            ", ".join(f"{k + 1}: {e:.6g}" for k, e in enumerate(self.energies_by_n_designs)) + " MJ."
+        )
+        return "\n".join(lines)
+
+
+def fleet_mix(
+        route_lengths: np.ndarray,
+        demand: np.ndarray,
+        curves: Dict[Any, Tuple[np.ndarray, np.ndarray]],
+        n_designs: int,
+) -> FleetMix:
+    """
+    Chooses the `n_designs` aircraft designs (out of the candidates in `curves`) that minimize the total energy to fly
+    a distribution of route lengths, and which routes each design flies.
+
+    The energy of a route is its demand, times its length, times the transport energy of the design flying it, read
+    off that design's off-design (market-coverage) curve at the route length. A design cannot fly routes beyond the
+    end of its curve.
+
+    The choice is made by an exact dynamic program over the route lengths, in sorted order, which finds the best
+    partition of the routes into at most `n_designs` contiguous intervals of route length, each flown by one design:
+    O(n_designs * n_routes^2) steps, after O(n_candidates * n_routes^2) to find the best design for every interval.
+    Memory is O(n_routes^2 + n_candidates * n_routes): the table of best designs holds two (n_routes + 1)^2 arrays
+    (about 16 MB for 1000 routes), and is built one interval start at a time.
+    That is the optimum among all fleets wherever each design serves one interval of route lengths - which holds
+    whenever the curves of any two designs cross at most once (the longer-range design being better beyond the
+    crossing), as payload-range curves do. Routes are then re-assigned to the best chosen design, if any curves cross
+    more than once.
+
+    Args:
+        route_lengths: The route lengths of the histogram [m] (e.g., bin centers).
+        demand: The demand on each route length (e.g., seats flown per year). The energies are in MJ per unit of this.
+        curves: The candidate designs' off-design curves, as {label: (flight ranges [m], transport efficiencies
+            [MJ/seat-km])}, with flight ranges increasing; e.g., `{(fuel_type, design_range): data[fuel_type][
+            design_range]}` from `get_market_coverage_grid()`.
+        n_designs: The most designs in the fleet.
+
+    Returns: A FleetMix.
+    """
+    order = np.argsort(route_lengths)
+    route_lengths = np.asarray(route_lengths, dtype=float)[order]
+    demand = np.asarray(demand, dtype=float)[order]
+    labels = list(curves.keys())
+    n_routes = len(route_lengths)
+    if len(labels) == 0 or n_routes == 0:
+        raise ValueError("Need at least one candidate design and one route!")
+
+    ### The energy of each route, flown by each candidate [MJ]; infinite where the candidate cannot fly it.
+    transport_efficiencies = np.concatenate([
+        resample(*curves[label], range_grid=route_lengths)
+        for label in labels
+    ])
+    energies = demand * (route_lengths / 1e3) * transport_efficiencies
+    unreachable = ~np.isfinite(energies)
+    energies[unreachable] = 0
+
+    ### The energy of each interval of routes [a, b), flown by its best candidate.
+    cumulative_energies = np.concatenate([np.zeros((len(labels), 1)), np.cumsum(energies, axis=1)], axis=1)
+    cumulative_unreachable = np.concatenate([np.zeros((len(labels), 1)), np.cumsum(unreachable, axis=1)], axis=1)
+    best_candidates = np.zeros((n_routes + 1, n_routes + 1), dtype=int)  # [a, b]
+    best_energies = np.full((n_routes + 1, n_routes + 1), np.inf)  # Infinite unless a < b: intervals are non-empty.
+    for a in range(n_routes):  # One start at a time, so that only one row of intervals is held per candidate.
+        interval_energies = cumulative_energies[:, a + 1:] - cumulative_energies[:, a, None]  # [candidate, b]
+        interval_energies[cumulative_unreachable[:, a + 1:] - cumulative_unreachable[:, a, None] > 0] = np.inf
+        best_candidates[a, a + 1:] = np.argmin(interval_energies, axis=0)
+        best_energies[a, a + 1:] = np.min(interval_energies, axis=0)
+
+    ### Dynamic program: energies[k, b] is the least energy to fly routes [0, b) with k intervals.
+    total_energies = np.full((n_designs + 1, n_routes + 1), np.inf)
+    total_energies[0, 0] = 0
+    previous_cuts = np.zeros((n_designs + 1, n_routes + 1), dtype=int)
+    for k in range(1, n_designs + 1):
+        candidates = total_energies[k - 1][:, None] + best_energies  # [a, b]
+        previous_cuts[k] = np.argmin(candidates, axis=0)
+        total_energies[k] = candidates[previous_cuts[k], np.arange(n_routes + 1)]
+    energies_by_n_designs = np.minimum.accumulate(total_energies[1:, n_routes])
+    n_intervals = int(np.argmin(total_energies[1:, n_routes])) + 1
+    if not np.isfinite(total_energies[n_intervals, n_routes]):
+        raise ValueError("No fleet of the candidate designs can fly every route!")
+
+    ### Recover the intervals, and their designs.
+    chosen = []
+    b = n_routes
+    for k in range(n_intervals, 0, -1):
+        a = previous_cuts[k, b]
+        chosen.append(int(best_candidates[a, b]))
+        b = a
+    chosen = list(dict.fromkeys(chosen[::-1]))  # In order of route length; a design could win two intervals.
+
+    ### Fly each route with the best of the chosen designs.
+    chosen_energies = np.where(unreachable[chosen], np.inf, energies[chosen])
+    assignment = np.argmin(chosen_energies, axis=0)
+
+    return FleetMix(
+        designs=[labels[i] for i in chosen],
+        route_lengths=route_lengths,
+        demand=demand,
+        assignment=assignment,
+        route_energies=chosen_energies[assignment, np.arange(n_routes)],
+        energies_by_n_designs=energies_by_n_designs,
+    )
@@ -0,0 +1,161 @@
+import aerosandbox as asb
+import numpy as np
+import os
+import time
+from pathlib import Path
+from typing import Union, Dict, Any, Optional, Callable
+
+
+class IterateCheckpoint:
+    """
+    Periodic snapshots of the iterate of a running `asb.Opti` solve, so that a long solve that is killed (e.g., on a
+    pre-emptible node) can be resumed from where it left off rather than from scratch:
+
+        >>> checkpoint = IterateCheckpoint("cache/iterate_checkpoint.npz", key=problem_hash(...))
+        >>> sol = checkpoint.solve(opti, max_iter=500)  # Resumes from the latest snapshot, if there is one.
+
+    A snapshot holds the primal iterate (`opti.x`) and the constraint multipliers (`opti.lam_g`), and is written
+    atomically, so a kill mid-write leaves the previous snapshot intact. It is only resumed from if it was taken on the
+    same problem: one with the same key, the same numbers of variables and constraints, and the same parameter values.
+    """
+
+    def __init__(self,
+                 filename: Union[str, Path] = "cache/iterate_checkpoint.npz",
+                 every: int = 10,
+                 key: str = "",
+                 ):
+        """
+        Args:
+            filename: Where to keep the snapshot.
+            every: Take a snapshot every this many iterations.
+            key: [Optional] Identifies the problem, beyond its size and parameter values; e.g., a hash of the model
+                source (`compiled_problem.problem_hash()`).
+        """
+        self.filename = Path(filename)
+        self.every = every
+        self.key = key
+        self.resumed_from_iteration = 0
+
+    def _signature(self, opti: asb.Opti) -> Dict[str, Any]:
+        return {
+            "key"       : np.array(self.key),
+            "n_x"       : np.array(opti.nx),
+            "n_g"       : np.array(opti.ng),
+            "parameters": np.array(opti.value(opti.p, opti.value_parameters()), dtype=float).flatten(),
+        }
+
+    def save(self,
+             opti: asb.Opti,
+             x: np.ndarray,
+             lam_g: np.ndarray,
+             iteration: int,
+             ) -> None:
+        """
+        Saves a snapshot of an iterate of `opti`. The write is atomic.
+        """
+        self.filename.parent.mkdir(parents=True, exist_ok=True)
+        tmp_filename = self.filename.with_name(f"{self.filename.stem}.{os.getpid()}.tmp.npz")
+        np.savez(
+            tmp_filename,
+            x=np.array(x, dtype=float).flatten(),
+            lam_g=np.array(lam_g, dtype=float).flatten(),
+            iteration=np.array(iteration),
+            timestamp=np.array(time.time()),
+            **self._signature(opti),
+        )
+        os.replace(tmp_filename, self.filename)
+
+    def load(self, opti: asb.Opti) -> Optional[Dict[str, Any]]:
+        """
+        Loads the latest snapshot, if there is one and it was taken on this problem.
+
+        Returns: A dictionary with keys "x", "lam_g", "iteration" (the number of iterations taken before the
+        snapshot, over all resumed runs), and "timestamp"; or None.
+        """
+        if not self.filename.exists():
+            return None
+        try:
+            with np.load(self.filename) as data:
+                signature = self._signature(opti)
+                if not (
+                        str(data["key"]) == str(signature["key"]) and
+                        int(data["n_x"]) == int(signature["n_x"]) and
+                        int(data["n_g"]) == int(signature["n_g"]) and
+                        np.array_equal(data["parameters"], signature["parameters"])
+                ):
+                    return None
+                return {
+                    "x"        : data["x"],
+                    "lam_g"    : data["lam_g"],
+                    "iteration": int(data["iteration"]),
+                    "timestamp": float(data["timestamp"]),
+                }
+        except Exception:  # A corrupt snapshot is just a missing one.
+            return None
+
+    def clear(self) -> None:
+        self.filename.unlink(missing_ok=True)
+
+    def callback(self,
+                 opti: asb.Opti,
+                 iteration_offset: int = 0,
+                 ) -> Callable[[int], None]:
+        """
+        Returns a callback for `asb.Opti.solve(callback=...)` that snapshots the iterate every `every` iterations.
+        """
+
+        def callback(iteration: int) -> None:
+            if iteration > 0 and iteration % self.every == 0:
+                self.save(
+                    opti,
+                    x=opti.debug.value(opti.x),
+                    lam_g=opti.debug.value(opti.lam_g),
+                    iteration=iteration_offset + iteration,
+                )
+
+        return callback
+
+    def solve(self,
+              opti: asb.Opti,
+              use_duals: bool = True,
+              callback: Callable[[int], Any] = None,
+              **solve_kwargs,
+              ) -> asb.OptiSol:
+        """
+        Solves `opti`, taking snapshots as it goes. If a snapshot of this problem exists (from an earlier run that was
+        killed), the solve is warm-started from it; the snapshot is deleted once the solve finishes.
+
+        Args:
+            opti: The problem to solve.
+            use_duals: If True, the constraint multipliers are warm-started too (IPOPT's `warm_start_init_point`).
+            callback: [Optional] Another per-iteration callback, as in `asb.Opti.solve()`, to call after snapshotting.
+            **solve_kwargs: Any other keyword arguments of `asb.Opti.solve()` (e.g., `max_iter`, `verbose`). Note
+                that `max_iter` counts the iterations of this run only.
+
+        Returns: An `asb.OptiSol`. The iteration of the snapshot it was resumed from (0 if it was not) is kept in
+        `resumed_from_iteration`.
+        """
+        snapshot = self.load(opti)
+        if snapshot is not None:
+            opti.set_initial(opti.x, snapshot["x"])
+            if use_duals:
+                opti.set_initial(opti.lam_g, snapshot["lam_g"])
+                solve_kwargs["options"] = {
+                    "ipopt.warm_start_init_point": "yes",
+                    **(solve_kwargs.get("options") or {}),
+                }
+        iteration_offset = 0 if snapshot is None else snapshot["iteration"]
+        self.resumed_from_iteration = iteration_offset
+        snapshot_callback = self.callback(opti, iteration_offset=iteration_offset)
+
+        def combined_callback(iteration: int) -> None:
+            snapshot_callback(iteration)
+            if callback is not None:
+                callback(iteration)
+
+        try:
+            sol = opti.solve(callback=combined_callback, **solve_kwargs)
+        finally:
+            opti.callback()  # Detach the callback, so that later solves of `opti` do not snapshot.
+        self.clear()
+        return sol
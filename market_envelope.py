@@ -0,0 +1,216 @@
+import numpy as np
+from typing import Dict, List, Any, Sequence
+from payload_range import design_record_outputs, design_records_from_rows, market_coverage
+
+
+def resample(
+        flight_ranges: np.ndarray,
+        values: np.ndarray,
+        range_grid: np.ndarray,
+) -> np.ndarray:
+    """
+    Resamples curves of N designs (e.g., market-coverage curves) onto a common grid of flight ranges, by linear
+    interpolation.
+
+    Args:
+        flight_ranges: The flight ranges of each curve, increasing along each row: an array of shape (N, M).
+        values: The values of each curve: an array of shape (N, M).
+        range_grid: The common flight ranges, increasing: an array of shape (G,).
+
+    Returns: An array of shape (N, G), NaN outside the span of each curve's flight ranges, and for curves that are not
+    finite throughout (e.g., of failed solves).
+    """
+    flight_ranges = np.atleast_2d(flight_ranges)
+    values = np.atleast_2d(values)
+    resampled = np.full((len(flight_ranges), len(range_grid)), np.nan)
+    for i, (x, y) in enumerate(zip(flight_ranges, values)):
+        if np.all(np.isfinite(x)) and np.all(np.isfinite(y)):
+            resampled[i] = np.interp(range_grid, x, y, left=np.nan, right=np.nan)
+    return resampled
+
+
+class LowerEnvelope:
+    """
+    The lower envelope of the off-design curves of many designs (e.g., transport energy against flight range) on a
+    common grid of flight ranges: the best value any design achieves at each range, and which design achieves it.
+
+    Designs are added in batches, and resampled `batch_size` at a time, so that the envelope of more designs than fit
+    in memory at once can be built, with memory proportional to the batch size times the grid size:
+
+        >>> envelope = LowerEnvelope(np.linspace(0, 10000, 1001) * u.naut_mile)
+        >>> for flight_ranges, transport_efficiencies, labels in batches:
+        >>>     envelope.update(flight_ranges, transport_efficiencies, labels)
+        >>> envelope.values, envelope.winners, envelope.segments()
+
+    Attributes:
+        range_grid: The common flight ranges, of shape (G,).
+        values: The envelope: the lowest value at each range, of shape (G,); NaN where no design reaches.
+        winners: The index (into `labels`) of the design that achieves each value, of shape (G,); -1 where no design
+            reaches.
+        labels: The label of each design added, in the order added.
+    """
+
+    def __init__(self,
+                 range_grid: np.ndarray,
+                 batch_size: int = 256,
+                 ):
+        """
+        Args:
+            range_grid: The common flight ranges [m], increasing.
+            batch_size: The number of designs resampled at once.
+        """
+        self.range_grid = np.asarray(range_grid, dtype=float)
+        self.batch_size = batch_size
+        self.values = np.full(len(self.range_grid), np.nan)
+        self.winners = np.full(len(self.range_grid), -1, dtype=int)
+        self.labels: List[Any] = []
+
+    def update(self,
+               flight_ranges: np.ndarray,
+               values: np.ndarray,
+               labels: Sequence[Any] = None,
+               ) -> None:
+        """
+        Adds a batch of designs to the envelope.
+
+        Args:
+            flight_ranges: The flight ranges of each design's curve, increasing along each row: shape (N, M).
+            values: The values of each design's curve: shape (N, M).
+            labels: [Optional] A label for each design (e.g., its fuel type and design range). Defaults to its index,
+                counting every design added.
+        """
+        flight_ranges = np.atleast_2d(flight_ranges)
+        values = np.atleast_2d(values)
+        n_designs = len(flight_ranges)
+        if labels is None:
+            labels = range(len(self.labels), len(self.labels) + n_designs)
+        labels = list(labels)
+        if len(labels) != n_designs:
+            raise ValueError("`labels` must have one entry per design!")
+
+        for start in range(0, n_designs, self.batch_size):
+            resampled = resample(
+                flight_ranges[start:start + self.batch_size],
+                values[start:start + self.batch_size],
+                self.range_grid,
+            )
+            resampled[np.isnan(resampled)] = np.inf
+            best = np.argmin(resampled, axis=0)
+            best_values = resampled[best, np.arange(len(self.range_grid))]
+            improved = best_values < np.where(np.isnan(self.values), np.inf, self.values)
+            self.values[improved] = best_values[improved]
+            self.winners[improved] = len(self.labels) + start + best[improved]
+        self.labels.extend(labels)
+
+    @property
+    def n_designs(self) -> int:
+        return len(self.labels)
+
+    def winning_labels(self) -> List[Any]:
+        """
+        Returns the label of the winning design at each range (None where no design reaches).
+        """
+        return [None if i < 0 else self.labels[i] for i in self.winners]
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """
+        Returns the envelope as segments of the range grid over which one design wins, in order of range, as a list of
+        dictionaries with keys:
+            * "range_start", "range_end": The first and last grid ranges of the segment [m].
+            * "design": The index of the winning design (into `labels`), or -1 where no design reaches.
+            * "label": Its label (None where no design reaches).
+        """
+        if len(self.range_grid) == 0:
+            return []
+        changes = np.flatnonzero(np.diff(self.winners)) + 1
+        starts = np.concatenate([[0], changes])
+        stops = np.concatenate([changes, [len(self.range_grid)]]) - 1
+        return [
+            {
+                "range_start": self.range_grid[start],
+                "range_end"  : self.range_grid[stop],
+                "design"     : int(self.winners[start]),
+                "label"      : None if self.winners[start] < 0 else self.labels[self.winners[start]],
+            }
+            for start, stop in zip(starts, stops)
+        ]
+
+
+def lower_envelope(
+        flight_ranges: np.ndarray,
+        values: np.ndarray,
+        range_grid: np.ndarray,
+        labels: Sequence[Any] = None,
+        batch_size: int = 256,
+) -> LowerEnvelope:
+    """
+    Computes the lower envelope of the curves of N designs on a common range grid; see `LowerEnvelope`.
+
+    Args:
+        flight_ranges: The flight ranges of each design's curve, increasing along each row: shape (N, M).
+        values: The values of each design's curve: shape (N, M).
+        range_grid: The common flight ranges: shape (G,).
+        labels: [Optional] A label for each design. Defaults to its index.
+        batch_size: The number of designs resampled at once.
+
+    Returns: A LowerEnvelope.
+    """
+    envelope = LowerEnvelope(range_grid, batch_size=batch_size)
+    envelope.update(flight_ranges, values, labels)
+    return envelope
+
+
+def market_coverage_envelope(
+        data: Dict[str, Dict[float, Any]],
+        range_grid: np.ndarray,
+) -> LowerEnvelope:
+    """
+    Computes the lower envelope of transport energy across the designs of a market-coverage sweep (as returned by
+    `get_market_coverage_grid()`), each labelled by its (fuel type, design range).
+    """
+    labels = [
+        (fuel_type, design_range)
+        for fuel_type, designs in data.items()
+        for design_range in designs
+    ]
+    envelope = LowerEnvelope(range_grid)
+    for fuel_type, design_range in labels:
+        flight_ranges, transport_efficiencies = data[fuel_type][design_range]
+        envelope.update(flight_ranges, transport_efficiencies, [(fuel_type, design_range)])
+    return envelope
+
+
+def market_coverage_envelope_from_store(
+        store: Any,
+        range_grid: np.ndarray,
+        where: Dict[str, Any] = None,
+        label_columns: List[str] = ("problem", "parameter.mission_range"),
+        n_points: int = 100,
+) -> LowerEnvelope:
+    """
+    Computes the lower envelope of transport energy across the designs in a `results_store.ResultsStore`, streaming
+    them in chunk by chunk (`ResultsStore.iter_query()`), so that only one chunk's market-coverage curves are in
+    memory at once. The curves are computed from each design's record (`payload_range.market_coverage()`).
+
+    Args:
+        store: The ResultsStore.
+        range_grid: The common flight ranges [m].
+        where: [Optional] Conditions on the rows, as in `ResultsStore.query()`. Defaults to converged solves.
+        label_columns: The columns to label each design with (as a tuple of their values).
+        n_points: The number of points on each leg of the market-coverage curves.
+
+    Returns: A LowerEnvelope.
+    """
+    label_columns = list(label_columns)
+    envelope = LowerEnvelope(range_grid)
+    for rows in store.iter_query(
+            columns=list(design_record_outputs.values()) + label_columns,
+            where={"stats.success": True} if where is None else where,
+    ):
+        flight_ranges, transport_efficiencies = market_coverage(design_records_from_rows(rows), n_points=n_points)
+        envelope.update(
+            flight_ranges,
+            transport_efficiencies,
+            labels=list(rows[label_columns].itertuples(index=False, name=None)),
+        )
+    return envelope
@@ -0,0 +1,223 @@
+import numpy as np
+import time
+from scipy.stats import qmc
+from typing import Union, Dict, List, Any, Tuple
+from compiled_problem import CompiledProblem, CompiledSolution
+from solve_pool import SolvePool
+
+
+def sample_starts(
+        problem: CompiledProblem,
+        n_starts: int,
+        method: str = "sobol",
+        spread: float = 0.5,
+        parameter_values: Dict[str, Union[float, np.ndarray]] = None,
+        seed: int = 0,
+) -> np.ndarray:
+    """
+    Draws initial guesses for the decision vector, spread evenly (by a quasi-random sequence) over a box.
+
+    The box is the variable bounds declared in the problem (`CompiledProblem.variable_bounds()`), intersected with
+    +/- `spread` times each variable's value at the initial guess (`CompiledProblem.variable_scales`). So a variable
+    bounded on both sides is sampled across its bounds only where those are within the spread, and an unbounded one
+    (e.g., `design_mass_TOGW`) within 1 +/- `spread` of its initial guess (or, for a log-transformed variable, the
+    equivalent in log-space).
+
+    Args:
+        problem: The CompiledProblem.
+        n_starts: The number of initial guesses.
+        method: The sequence: "sobol" (scrambled Sobol') or "lhs" (Latin hypercube).
+        spread: The half-width of the box, relative to each variable's initial guess.
+        parameter_values: [Optional] A dictionary of {parameter name: value}, as in `CompiledProblem.solve()`. Only
+            matters where a bound depends on a parameter.
+        seed: The random seed, for repeatable starts.
+
+    Returns: An array of initial guesses, of shape (n_starts, n_variables).
+    """
+    lbx, ubx = problem.variable_bounds(parameter_values)
+    lower = np.maximum(lbx, problem.x0 - spread * problem.variable_scales)
+    upper = np.minimum(ubx, problem.x0 + spread * problem.variable_scales)
+    upper = np.maximum(upper, lower)  # Where the initial guess is outside the bounds
+
+    if method == "sobol":
+        sampler = qmc.Sobol(d=problem.n_variables, scramble=True, seed=seed)
+    elif method == "lhs":
+        sampler = qmc.LatinHypercube(d=problem.n_variables, seed=seed)
+    else:
+        raise ValueError("Bad value of `method`! Options: \"sobol\", \"lhs\"")
+    unit_samples = sampler.random(n_starts)
+    return lower + unit_samples * (upper - lower)
+
+
+class MultiStartResult:
+    """
+    The result of `multistart()`.
+
+    Attributes:
+        starts: The initial guesses, of shape (n_starts, n_variables).
+        solutions: The solution from each start, in the order of `starts`.
+        minima: The distinct local minima found, best first, as a list of dictionaries with keys:
+            * "solution": The best solution that converged to this minimum.
+            * "objective": Its objective value.
+            * "starts": The indices of the starts that converged to this minimum.
+        time: The wall time of all solves [sec].
+    """
+
+    def __init__(self,
+                 starts: np.ndarray,
+                 solutions: List[CompiledSolution],
+                 minima: List[Dict[str, Any]],
+                 time: float,
+                 ):
+        self.starts = starts
+        self.solutions = solutions
+        self.minima = minima
+        self.time = time
+
+    @property
+    def best(self) -> CompiledSolution:
+        """
+        The best solution found; raises a RuntimeError if no start converged.
+        """
+        if len(self.minima) == 0:
+            raise RuntimeError("No start converged!")
+        return self.minima[0]["solution"]
+
+    @property
+    def success(self) -> np.ndarray:
+        return np.array([sol.stats()["success"] for sol in self.solutions])
+
+    def report(self,
+               outputs: List[str] = None,
+               ) -> str:
+        """
+        Returns a table of the distinct minima found, with the value of each of `outputs` at each.
+        """
+        outputs = [] if outputs is None else outputs
+        iterations = [sol.stats()["iter_count"] for sol in self.solutions]
+        lines = [
+            f"{int(np.sum(self.success))}/{len(self.solutions)} starts converged, to {len(self.minima)} distinct "
+            f"minima; {sum(iterations)} iterations, {self.time:.1f} s.",
+            f"{'Minimum'.rjust(7)} {'Objective'.rjust(13)} {'Starts'.rjust(6)}" + "".join(
+                f" {output[:20].rjust(20)}" for output in outputs
+            ),
+        ]
+        for i, minimum in enumerate(self.minima):
+            lines.append(
+                f"{i:7d} {minimum['objective']:13.6g} {len(minimum['starts']):6d}" + "".join(
+                    f" {minimum['solution'](output):20.6g}" for output in outputs
+                )
+            )
+        return "\n".join(lines)
+
+
+def cluster_minima(
+        problem: CompiledProblem,
+        solutions: List[CompiledSolution],
+        tolerance: float = 1e-3,
+) -> List[Dict[str, Any]]:
+    """
+    Groups converged solutions into distinct local minima.
+
+    Solutions are visited best-first. Each joins the first minimum whose best solution is within `tolerance` of it -
+    in the RMS difference of the decision variables relative to their scales (`CompiledProblem.variable_scales`) - or
+    else starts a new minimum.
+
+    Returns: A list of minima, best first, as in `MultiStartResult.minima`.
+    """
+    order = sorted(
+        [i for i, sol in enumerate(solutions) if sol.stats()["success"]],
+        key=lambda i: solutions[i].f,
+    )
+    minima = []
+    for i in order:
+        sol = solutions[i]
+        for minimum in minima:
+            distance = np.sqrt(np.mean(
+                ((sol.x - minimum["solution"].x) / problem.variable_scales) ** 2
+            ))
+            if distance <= tolerance:
+                minimum["starts"].append(i)
+                break
+        else:
+            minima.append({
+                "solution" : sol,
+                "objective": sol.f,
+                "starts"   : [i],
+            })
+    return minima
+
+
+def multistart(
+        problem: CompiledProblem,
+        n_starts: int = 32,
+        method: str = "sobol",
+        spread: float = 0.5,
+        parameter_values: Dict[str, Union[float, np.ndarray]] = None,
+        include_initial_guess: bool = True,
+        cluster_tolerance: float = 1e-3,
+        n_workers: int = None,
+        seed: int = 0,
+        **solve_kwargs,
+) -> MultiStartResult:
+    """
+    Solves a problem from many initial guesses, in parallel, and groups the results into distinct local minima.
+
+    Starts are independent, so they are solved in a `SolvePool` (one task per start), and throughput scales with the
+    number of workers.
+
+    Args:
+        problem: The CompiledProblem to solve.
+        n_starts: The number of starts, including the problem's own initial guess if `include_initial_guess`.
+        method: How to draw starts: "sobol" or "lhs". See `sample_starts()`.
+        spread: The half-width of the box that starts are drawn from, relative to each variable's initial guess.
+            See `sample_starts()`.
+        parameter_values: [Optional] A dictionary of {parameter name: value}, as in `CompiledProblem.solve()`.
+        include_initial_guess: If True, the first start is the problem's own initial guess, so that the result is
+            never worse than a single solve.
+        cluster_tolerance: The distance below which two solutions are the same minimum. See `cluster_minima()`.
+        n_workers: The number of worker processes. Defaults to the number of CPUs. If 1, runs serially, in this
+            process.
+        seed: The random seed, for repeatable starts.
+        **solve_kwargs: Any other keyword arguments of `CompiledProblem.solve()` (e.g., `max_iter`).
+
+    Returns: A MultiStartResult.
+    """
+    starts = sample_starts(
+        problem,
+        n_starts=n_starts - 1 if include_initial_guess else n_starts,
+        method=method,
+        spread=spread,
+        parameter_values=parameter_values,
+        seed=seed,
+    )
+    if include_initial_guess:
+        starts = np.concatenate([problem.x0.reshape(1, -1), starts])
+
+    solve_kwargs = {
+        "verbose"            : False,
+        **solve_kwargs,
+        "behavior_on_failure": "return_last",
+    }
+    tasks = [
+        {
+            "parameter_values": parameter_values,
+            "x0"              : x0,
+        }
+        for x0 in starts
+    ]
+
+    start = time.perf_counter()
+    if n_workers == 1:
+        solutions = [problem.solve(**solve_kwargs, **task) for task in tasks]
+    else:
+        with SolvePool(problem, n_workers=n_workers, **solve_kwargs) as pool:
+            solutions = pool.map(tasks)
+    elapsed = time.perf_counter() - start
+
+    return MultiStartResult(
+        starts=starts,
+        solutions=solutions,
+        minima=cluster_minima(problem, solutions, tolerance=cluster_tolerance),
+        time=elapsed,
+    )
@@ -0,0 +1,114 @@
+import aerosandbox as asb
+import aerosandbox.numpy as np
+import casadi as cas
+from typing import Union, Dict, List, Any
+from compiled_problem import _to_python
+
+
+class OutputRegistry:
+    """
+    A registry of named outputs of an `asb.Opti` problem, compiled into a single CasADi Function of the decision
+    vector and parameters, so that every registered quantity is evaluated at a solution in one call - rather than one
+    `sol(...)` call (one substitution through the expression graph) per quantity:
+
+        >>> outputs = OutputRegistry(opti, get_outputs(vars))
+        >>> outputs.register("fuel_fraction", mass_props["fuel"].mass / mass_props_TOGW.mass)
+        >>> values = outputs(sol)  # {name: value}, for every registered output.
+        >>> values["fuel_fraction"]
+
+    The compiled Function (`function()`) has the same signature as `CompiledProblem.outputs`: inputs "x" and "p"
+    (`opti.x` and `opti.p`), and one output per registered name. It is built on first use, and rebuilt only if
+    outputs are registered after that.
+    """
+
+    def __init__(self,
+                 opti: asb.Opti,
+                 outputs: Dict[str, Any] = None,
+                 ):
+        """
+        Args:
+            opti: The problem the outputs are expressions of.
+            outputs: [Optional] Outputs to register, as {name: expression}.
+        """
+        self.opti = opti
+        self.expressions: Dict[str, cas.MX] = {}
+        self._function = None
+        if outputs is not None:
+            self.update(outputs)
+
+    def register(self, name: str, expression: Any) -> Any:
+        """
+        Registers an output: any expression of the problem's variables and parameters (scalar, vector, or matrix;
+        matrices are flattened on evaluation), a list or tuple of scalar expressions (evaluated as a vector), or a
+        constant. Registering a name again replaces it.
+
+        Returns: The expression, unchanged, so that it can be registered where it is defined.
+        """
+        try:
+            if isinstance(expression, (list, tuple)):  # E.g., `xyz_cg`; evaluated as a vector.
+                self.expressions[name] = cas.vertcat(*[cas.MX(e) for e in expression])
+            else:
+                self.expressions[name] = cas.MX(expression)
+        except (NotImplementedError, TypeError):
+            raise TypeError(f"Output `{name}` is not an expression or a number (got {type(expression)})!")
+        self._function = None
+        return expression
+
+    def update(self, outputs: Dict[str, Any]) -> None:
+        """
+        Registers several outputs, as {name: expression}.
+        """
+        for name, expression in outputs.items():
+            self.register(name, expression)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.expressions.keys())
+
+    def __len__(self) -> int:
+        return len(self.expressions)
+
+    def function(self) -> cas.Function:
+        """
+        Returns the compiled Function, of (x, p) to every registered output.
+        """
+        if self._function is None:
+            self._function = cas.Function(
+                "outputs",
+                [self.opti.x, self.opti.p],
+                list(self.expressions.values()),
+                ["x", "p"],
+                self.names,
+            )
+        return self._function
+
+    def evaluate(self,
+                 x: np.ndarray,
+                 p: np.ndarray = None,
+                 ) -> Dict[str, Union[float, np.ndarray]]:
+        """
+        Evaluates every registered output, in a single Function call.
+
+        Args:
+            x: The decision vector (the value of `opti.x`).
+            p: [Optional] The parameter vector (the value of `opti.p`). Defaults to the problem's current parameter
+                values.
+
+        Returns: A dictionary of {name: value}, in the order registered, with scalars as floats and anything else as flattened arrays.
+        """
+        if p is None:
+            p = self.opti.value(self.opti.p, self.opti.value_parameters())
+        values = self.function()(x=x, p=p)
+        return {
+            k: _to_python(values[k])
+            for k in self.names
+        }
+
+    def __call__(self, sol: asb.OptiSol) -> Dict[str, Union[float, np.ndarray]]:
+        """
+        Evaluates every registered output at a solution of the problem; see `evaluate()`.
+        """
+        return self.evaluate(
+            x=sol.value(self.opti.x),
+            p=sol.value(self.opti.p),
+        )
@@ -0,0 +1,425 @@
+import numpy as np
+import itertools
+import os
+import time
+from pathlib import Path
+from typing import Union, Dict, List, Any, Tuple
+from compiled_problem import CompiledProblem
+from solve_pool import SolvePool
+
+
+class ParetoFront:
+    """
+    The result of `pareto_front()`: a set of designs that trade two or three objectives against each other.
+
+    Attributes:
+        names: The names of the objectives (outputs or parameters of the problem).
+        senses: "min" or "max", for each objective.
+        method: "epsilon" or "weighted_sum".
+        targets: What each point was solved for, of shape (n_points, n_objectives). For "epsilon", the limit on each
+            objective (NaN for the primary objective, which is minimized); for "weighted_sum", the weight of each
+            objective (before normalization).
+        values: The value of each objective at each point, of shape (n_points, n_objectives). NaN where the solve
+            failed.
+        success: Whether each point converged.
+        anchor: Whether each point is an anchor: the optimum of one objective alone.
+        x, p: The decision and parameter vectors of each point.
+        iterations: The number of IPOPT iterations of each point.
+        problem: The CompiledProblem, if attached. Needed to evaluate other outputs with `__call__()`. Not saved.
+    """
+
+    def __init__(self,
+                 names: List[str],
+                 senses: List[str],
+                 method: str,
+                 targets: np.ndarray,
+                 values: np.ndarray,
+                 success: np.ndarray,
+                 anchor: np.ndarray,
+                 x: np.ndarray,
+                 p: np.ndarray,
+                 iterations: np.ndarray,
+                 problem: CompiledProblem = None,
+                 ):
+        self.names = list(names)
+        self.senses = list(senses)
+        self.method = method
+        self.targets = np.asarray(targets, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        self.success = np.asarray(success, dtype=bool)
+        self.anchor = np.asarray(anchor, dtype=bool)
+        self.x = np.asarray(x, dtype=float)
+        self.p = np.asarray(p, dtype=float)
+        self.iterations = np.asarray(iterations, dtype=int)
+        self.problem = problem
+
+    def __len__(self) -> int:
+        return len(self.success)
+
+    def __call__(self, name: str) -> np.ndarray:
+        """
+        Returns the value of an objective, output, or parameter at each point (NaN where the solve failed).
+        """
+        if name in self.names:
+            return self.values[:, self.names.index(name)]
+        if self.problem is None:
+            raise ValueError("Attach a problem (`front.problem = problem`) to evaluate outputs other than objectives.")
+        if name in self.problem.parameter_names:
+            return self.p[:, self.problem.parameter_names.index(name)]
+        index = self.problem.output_names.index(name)
+        return np.array([
+            float(self.problem.outputs(x, p)[index]) if success else np.nan
+            for x, p, success in zip(self.x, self.p, self.success)
+        ])
+
+    def nondominated(self) -> np.ndarray:
+        """
+        Returns a mask of the converged points that no other converged point dominates (at least as good in every
+        objective, and better in one). Epsilon-constraint fronts can contain weakly dominated points, e.g. where a
+        limit is not active.
+        """
+        signs = np.array([1 if sense == "min" else -1 for sense in self.senses])
+        values = self.values * signs
+        mask = self.success.copy()
+        for i in np.flatnonzero(self.success):
+            others = values[self.success]
+            dominated = np.any(
+                np.all(others <= values[i], axis=1) &
+                np.any(others < values[i] - 1e-9 * np.abs(values[i]), axis=1)
+            )
+            mask[i] = not dominated
+        return mask
+
+    def report(self) -> str:
+        """
+        Returns a table of the points, in solve order, marking the anchors and the non-dominated points.
+        """
+        nondominated = self.nondominated()
+        lines = [
+            f"{'Point'.rjust(5)} " + " ".join(f"{name[:24].rjust(24)}" for name in self.names) +
+            f" {'Iter.'.rjust(6)}  Result"
+        ]
+        for i in range(len(self)):
+            lines.append(
+                f"{i:5d} " + " ".join(f"{v:24.6g}" for v in self.values[i]) + f" {self.iterations[i]:6d}  " +
+                ("failed" if not self.success[i] else "anchor" if self.anchor[i] else
+                "pareto" if nondominated[i] else "dominated")
+            )
+        lines.append(
+            f"{int(np.sum(self.success))}/{len(self)} converged, {int(np.sum(nondominated))} non-dominated; "
+            f"{int(np.sum(self.iterations))} iterations."
+        )
+        return "\n".join(lines)
+
+    def save(self, filename: Union[str, Path]) -> None:
+        """
+        Saves the front to disk, as a NumPy `.npz` file. The write is atomic.
+        """
+        filename = Path(filename)
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        tmp_filename = filename.with_name(f"{filename.stem}.{os.getpid()}.tmp.npz")
+        np.savez(
+            tmp_filename,
+            names=np.array(self.names),
+            senses=np.array(self.senses),
+            method=np.array(self.method),
+            targets=self.targets,
+            values=self.values,
+            success=self.success,
+            anchor=self.anchor,
+            x=self.x,
+            p=self.p,
+            iterations=self.iterations,
+        )
+        os.replace(tmp_filename, filename)
+
+    @classmethod
+    def load(cls,
+             filename: Union[str, Path],
+             problem: CompiledProblem = None,
+             ) -> "ParetoFront":
+        with np.load(filename) as data:
+            return cls(
+                names=[str(n) for n in data["names"]],
+                senses=[str(s) for s in data["senses"]],
+                method=str(data["method"]),
+                targets=data["targets"],
+                values=data["values"],
+                success=data["success"],
+                anchor=data["anchor"],
+                x=data["x"],
+                p=data["p"],
+                iterations=data["iterations"],
+                problem=problem,
+            )
+
+
+def _waves(indices: List[Tuple[int, ...]], n_points: int) -> List[List[int]]:
+    """
+    Splits grid points into waves, coarse to fine: first the points on the coarsest sub-grid, then those on a grid
+    twice as fine, and so on. Each wave can be solved in parallel, warm-started from the waves before it, whose
+    points are at most one grid spacing (of the current wave) away.
+    """
+    stride = 2 ** int(np.ceil(np.log2(max(n_points - 1, 1))))
+    waves = []
+    assigned = set()
+    while stride >= 1:
+        wave = [
+            i for i, index in enumerate(indices)
+            if i not in assigned and all(k % stride == 0 for k in index)
+        ]
+        if len(wave) > 0:
+            waves.append(wave)
+            assigned |= set(wave)
+        stride //= 2
+    return waves
+
+
+def pareto_front(
+        problem: CompiledProblem,
+        objectives: Dict[str, Dict[str, str]],
+        names: List[str],
+        method: str = "epsilon",
+        n_points: int = 11,
+        ranges: Dict[str, Tuple[float, float]] = None,
+        parameter_values: Dict[str, Union[float, np.ndarray]] = None,
+        n_workers: int = None,
+        use_duals: bool = False,
+        filename: Union[str, Path] = None,
+        verbose: bool = False,
+        **solve_kwargs,
+) -> ParetoFront:
+    """
+    Traces the Pareto front between two or three objectives of a problem whose objective and limits are parametric,
+    such as `design_opt.py`'s trade-study variant (see `design_opt.pareto_objectives`).
+
+    First, each objective that can be minimized is minimized alone: these anchors bound the front. Then the front is
+    filled in by one of:
+        * "epsilon" (epsilon-constraint): The first objective is minimized, with a limit on each of the others, on a
+            grid of `n_points` limits per objective, spanning the range between the anchors.
+        * "weighted_sum": A weighted sum of the objectives (each normalized by its range between the anchors) is
+            minimized, on a grid of weights with `n_points` per edge of the simplex. This only finds the convex part
+            of the front.
+
+    Points are solved in waves, coarse to fine (see `_waves()`): all points of a wave are solved in parallel, each
+    warm-started from the nearest converged point of the earlier waves.
+
+    Args:
+        problem: The CompiledProblem to solve.
+        objectives: The candidate objectives, as {name: spec}. The name is an output (or parameter) of the problem;
+            the spec is a dictionary with keys:
+            * "weight": [Optional] The parameter that weights this objective in the problem's objective function.
+                Only objectives with a weight can be minimized.
+            * "limit": [Optional] The parameter that limits this objective: an upper limit for "min" objectives, a
+                lower limit for "max" ones. For an objective that is itself a parameter (e.g., `mission_range`), this
+                is the parameter. Only objectives with a limit can be traded by "epsilon".
+            * "sense": [Optional] "min" (the default) or "max".
+        names: The two or three objectives to trade, by name. For "epsilon", the first must have a weight.
+        method: "epsilon" or "weighted_sum".
+        n_points: The number of grid points per objective (or per edge of the weight simplex).
+        ranges: [Optional] The range of each objective to span, as {name: (low, high)}, instead of that found from
+            the anchors. Required in effect for objectives without a weight; otherwise, they default to +/-50% of
+            the default value of their limit parameter.
+        parameter_values: [Optional] Values of any other parameters, as in `CompiledProblem.solve()`.
+        n_workers: The number of worker processes. Defaults to the number of CPUs. If 1, runs serially, in this
+            process.
+        use_duals: If True, the constraint multipliers are warm-started too (IPOPT's `warm_start_init_point`).
+        filename: [Optional] If given, the front is saved here (see `ParetoFront.save()`).
+        verbose: If True, prints the progress of each wave.
+        **solve_kwargs: Any other keyword arguments of `CompiledProblem.solve()` (e.g., `max_iter`).
+
+    Returns: A ParetoFront.
+    """
+    if not 2 <= len(names) <= 3:
+        raise ValueError("Trace a front between two or three objectives.")
+    for name in names:
+        if name not in objectives:
+            raise KeyError(f"No objective named `{name}`! Options: {list(objectives.keys())}")
+    if method not in ["epsilon", "weighted_sum"]:
+        raise ValueError("Bad value of `method`! Options: \"epsilon\", \"weighted_sum\"")
+    minimizable = [name for name in names if "weight" in objectives[name]]
+    if method == "epsilon" and names[0] not in minimizable:
+        raise ValueError(f"The first objective (`{names[0]}`) must have a weight, to be minimized.")
+    if method == "epsilon" and any("limit" not in objectives[name] for name in names[1:]):
+        raise ValueError("With \"epsilon\", every objective but the first must have a limit.")
+    if method == "weighted_sum" and len(minimizable) < len(names):
+        raise ValueError("With \"weighted_sum\", every objective must have a weight.")
+    senses = [objectives[name].get("sense", "min") for name in names]
+    ranges = {} if ranges is None else dict(ranges)
+    parameter_values = {} if parameter_values is None else dict(parameter_values)
+    solve_kwargs = {
+        "verbose": False,
+        **solve_kwargs,
+        "behavior_on_failure": "return_last",
+    }
+
+    ### Scale each minimizable objective by its value at the initial guess, so that weights are of order 1.
+    p0 = problem.parameter_vector(parameter_values)
+    initial_outputs = problem.outputs(x=problem.x0, p=p0)
+    scales = {
+        name: max(abs(float(initial_outputs[name])), 1e-12) if name in initial_outputs else 1.
+        for name in minimizable
+    }
+    all_weights = [spec["weight"] for spec in objectives.values() if "weight" in spec]
+
+    def make_task(weights: Dict[str, float], limits: Dict[str, float], guess) -> Dict[str, Any]:
+        values = {
+            **parameter_values,
+            **{weight: 0. for weight in all_weights},
+            **{objectives[name]["weight"]: w for name, w in weights.items()},
+            **{objectives[name]["limit"]: eps for name, eps in limits.items()},
+        }
+        task = {"parameter_values": values}
+        if guess is not None:
+            task["x0"] = guess[0]
+            if use_duals:
+                task["lam_g0"] = guess[1]
+                task["options"] = {
+                    "ipopt.warm_start_init_point": "yes",
+                    **solve_kwargs.get("options", {}),
+                }
+        return task
+
+    def objective_values(sol) -> np.ndarray:
+        if not sol.stats()["success"]:
+            return np.full(len(names), np.nan)
+        return np.array([sol(name) for name in names], dtype=float)
+
+    records = []  # One per point: {"target", "coordinates", "sol", "anchor"}
+    start = time.perf_counter()
+
+    pool = None if n_workers == 1 else SolvePool(problem, n_workers=n_workers, **solve_kwargs)
+
+    def solve_all(tasks):
+        if pool is None:
+            return [problem.solve(**solve_kwargs, **task) for task in tasks]
+        return pool.map(tasks)
+
+    try:
+        ### Anchors
+        anchor_names = minimizable
+        anchor_solutions = solve_all([
+            make_task({name: 1 / scales[name]}, {}, None)
+            for name in anchor_names
+        ])
+        if verbose:
+            print(f"Anchors: {sum(sol.stats()['success'] for sol in anchor_solutions)}/{len(anchor_names)} converged "
+                  f"({time.perf_counter() - start:.1f} s)")
+
+        for name in names:
+            if name in ranges:
+                continue
+            anchor_values = [
+                sol(name) for sol in anchor_solutions
+                if sol.stats()["success"]
+            ]
+            if "weight" in objectives[name] and len(anchor_values) >= 2:
+                ranges[name] = (min(anchor_values), max(anchor_values))
+            elif "limit" not in objectives[name]:
+                raise RuntimeError(f"Too few anchors converged to find the range of `{name}`; give it in `ranges`.")
+            else:
+                default = p0[problem.parameter_names.index(objectives[name]["limit"])]
+                ranges[name] = (0.5 * default, 1.5 * default)
+
+        ### The grid
+        if method == "epsilon":
+            limited = names[1:]
+            indices = list(itertools.product(range(n_points), repeat=len(limited)))
+            grid = []
+            for index in indices:
+                limits = {
+                    name: ranges[name][0] + (ranges[name][1] - ranges[name][0]) * k / (n_points - 1)
+                    for name, k in zip(limited, index)
+                }
+                grid.append((
+                    {names[0]: 1 / scales[names[0]]},
+                    limits,
+                    np.array([np.nan] + [limits[name] for name in limited]),
+                ))
+
+            def coordinates(values):
+                return np.array([
+                    (values[names.index(name)] - ranges[name][0]) /
+                    max(ranges[name][1] - ranges[name][0], 1e-100) * (n_points - 1)
+                    for name in limited
+                ])
+        else:
+            indices = [
+                index for index in itertools.product(range(n_points), repeat=len(names))
+                if sum(index) == n_points - 1
+            ]
+            grid = []
+            for index in indices:
+                fractions = np.array(index) / (n_points - 1)
+                grid.append((
+                    {
+                        name: fraction / max(ranges[name][1] - ranges[name][0], 1e-12 * scales[name])
+                        for name, fraction in zip(names, fractions)
+                    },
+                    {},
+                    fractions,
+                ))
+
+            def coordinates(values):
+                normalized = np.array([
+                    (values[i] - ranges[name][0]) / max(ranges[name][1] - ranges[name][0], 1e-100)
+                    for i, name in enumerate(names)
+                ])  # An objective at its minimum (0) corresponds to a full weight on it.
+                return (1 - normalized) / max(np.sum(1 - normalized), 1e-100) * (n_points - 1)
+
+        for name, sol in zip(anchor_names, anchor_solutions):
+            values = objective_values(sol)
+            target = np.full(len(names), np.nan)
+            if method == "weighted_sum":
+                target = np.array([1. if n == name else 0. for n in names])
+            records.append({
+                "target"     : target,
+                "coordinates": None if np.any(np.isnan(values)) else coordinates(values),
+                "sol"        : sol,
+                "anchor"     : True,
+            })
+
+        ### Solve the grid, coarse to fine
+        for wave_number, wave in enumerate(_waves(indices, n_points)):
+            tasks = []
+            for i in wave:
+                solved = [r for r in records if r["coordinates"] is not None]
+                if len(solved) == 0:
+                    guess = None
+                else:
+                    nearest = min(solved, key=lambda r: np.linalg.norm(r["coordinates"] - np.array(indices[i])))
+                    guess = (nearest["sol"].x, nearest["sol"].lam_g)
+                weights, limits, _ = grid[i]
+                tasks.append(make_task(weights, limits, guess))
+            solutions = solve_all(tasks)
+            for i, sol in zip(wave, solutions):
+                values = objective_values(sol)
+                records.append({
+                    "target"     : grid[i][2],
+                    "coordinates": None if np.any(np.isnan(values)) else np.array(indices[i], dtype=float),
+                    "sol"        : sol,
+                    "anchor"     : False,
+                })
+            if verbose:
+                print(f"Wave {wave_number + 1}: {sum(sol.stats()['success'] for sol in solutions)}/{len(wave)} "
+                      f"converged ({time.perf_counter() - start:.1f} s)")
+    finally:
+        if pool is not None:
+            pool.close()
+
+    front = ParetoFront(
+        names=names,
+        senses=senses,
+        method=method,
+        targets=np.array([r["target"] for r in records]),
+        values=np.array([objective_values(r["sol"]) for r in records]),
+        success=np.array([r["sol"].stats()["success"] for r in records]),
+        anchor=np.array([r["anchor"] for r in records]),
+        x=np.array([r["sol"].x for r in records]),
+        p=np.array([r["sol"].p for r in records]),
+        iterations=np.array([r["sol"].stats()["iter_count"] for r in records]),
+        problem=problem,
+    )
+    if filename is not None:
+        front.save(filename)
+    return front
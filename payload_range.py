@@ -0,0 +1,130 @@
+import numpy as np
+from typing import Union, Dict, List, Any, Tuple
+
+design_record_outputs = {  # Design record field : the output it is taken from (see `design_opt.get_outputs()`).
+    "mass_empty"          : "mass_props_empty.mass",  # Operating empty mass [kg]
+    "mass_payload"        : "mass_props.passengers.mass",  # Maximum payload [kg]
+    "mass_fuel"           : "mass_props.fuel.mass",  # Fuel capacity [kg]
+    "V_cruise"            : "V_cruise",  # [m/s]
+    "LD_cruise"           : "LD_cruise",  # [-]
+    "Isp"                 : "Isp",  # As it enters the Breguet range equation
+    "fuel_specific_energy": "fuel_specific_energy",  # [J/kg]
+    "n_pax"               : "n_pax",  # Seats at maximum payload
+}
+
+
+def design_record(values: Any) -> Dict[str, float]:
+    """
+    Builds the compact record of a design that payload-range calculations need (see `design_record_outputs`).
+
+    Args:
+        values: The design's outputs, looked up by name: a CompiledSolution (or anything callable by name), or a
+            dictionary (e.g., from `OutputRegistry`) or a DataFrame row (anything indexable by name).
+
+    Returns: A dictionary of {field: value}.
+    """
+    get = values if callable(values) else values.__getitem__
+    return {
+        field: float(get(output))
+        for field, output in design_record_outputs.items()
+    }
+
+
+def design_records(designs: List[Any]) -> Dict[str, np.ndarray]:
+    """
+    Builds the records of many designs (see `design_record()`), as {field: array of shape (n_designs,)}.
+    """
+    records = [design_record(design) for design in designs]
+    return {
+        field: np.array([record[field] for record in records], dtype=float)
+        for field in design_record_outputs
+    }
+
+
+def design_records_from_store(
+        store: Any,
+        where: Dict[str, Any] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Loads the records of the designs in a `results_store.ResultsStore`, reading only the columns needed.
+
+    Args:
+        store: The ResultsStore.
+        where: [Optional] Conditions on the rows, as in `ResultsStore.query()`. Defaults to converged solves.
+
+    Returns: A dictionary of {field: array of shape (n_designs,)}.
+    """
+    return design_records_from_rows(store.query(
+        columns=list(design_record_outputs.values()),
+        where={"stats.success": True} if where is None else where,
+    ))
+
+
+def design_records_from_rows(rows: Any) -> Dict[str, np.ndarray]:
+    """
+    Builds the records of many designs from a table of their outputs (e.g., a DataFrame from
+    `ResultsStore.query()`), with one column per output in `design_record_outputs`.
+    """
+    return {
+        field: rows[output].to_numpy(dtype=float)
+        for field, output in design_record_outputs.items()
+    }
+
+
+def payload_range(
+        records: Dict[str, Union[float, np.ndarray]],
+        payload_fractions: Union[float, np.ndarray],
+        fuel_fractions: Union[float, np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the range, and the transport energy, of N designs at M loadings, by the Breguet range equation.
+
+    Args:
+        records: Design records, as {field: value or array of shape (N,)} (see `design_records()`).
+        payload_fractions: The payload carried at each loading, as a fraction of the maximum: an array of shape (M,).
+            Seats are filled in proportion.
+        fuel_fractions: The fuel carried at each loading, as a fraction of the capacity: an array of shape (M,).
+
+    Returns: A tuple of (flight ranges [m], transport efficiencies [MJ/seat-km]), each of shape (N, M).
+    """
+    r = {k: np.reshape(np.asarray(records[k], dtype=float), (-1, 1)) for k in design_record_outputs}
+    payload_fractions = np.reshape(np.asarray(payload_fractions, dtype=float), (1, -1))
+    fuel_fractions = np.reshape(np.asarray(fuel_fractions, dtype=float), (1, -1))
+
+    mass_zero_fuel = r["mass_empty"] + payload_fractions * r["mass_payload"]
+    mass_fuel = fuel_fractions * r["mass_fuel"]
+    flight_ranges = (
+            r["V_cruise"] *
+            r["LD_cruise"] *
+            r["Isp"] *
+            np.log((mass_zero_fuel + mass_fuel) / mass_zero_fuel)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):  # Infinite (or NaN) at zero payload or zero fuel.
+        transport_efficiencies = mass_fuel * r["fuel_specific_energy"] / (
+                payload_fractions * r["n_pax"] * flight_ranges
+        ) / (1e6 / 1e3)
+    return flight_ranges, transport_efficiencies
+
+
+def market_coverage(
+        records: Dict[str, Union[float, np.ndarray]],
+        n_points: int = 100,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the payload-range (market coverage) curves of N designs at once: transport efficiency at full payload
+    up to each design's range (fuel from 0.1% to 100% of capacity), then with passengers offloaded beyond it (from
+    100% to 0.1% of payload, with full fuel).
+
+    Args:
+        records: Design records, as {field: value or array of shape (N,)} (see `design_records()`).
+        n_points: The number of points on each of the two legs.
+
+    Returns: A tuple of (flight ranges [m], transport efficiencies [MJ/seat-km]), each of shape (N, 2 * n_points),
+    with flight ranges increasing along each row.
+    """
+    fractions = np.linspace(1e-3, 1, n_points)
+    return payload_range(
+        records,
+        payload_fractions=np.concatenate([np.ones(n_points), fractions[::-1]]),
+        fuel_fractions=np.concatenate([fractions, np.ones(n_points)]),
+    )
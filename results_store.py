@@ -0,0 +1,436 @@
+import aerosandbox as asb
+import numpy as np
+import pandas as pd
+import fnmatch
+import multiprocessing.util
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Union, Dict, List, Any, Tuple, Iterator, Optional
+from compiled_problem import opti_variable_names
+from output_registry import OutputRegistry
+
+
+def _flatten(name: str, value: Any) -> Dict[str, Any]:
+    """
+    Flattens a (possibly vector-valued) value into columns: "name" for a scalar, or "name[0]", "name[1]", ... for a
+    vector.
+    """
+    if isinstance(value, (str, bool, np.bool_)):
+        return {name: value}
+    value = np.asarray(value, dtype=float)
+    if value.size == 1:
+        return {name: float(value.item())}
+    return {f"{name}[{i}]": v for i, v in enumerate(value.flatten())}
+
+
+def _stats_columns(stats: Dict[str, Any], t_wall_total: float = None) -> Dict[str, Any]:
+    return {
+        "stats.success"      : bool(stats.get("success")),
+        "stats.return_status": str(stats.get("return_status")),
+        "stats.iter_count"   : int(stats.get("iter_count", -1)),
+        "stats.t_wall_total" : stats.get("t_wall_total", np.nan) if t_wall_total is None else t_wall_total,
+    }
+
+
+def solution_row(
+        sol: Any,
+        **metadata,
+) -> Dict[str, Any]:
+    """
+    Builds the results-store row of one solve of a CompiledProblem.
+
+    Args:
+        sol: A CompiledSolution (converged or not).
+        **metadata: Any other columns to record (e.g., `fuel_type="LH2_fwd_aft"`).
+
+    Returns: A flat dictionary of {column: value}, with columns:
+        * "timestamp", "problem": When the solve was recorded, and the problem's `graph_hash()`.
+        * "parameter.<name>": The value of every parameter.
+        * "x.<name>": The decision vector, entry by entry (in its scaled, as-optimized form).
+        * "<output>": Every output of the problem (e.g., "transport_efficiency_MJ_per_seat_km",
+            "mass_props.fuel.mass"); vector-valued outputs as "<output>[0]", "<output>[1]", ....
+        * "stats.success", "stats.return_status", "stats.iter_count", "stats.t_wall_total": As in the solver stats.
+        * Any `metadata`.
+    """
+    problem = sol.problem
+    row = {
+        "timestamp": time.time(),
+        "problem"  : problem.graph_hash(),
+        **metadata,
+    }
+    for name, value in zip(problem.parameter_names, sol.p):
+        row[f"parameter.{name}"] = float(value)
+    for name, value in zip(problem.variable_names, sol.x):
+        row[f"x.{name}"] = float(value)
+    for name, value in sol.outputs().items():
+        row.update(_flatten(name, value))
+    row.update(_stats_columns(sol.stats()))
+    return row
+
+
+def opti_solution_row(
+        sol: asb.OptiSol,
+        opti: asb.Opti,
+        parameters: Dict[str, Any] = None,
+        outputs: Dict[str, Any] = None,
+        t_wall_total: float = None,
+        **metadata,
+) -> Dict[str, Any]:
+    """
+    Builds the results-store row of one solve of an `asb.Opti` problem, with the same columns as `solution_row()`.
+
+    Args:
+        sol: The `asb.OptiSol` of the solve.
+        opti: The problem solved.
+        parameters: [Optional] The named parameters of the problem, as {name: expression} (e.g.,
+            `design_opt.get_parameters(vars)`).
+        outputs: [Optional] The named outputs of the problem, as {name: expression} (e.g.,
+            `design_opt.get_outputs(vars)`).
+        t_wall_total: [Optional] The wall time of the solve [sec], as measured by the caller; an `asb.OptiSol`'s
+            stats lack it.
+        **metadata: Any other columns to record. Without a "problem" column, it is left empty.
+
+    Returns: A flat dictionary of {column: value}.
+    """
+    row = {
+        "timestamp": time.time(),
+        "problem"  : "",
+        **metadata,
+    }
+    for name, value in zip(opti_variable_names(opti), np.array(sol.value(opti.x), dtype=float).flatten()):
+        row[f"x.{name}"] = float(value)
+    registry = OutputRegistry(opti, {  # Evaluates the parameters and outputs in a single call.
+        **{f"parameter.{name}": value for name, value in (parameters or {}).items()},
+        **(outputs or {}),
+    })
+    if len(registry) > 0:
+        for name, value in registry(sol).items():
+            row.update(_flatten(name, value))
+    row.update(_stats_columns(sol.stats(), t_wall_total=t_wall_total))
+    return row
+
+
+_buffers: Dict[Path, Dict[str, Any]] = {}  # This process's unwritten rows, as {store directory: buffer}.
+_buffers_pid: Optional[int] = None  # The process that `_buffers` belongs to.
+
+
+def _process_buffers() -> Dict[Path, Dict[str, Any]]:
+    """
+    Returns this process's buffers of unwritten rows. Rows are buffered per process rather than per ResultsStore,
+    since a store passed to a worker with each task arrives as a fresh copy every time.
+
+    A forked worker starts with no buffers (rather than a copy of its parent's), and writes its own when it exits
+    normally. This uses a multiprocessing finalizer rather than `atexit`, which the workers of `multiprocessing.Pool`,
+    `SolvePool` and `guarded_imap()` skip.
+    """
+    global _buffers, _buffers_pid
+    if _buffers_pid != os.getpid():
+        _buffers = {}
+        _buffers_pid = os.getpid()
+        multiprocessing.util.Finalize(None, _flush_buffers, exitpriority=0)
+    return _buffers
+
+
+def _flush_buffers() -> None:
+    for directory in list(_process_buffers().keys()):
+        _flush_buffer(directory)
+
+
+def _flush_buffer(directory: Path) -> Optional[Tuple[Path, int, List[str]]]:
+    """
+    Writes this process's buffered rows for the store in `directory` as a chunk.
+
+    Returns: The chunk's (filename, number of rows, columns), or None if there were no rows to write.
+    """
+    buffer = _process_buffers().pop(directory, None)
+    if buffer is None or len(buffer["rows"]) == 0:
+        return None
+    rows = buffer["rows"]
+    columns = {}
+    for row in rows:
+        for column in row:
+            columns.setdefault(column, None)
+    arrays = {}
+    for column in columns:
+        values = [row.get(column) for row in rows]
+        if all(isinstance(v, str) or v is None for v in values):
+            arrays[column] = np.array(["" if v is None else v for v in values], dtype=str)
+        else:
+            arrays[column] = np.array([np.nan if v is None else v for v in values], dtype=float)
+    return _write_chunk(directory, arrays, len(rows)), len(rows), list(arrays.keys())
+
+
+def _write_chunk(directory: Path, arrays: Dict[str, np.ndarray], n_rows: int) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"  # Sorts oldest first.
+    filename = directory / f"{name}.npz"
+    tmp_filename = directory / f"{name}.tmp.npz"
+    np.savez(  # Uncompressed, so that single columns can be read without inflating the rest.
+        tmp_filename,
+        _n_rows=np.array(n_rows),
+        **arrays,
+    )
+    os.replace(tmp_filename, filename)
+    return filename
+
+
+def _concatenate(pieces: List[Union[np.ndarray, int]]) -> np.ndarray:
+    """
+    Concatenates the pieces of one column from consecutive chunks, where an integer piece stands for that many missing
+    values. A chunk stores a column with only missing values as empty strings, so these count as missing, too.
+    """
+    arrays = [piece for piece in pieces if not isinstance(piece, int)]
+    if any(a.dtype.kind != "U" for a in arrays) and not any(a.dtype.kind == "U" and np.any(a != "") for a in arrays):
+        return np.concatenate([
+            np.full(piece, np.nan) if isinstance(piece, int) else
+            np.full(len(piece), np.nan) if piece.dtype.kind == "U" else
+            piece.astype(float)
+            for piece in pieces
+        ])
+    return np.concatenate([
+        np.full(piece, "") if isinstance(piece, int) else piece.astype(str)
+        for piece in pieces
+    ])
+
+
+class ResultsStore:
+    """
+    A columnar on-disk store of solve results, one row per solve (see `solution_row()`), for analysing many solved
+    designs without re-solving them or parsing logs.
+
+    Pass one as the `results_store` argument of `CompiledProblem.solve()` to record every solve, including failed
+    ones. Since `solve()` passes it through, this also works for anything that forwards solve arguments - `SolvePool`,
+    `continuation()`, `robust_solve()` (one row per attempt), and the sweeps built on them:
+
+        >>> store = ResultsStore("cache/results")
+        >>> sol = problem.solve(results_store=store)
+        >>> store.query(
+        ...     columns=["parameter.mission_range", "transport_efficiency_MJ_per_seat_km", "mass_props.*.mass"],
+        ...     where={"stats.success": True},
+        ... )
+
+    Rows are kept in chunks: uncompressed `.npz` files with one array per column, each written atomically under a
+    name unique to the writing process, so many worker processes can append to one store. Each process buffers its
+    rows, and writes them as a chunk every `flush_every` rows or `flush_interval` seconds, and when it exits. A query
+    opens each chunk lazily and reads only the columns it needs; which columns each chunk has is read once, and
+    cached. `compact()` merges small chunks into large ones, which are faster to query.
+    """
+
+    def __init__(self,
+                 directory: Union[str, Path] = "cache/results",
+                 flush_every: int = 100,
+                 flush_interval: float = 60.,
+                 **metadata,
+                 ):
+        """
+        Args:
+            directory: The directory of the store.
+            flush_every: Write a chunk once this process has buffered this many rows.
+            flush_interval: Write a chunk once the oldest row buffered by this process is this old [sec], so that a
+                slow sweep's rows reach the disk steadily. Buffered rows are also written when the process exits
+                normally, or on `flush()`; those of a worker that is killed (e.g., for breaching a timeout) are lost.
+            **metadata: Columns to add to every row (e.g., `study="market_segmentation"`).
+        """
+        self.directory = Path(directory).absolute()  # Buffered rows may be written at exit, after a change of cwd.
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.metadata = metadata
+        self._index: Dict[Path, Tuple[int, List[str]]] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_index"] = {}  # Rebuilt where needed, rather than sent to a worker with every task.
+        return state
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.flush()
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """
+        Appends a row, as a flat dictionary of {column: value}. Values are numbers, booleans, or strings; a row
+        may lack columns that others have (they read as missing).
+        """
+        buffer = _process_buffers().setdefault(self.directory, {"rows": [], "start": time.perf_counter()})
+        buffer["rows"].append({**self.metadata, **row})
+        if (
+                len(buffer["rows"]) >= self.flush_every or
+                time.perf_counter() - buffer["start"] >= self.flush_interval
+        ):
+            self.flush()
+
+    def write(self, sol: Any, **metadata) -> None:
+        """
+        Appends the row of a CompiledSolution (see `solution_row()`).
+        """
+        self.append(solution_row(sol, **metadata))
+
+    def flush(self) -> None:
+        """
+        Writes any rows buffered by this process as a chunk. Queries do this first, so they see every row appended
+        in this process.
+        """
+        written = _flush_buffer(self.directory)
+        if written is not None:
+            filename, n_rows, columns = written
+            self._index[filename] = (n_rows, columns)
+
+    def chunks(self) -> List[Path]:
+        """
+        Returns the chunk files of the store, oldest first.
+        """
+        return sorted(
+            f for f in self.directory.glob("*.npz")
+            if not f.name.endswith(".tmp.npz")
+        )
+
+    def _chunk_index(self) -> Dict[Path, Tuple[int, List[str]]]:
+        """
+        Returns the (number of rows, columns) of every chunk, oldest first. Chunks are never modified once written, so
+        each chunk's directory is read only the first time it is seen.
+        """
+        self.flush()
+        index = {}
+        for chunk in self.chunks():
+            if chunk not in self._index:
+                with np.load(chunk) as data:
+                    self._index[chunk] = (int(data["_n_rows"]), [c for c in data.files if c != "_n_rows"])
+            index[chunk] = self._index[chunk]
+        self._index = index  # Forgets chunks since deleted (e.g., by `compact()`).
+        return index
+
+    def columns(self) -> List[str]:
+        """
+        Returns the names of all columns in the store.
+        """
+        columns = {}
+        for _, chunk_columns in self._chunk_index().values():
+            for column in chunk_columns:
+                columns.setdefault(column, None)
+        return list(columns)
+
+    def __len__(self) -> int:
+        return sum(n_rows for n_rows, _ in self._chunk_index().values())
+
+    def _select(self, columns: List[str] = None) -> List[str]:
+        all_columns = self.columns()
+        if columns is None:
+            return all_columns
+        selected = []
+        for pattern in columns:
+            if pattern in all_columns:  # Exact names first, since entries of vectors (e.g., "x[0]") look like patterns.
+                matches = [pattern]
+            else:
+                matches = [c for c in all_columns if fnmatch.fnmatchcase(c, pattern)]
+            if len(matches) == 0 and not any(char in pattern for char in "*?"):
+                matches = [pattern]  # Not in the store; read as missing.
+            selected.extend(c for c in matches if c not in selected)
+        return selected
+
+    def iter_query(self,
+                   columns: List[str] = None,
+                   where: Dict[str, Union[Any, Tuple[float, float]]] = None,
+                   ) -> Iterator[pd.DataFrame]:
+        """
+        Loads rows of the store chunk by chunk, so that a store larger than memory can be streamed through. Arguments
+        are as in `query()`.
+
+        Returns: An iterator of DataFrames, one per chunk with matching rows, each with every selected column.
+        """
+        where = {} if where is None else where
+        selected = self._select(columns)
+        for chunk, (n_rows, chunk_columns) in self._chunk_index().items():
+            if any(column not in chunk_columns for column in where):  # No row of the chunk can match.
+                continue
+            with np.load(chunk) as data:
+                mask = np.ones(n_rows, dtype=bool)
+                for column, condition in where.items():
+                    values = data[column]
+                    if isinstance(condition, tuple):
+                        low, high = condition
+                        mask &= (values >= low) & (values <= high)
+                    else:
+                        mask &= values == condition
+                if not np.any(mask):
+                    continue
+                n_matches = int(np.sum(mask))
+                yield pd.DataFrame(
+                    {
+                        c: data[c][mask] if c in chunk_columns else np.full(n_matches, np.nan)
+                        for c in selected
+                    },
+                    index=pd.RangeIndex(n_matches),
+                )
+
+    def query(self,
+              columns: List[str] = None,
+              where: Dict[str, Union[Any, Tuple[float, float]]] = None,
+              ) -> pd.DataFrame:
+        """
+        Loads rows of the store, reading only the columns needed.
+
+        Args:
+            columns: [Optional] The columns to load. Shell-style wildcards select several at once (e.g.,
+                "parameter.*", "x.*", "mass_props.*.mass"). Defaults to all columns.
+            where: [Optional] Conditions on the rows to load, as {column: condition}, all of which must hold. A
+                condition is a value the column must equal (e.g., `{"stats.success": True}`), or a tuple of
+                (low, high) bounds it must lie within, inclusive (e.g., `{"parameter.mission_range": (5e6, 1e7)}`).
+                Rows lacking the column do not match.
+
+        Returns: A DataFrame with one row per matching row, in the order written (within each chunk), and one column
+        per selected column. Values missing from a row are NaN (numeric columns) or "" (string columns).
+        """
+        selected = self._select(columns)
+        frames = list(self.iter_query(selected, where))
+        if len(frames) == 0:
+            return pd.DataFrame(columns=selected)
+        frame = pd.concat(frames, ignore_index=True)
+        for column in selected:
+            if frame[column].dtype == object:  # A string column missing from some chunks.
+                frame[column] = frame[column].fillna("")
+        return frame[selected]
+
+    def compact(self, rows_per_chunk: int = 10000) -> None:
+        """
+        Merges the chunks of the store into chunks of `rows_per_chunk` rows, oldest first, to speed up queries.
+        Columns are copied array by array, reading one chunk at a time. Do not run this while other processes write
+        to, or query, the store.
+        """
+        index = list(self._chunk_index().items())
+        if len(index) <= 1:
+            return
+        columns = self.columns()
+        pieces = {column: [] for column in columns}  # Read but not yet written; see `_concatenate()`.
+        n_pending = 0
+
+        def write(n_rows: int) -> None:
+            nonlocal pieces, n_pending
+            merged = {column: _concatenate(pieces[column]) for column in columns}
+            for start in range(0, n_rows, rows_per_chunk):
+                n = min(rows_per_chunk, n_rows - start)
+                filename = _write_chunk(
+                    self.directory,
+                    {column: merged[column][start:start + n] for column in columns},
+                    n,
+                )
+                self._index[filename] = (n, columns)
+            pieces = {column: [merged[column][n_rows:]] for column in columns}
+            n_pending -= n_rows
+
+        for chunk, (n_rows, chunk_columns) in index:
+            with np.load(chunk) as data:
+                for column in columns:
+                    pieces[column].append(data[column] if column in chunk_columns else n_rows)
+            n_pending += n_rows
+            if n_pending >= rows_per_chunk:
+                write(n_pending - n_pending % rows_per_chunk)
+        if n_pending > 0:
+            write(n_pending)
+
+        for chunk, _ in index:
+            chunk.unlink()
+            del self._index[chunk]
@@ -0,0 +1,237 @@
+import numpy as np
+import time
+import warnings
+from typing import Union, Dict, List, Any, Optional, Tuple
+from compiled_problem import CompiledProblem, CompiledSolution
+from warm_start import WarmStartDatabase
+
+failure_classes = {  # IPOPT return status : failure class. Any other failure is "other".
+    "Restoration_Failed"                : "restoration_failure",
+    "Error_In_Step_Computation"         : "restoration_failure",
+    "Search_Direction_Becomes_Too_Small": "restoration_failure",
+    "Maximum_Iterations_Exceeded"       : "max_iter",
+    "Maximum_CpuTime_Exceeded"          : "max_iter",
+    "Maximum_WallTime_Exceeded"         : "max_iter",
+    "Infeasible_Problem_Detected"       : "infeasible",
+    "Invalid_Number_Detected"           : "nan",
+}
+
+default_ladders = {  # Failure class : the rungs to retry with, in order. See `robust_solve()`.
+    "restoration_failure": ["neighbour", "perturb", "rescale", "relax_max_iter"],
+    "max_iter"           : ["relax_max_iter", "neighbour", "rescale", "perturb"],
+    "infeasible"         : ["neighbour", "rescale", "perturb"],
+    "nan"                : ["perturb", "neighbour", "rescale"],
+    "other"              : ["neighbour", "perturb", "rescale", "relax_max_iter"],
+}
+
+rescale_options = {  # The solver options of the "rescale" rung, on top of any others.
+    "ipopt.nlp_scaling_max_gradient": 1.,  # Scale the objective and each constraint to a gradient of at most 1 at x0.
+    "ipopt.nlp_scaling_min_value"   : 1e-6,
+}
+
+
+def classify_failure(sol: CompiledSolution) -> Optional[str]:
+    """
+    Classifies why a solve failed: "restoration_failure", "max_iter", "infeasible", "nan" (a NaN or infinity in the
+    evaluation, or in the result), or "other". Returns None if the solve converged.
+    """
+    finite = bool(np.all(np.isfinite(sol.x)) and np.isfinite(sol.f))
+    if sol.stats()["success"] and finite:
+        return None
+    if not finite:
+        return "nan"
+    return failure_classes.get(sol.stats()["return_status"], "other")
+
+
+def _constraint_violation(sol: CompiledSolution) -> float:
+    """
+    The primal infeasibility at the last iterate of a solve (infinite if unknown).
+    """
+    inf_pr = sol.stats().get("iterations", {}).get("inf_pr", [])
+    if len(inf_pr) == 0 or not np.isfinite(inf_pr[-1]) or not np.all(np.isfinite(sol.x)):
+        return np.inf
+    return float(inf_pr[-1])
+
+
+def robust_solve(
+        problem: CompiledProblem,
+        parameter_values: Dict[str, Union[float, np.ndarray]] = None,
+        x0: np.ndarray = None,
+        database: WarmStartDatabase = None,
+        ladders: Dict[str, List[str]] = None,
+        n_perturbations: int = 2,
+        perturbation: float = 0.05,
+        n_neighbours: int = 2,
+        max_iter: int = 1000,
+        max_iter_factor: float = 3,
+        behavior_on_failure: str = "raise",
+        seed: int = 0,
+        telemetry: Any = None,
+        results_store: Any = None,
+        **solve_kwargs,
+) -> CompiledSolution:
+    """
+    Solves a problem, and if the solve fails, retries it in ways suited to how it failed, for unattended sweeps.
+
+    The failure is classified (`classify_failure()`), and its ladder of retries (`ladders`) is climbed, rung by rung,
+    until a retry converges. The rungs are:
+        * "perturb": Restart from `n_perturbations` random perturbations of the initial guess, each variable by up to
+            +/- `perturbation` times its scale (`CompiledProblem.variable_scales`), within its bounds.
+        * "relax_max_iter": Solve with `max_iter_factor` times the iteration limit. If the first solve ran out of
+            iterations, it continues from the last iterate; otherwise, it restarts from the initial guess.
+        * "rescale": Restart with tighter automatic scaling of the objective and constraints (`rescale_options`).
+        * "neighbour": Restart from each of the `n_neighbours` converged solutions in `database` with the nearest
+            parameters (other than the initial guess itself). Skipped without a database.
+
+    If no rung converges, the attempt that ended nearest to feasible is the result.
+
+    Args:
+        problem: The CompiledProblem to solve.
+        parameter_values: [Optional] A dictionary of {parameter name: value}, as in `CompiledProblem.solve()`.
+        x0: [Optional] An initial guess. Defaults to the nearest solution in `database`, if any, or else to the
+            problem's own initial guess.
+        database: [Optional] A WarmStartDatabase to draw neighbours from. A converged result is stored in it.
+        ladders: [Optional] Ladders to use instead of the defaults (`default_ladders`), as {failure class: rungs}.
+        n_perturbations: The number of perturbed starts on the "perturb" rung.
+        perturbation: The size of the perturbations, relative to each variable's scale.
+        n_neighbours: The number of neighbours tried on the "neighbour" rung.
+        max_iter: The iteration limit of each attempt, before relaxing.
+        max_iter_factor: How much the "relax_max_iter" rung relaxes the iteration limit.
+        behavior_on_failure: What to do if every attempt fails, as in `CompiledProblem.solve()`: "raise" or
+            "return_last".
+        seed: The random seed of the perturbations, for repeatable retries.
+        telemetry: [Optional] A `telemetry.TelemetryLog` to record every attempt to, once the retries are done. Each
+            record carries the attempt's "rung" and "attempt" number, and whether it is the "final" result.
+        results_store: [Optional] A `results_store.ResultsStore` to record the result to: one row per call, not per
+            attempt, with the retries in its "stats.failure_class", "stats.rung" and "stats.n_attempts" columns.
+        **solve_kwargs: Any other keyword arguments of `CompiledProblem.solve()` (e.g., `verbose`, `options`),
+            applied to every attempt.
+
+    Returns: A CompiledSolution, with the retries recorded in its stats:
+        * "failure_class": How the first attempt failed (None if it converged).
+        * "rung": The rung that converged ("initial" if the first attempt did; None if none did).
+        * "attempts": A list with one dictionary per attempt, in order, with keys "rung", "return_status",
+            "failure_class", "iter_count", and "t_wall_total".
+        * "t_wall_attempts": The wall time of all attempts [sec].
+    """
+    if behavior_on_failure not in ["raise", "return_last"]:
+        raise ValueError("Bad value of `behavior_on_failure`!")
+    ladders = default_ladders if ladders is None else {**default_ladders, **ladders}
+
+    neighbours = [] if database is None else database.neighbours(
+        problem,
+        parameter_values,
+        n_neighbours=n_neighbours + 1,
+    )
+    warm_start_distance = np.nan
+    if x0 is None and len(neighbours) > 0:
+        x0 = neighbours[0]["x"]
+        warm_start_distance = neighbours[0]["distance"]
+    x0 = problem.x0 if x0 is None else np.asarray(x0, dtype=float)
+
+    attempts: List[Tuple[str, CompiledSolution]] = []
+
+    def attempt(rung: str, **kwargs) -> bool:
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="Optimization failed")
+            sol = problem.solve(**{
+                "max_iter": max_iter,
+                **solve_kwargs,
+                "parameter_values"   : parameter_values,
+                **kwargs,
+                "behavior_on_failure": "return_last",
+            })
+        attempts.append((rung, sol))
+        return classify_failure(sol) is None
+
+    start = time.perf_counter()
+    converged = attempt("initial", x0=x0)
+    first = attempts[0][1]
+    failure_class = classify_failure(first)
+
+    if not converged:
+        for rung in ladders[failure_class]:
+            if rung == "perturb":
+                lbx, ubx = problem.variable_bounds(parameter_values)
+                rng = np.random.default_rng(seed)
+                for _ in range(n_perturbations):
+                    x = x0 + perturbation * problem.variable_scales * rng.uniform(-1, 1, problem.n_variables)
+                    converged = attempt(rung, x0=np.clip(x, lbx, ubx))
+                    if converged:
+                        break
+            elif rung == "relax_max_iter":
+                converged = attempt(
+                    rung,
+                    x0=first.x if failure_class == "max_iter" else x0,
+                    max_iter=int(max_iter * max_iter_factor),
+                )
+            elif rung == "rescale":
+                converged = attempt(
+                    rung,
+                    x0=x0,
+                    options={
+                        **(solve_kwargs.get("options") or {}),
+                        **rescale_options,
+                    },
+                )
+            elif rung == "neighbour":
+                for neighbour in [n for n in neighbours if not np.array_equal(n["x"], x0)][:n_neighbours]:
+                    converged = attempt(rung, x0=neighbour["x"])
+                    if converged:
+                        break
+            else:
+                raise ValueError(f"Bad rung `{rung}`! Options: \"perturb\", \"relax_max_iter\", \"rescale\", "
+                                 f"\"neighbour\"")
+            if converged:
+                break
+
+    if converged:
+        rung, sol = attempts[-1]
+        if database is not None:
+            database.add(sol)
+    else:
+        rung = None
+        sol = min((s for _, s in attempts), key=_constraint_violation)
+
+    sol.stats().update({
+        "failure_class"      : failure_class,
+        "rung"               : rung,
+        "attempts"           : [
+            {
+                "rung"         : r,
+                "return_status": s.stats()["return_status"],
+                "failure_class": classify_failure(s),
+                "iter_count"   : s.stats()["iter_count"],
+                "t_wall_total" : s.stats()["t_wall_total"],
+            }
+            for r, s in attempts
+        ],
+        "t_wall_attempts"    : time.perf_counter() - start,
+        "warm_start_distance": warm_start_distance,
+    })
+
+    ### Recorded only now, so that each record says which attempt it was, and how the retries ended.
+    if telemetry is not None:
+        for i, (r, s) in enumerate(attempts):
+            telemetry.write(s, rung=r, attempt=i, final=s is sol)
+    if results_store is not None:
+        results_store.write(
+            sol,
+            **{
+                "stats.failure_class": failure_class,
+                "stats.rung"         : rung,
+                "stats.n_attempts"   : len(attempts),
+            }
+        )
+
+    if not converged:
+        message = (
+                f"Optimization failed after {len(attempts)} attempts "
+                f"({failure_class}; " +
+                ", ".join(f"{r}: {s.stats()['return_status']}" for r, s in attempts) + ")"
+        )
+        if behavior_on_failure == "raise":
+            raise RuntimeError(message)
+        warnings.warn(f"{message}. Returning the attempt nearest to feasible.")
+
+    return sol
@@ -1,11 +1,21 @@
 from design_opt import *
+from design_opt import get_compiled_problem
+from robust_solve import robust_solve
+from warm_start import WarmStartDatabase
 
-try:
-    sol = opti.solve()
-except RuntimeError:
-    sol = opti.debug
+# If True, the solve starts from the nearest stored solution (`WarmStartDatabase`), and its result is stored there, so
+# that results depend on earlier runs. Otherwise, it starts from the model's own initial guess, every time.
+warm_start = False
+
+### Solve the compiled problem, retrying on failure; if every retry fails, this warns rather than failing silently.
+sol = robust_solve(
+    get_compiled_problem(),
+    database=WarmStartDatabase() if warm_start else None,
+    verbose=False,
+    behavior_on_failure="return_last",
+).opti_sol(opti)
 s = lambda x: sol.value(x)
 
 airplane = sol(airplane)
 dyn = sol(dyn)
-mass_props = sol(mass_props)
\ No newline at end of file
+mass_props = sol(mass_props)
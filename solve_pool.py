@@ -0,0 +1,400 @@
+import numpy as np
+import multiprocessing
+import multiprocessing.connection
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Iterable, Iterator, Optional, Tuple
+from compiled_problem import CompiledProblem, CompiledSolution
+
+_problem: Optional[CompiledProblem] = None  # The problem each worker solves; set before the workers start.
+_solve_kwargs: Dict[str, Any] = {}
+
+def _solver_settings(solve_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The keyword arguments of `CompiledProblem.solve()` that select its solver (see `CompiledProblem.get_solver()`).
+    """
+    return {
+        k: v
+        for k, v in solve_kwargs.items()
+        if k in ["max_iter", "max_runtime", "verbose", "options", "backend"]
+    }
+
+
+def create_solvers(
+        problem: CompiledProblem,
+        solve_kwargs: Iterable[Dict[str, Any]],
+) -> None:
+    """
+    Creates (and caches, on `problem`) the solver that each of these sets of `CompiledProblem.solve()` keyword
+    arguments would use. Called before workers are forked, so that they inherit the solvers (which take several
+    seconds each to create) rather than each creating their own.
+    """
+    for kwargs in solve_kwargs:
+        problem.get_solver(**_solver_settings(kwargs))
+
+
+_breach_statuses = {  # `guarded_imap()` status : the `return_status` of the failed solution that stands in for it
+    "timed_out"      : "Timed_Out",
+    "memory_exceeded": "Memory_Limit_Exceeded",
+    "crashed"        : "Worker_Crashed",
+}
+
+
+def _initialize_worker(
+        problem_filename: Optional[str],
+        solve_kwargs: Dict[str, Any],
+) -> None:
+    global _problem, _solve_kwargs
+    if problem_filename is not None:  # With "forkserver", the problem is read from disk rather than inherited.
+        _problem = CompiledProblem.load(problem_filename)
+    _solve_kwargs = solve_kwargs
+
+
+def _solve_task(
+        task: Dict[str, Any],
+) -> CompiledSolution:
+    sol = _problem.solve(**{
+        **_solve_kwargs,
+        **task,
+    })
+    sol.outputs()  # Evaluate the outputs in the worker, so that the parent only has to unpickle them.
+    return sol
+
+
+def _rss(pid: int) -> float:
+    """
+    The resident set size of a process [bytes], from `/proc` (so, Linux only; elsewhere, 0).
+    """
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0.
+
+
+def _guarded_worker(
+        connection: multiprocessing.connection.Connection,
+        function: Callable,
+        initializer: Optional[Callable],
+        initargs: Tuple,
+) -> None:
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        index, task = message
+        try:
+            reply = (index, "ok", function(task))
+        except Exception as e:
+            reply = (index, "error", e)
+        try:
+            connection.send(reply)
+        except Exception as e:  # E.g., an unpicklable result
+            connection.send((index, "error", RuntimeError(f"Could not send the result back: {e!r}")))
+
+
+def guarded_imap(
+        function: Callable,
+        tasks: Iterable[Any],
+        n_workers: int = None,
+        timeout: float = None,
+        max_rss: float = None,
+        start_method: str = "fork",
+        initializer: Callable = None,
+        initargs: Tuple = (),
+        poll_interval: float = 0.5,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Like `multiprocessing.Pool.imap()`, but each task runs under a wall-clock timeout and an optional memory cap.
+
+    A worker whose task breaches either limit (or that dies, e.g. at the hands of the OS's out-of-memory killer) is
+    killed and replaced by a fresh one, and the task is reported as such; the other tasks, and the results already
+    returned, are unaffected.
+
+    Args:
+        function: The function to apply to each task. With "forkserver", it must be picklable.
+        tasks: An iterable of tasks.
+        n_workers: The number of worker processes. Defaults to the number of CPUs.
+        timeout: [Optional] The longest a task may run [sec].
+        max_rss: [Optional] The most memory (resident set size) a worker may use [bytes]. This includes what a forked
+            worker shares with the parent, such as an inherited problem. Only enforced on Linux.
+        start_method: How to start the workers: "fork" or "forkserver". See `SolvePool`.
+        initializer, initargs: [Optional] A function to call, with these arguments, in each worker when it starts.
+        poll_interval: How often the limits are checked [sec].
+
+    Returns: An iterator of (status, result) tuples, in the same order as `tasks`. The status is one of:
+        * "ok": The task returned; `result` is what it returned.
+        * "timed_out": The task exceeded `timeout`; `result` is None.
+        * "memory_exceeded": The worker exceeded `max_rss`; `result` is None.
+        * "crashed": The worker died; `result` is None.
+        If a task raises an exception, it is raised here, as with `multiprocessing.Pool`.
+    """
+    if n_workers is None:
+        n_workers = os.cpu_count()
+    context = multiprocessing.get_context(start_method)
+    pending = enumerate(tasks)
+    workers = []
+    results = {}
+    next_index = 0
+
+    def start_worker() -> Dict[str, Any]:
+        parent_connection, child_connection = context.Pipe()
+        process = context.Process(
+            target=_guarded_worker,
+            args=(child_connection, function, initializer, initargs),
+            daemon=True,
+        )
+        process.start()
+        child_connection.close()
+        return {"process": process, "connection": parent_connection, "index": None, "start": None}
+
+    def assign(worker: Dict[str, Any]) -> None:
+        try:
+            index, task = next(pending)
+        except StopIteration:
+            worker["index"] = None
+            return
+        worker["connection"].send((index, task))
+        worker["index"] = index
+        worker["start"] = time.perf_counter()
+
+    def replace(worker: Dict[str, Any], status: str) -> Dict[str, Any]:
+        results[worker["index"]] = (status, None)
+        worker["process"].kill()
+        worker["process"].join()
+        worker["connection"].close()
+        new_worker = start_worker()
+        assign(new_worker)
+        return new_worker
+
+    try:
+        for _ in range(n_workers):
+            worker = start_worker()
+            workers.append(worker)
+            assign(worker)
+
+        while any(worker["index"] is not None for worker in workers):
+            busy = [worker for worker in workers if worker["index"] is not None]
+            wait = poll_interval
+            if timeout is not None:
+                wait = min(wait, max(
+                    min(worker["start"] + timeout for worker in busy) - time.perf_counter(),
+                    0,
+                ))
+            ready = multiprocessing.connection.wait([worker["connection"] for worker in busy], timeout=wait)
+
+            for i, worker in enumerate(workers):
+                if worker["index"] is None:
+                    continue
+                if worker["connection"] in ready:
+                    try:
+                        index, status, value = worker["connection"].recv()
+                    except EOFError:  # The worker died.
+                        workers[i] = replace(worker, "crashed")
+                        continue
+                    if status == "error":
+                        raise value
+                    results[index] = (status, value)
+                    assign(worker)
+                elif timeout is not None and time.perf_counter() - worker["start"] > timeout:
+                    workers[i] = replace(worker, "timed_out")
+                elif max_rss is not None and _rss(worker["process"].pid) > max_rss:
+                    workers[i] = replace(worker, "memory_exceeded")
+                elif not worker["process"].is_alive():
+                    workers[i] = replace(worker, "crashed")
+
+            while next_index in results:
+                yield results.pop(next_index)
+                next_index += 1
+
+    finally:
+        for worker in workers:
+            if worker["index"] is None and worker["process"].is_alive():
+                try:
+                    worker["connection"].send(None)
+                except OSError:
+                    pass
+            else:
+                worker["process"].kill()
+        for worker in workers:
+            worker["process"].join(timeout=5)
+            if worker["process"].is_alive():
+                worker["process"].kill()
+                worker["process"].join()
+            worker["connection"].close()
+
+
+class SolvePool:
+    """
+    A pool of worker processes that solve one CompiledProblem at many parameter values.
+
+    The problem is built (or loaded) once, in the parent process, before the workers start. Workers inherit it rather
+    than rebuilding it, so each task costs only a solve:
+
+        >>> problem = get_compiled_problem(fuel_type="LH2")
+        >>> with SolvePool(problem, n_workers=32, verbose=False) as pool:
+        ...     sols = pool.map([{"mission_range": r * 1e3} for r in [3000, 6000, 9000]])
+        >>> converged = [sol for sol in sols if sol.stats()["success"]]
+
+    A task whose solve fails returns its failed solution (`behavior_on_failure="return_last"`, unless overridden), so
+    that one infeasible point does not abort the sweep; check `sol.stats()["success"]`.
+
+    Optionally, each task runs under a wall-clock timeout and a memory cap (`timeout`, `max_rss`), so that one
+    pathological point cannot stall a sweep. A worker that breaches either is killed and replaced, and its task returns
+    a failed solution (see `imap()`); the other tasks are unaffected.
+
+    Two start methods are supported:
+        * "fork": Workers are forked from the parent, and inherit the problem (and its solver, which takes several
+            seconds to create) through copy-on-write memory. This is the fastest way to start, and the default on
+            Linux and macOS.
+        * "forkserver": Workers are forked from a clean server process, which has imported CasADi and AeroSandbox
+            once (`set_forkserver_preload`). Each worker then loads the problem from a temporary file. Use this where
+            forking a parent with threads or open resources is unsafe.
+    """
+
+    def __init__(self,
+                 problem: CompiledProblem,
+                 n_workers: int = None,
+                 start_method: str = "fork",
+                 timeout: float = None,
+                 max_rss: float = None,
+                 **solve_kwargs,
+                 ):
+        """
+        Args:
+            problem: The CompiledProblem to solve.
+            n_workers: The number of worker processes. Defaults to the number of CPUs.
+            start_method: How to start the workers: "fork" or "forkserver". See the class docstring.
+            timeout: [Optional] The longest any one task may run [sec]. See `guarded_imap()`.
+            max_rss: [Optional] The most memory a worker may use [bytes]. See `guarded_imap()`.
+            **solve_kwargs: Any keyword arguments of `CompiledProblem.solve()` (e.g., `verbose`, `max_iter`,
+                `backend`), applied to every task. Tasks may override them. `behavior_on_failure` defaults to
+                "return_last" here, rather than "raise".
+        """
+        if n_workers is None:
+            n_workers = os.cpu_count()
+        if start_method not in ["fork", "forkserver"]:
+            raise ValueError("Bad value of `start_method`! Options: \"fork\", \"forkserver\"")
+
+        solve_kwargs = {
+            "behavior_on_failure": "return_last",
+            **solve_kwargs,
+        }
+
+        self.problem = problem
+        self.n_workers = n_workers
+        self.start_method = start_method
+        self.solve_kwargs = solve_kwargs
+        self.timeout = timeout
+        self.max_rss = max_rss
+        self._problem_filename = None
+
+        ### Create the solver in the parent, so that forked workers inherit it instead of each creating their own.
+        create_solvers(self.problem, [solve_kwargs])
+
+        context = multiprocessing.get_context(start_method)
+        if start_method == "fork":
+            global _problem
+            _problem = problem
+        else:
+            context.set_forkserver_preload(["casadi", "aerosandbox", "compiled_problem"])
+            with tempfile.NamedTemporaryFile(suffix=".pkl", delete=False) as f:
+                self._problem_filename = f.name
+            problem.save(self._problem_filename)
+
+        if timeout is None and max_rss is None:
+            self._pool = context.Pool(
+                processes=n_workers,
+                initializer=_initialize_worker,
+                initargs=(self._problem_filename, solve_kwargs),
+            )
+        else:  # Workers are started by `guarded_imap()`, for each call of `imap()`.
+            self._pool = None
+
+    def imap(self,
+             tasks: Iterable[Dict[str, Any]],
+             chunksize: int = 1,
+             ) -> Iterator[CompiledSolution]:
+        """
+        Solves each task in parallel, yielding solutions in the same order as `tasks`.
+
+        Args:
+            tasks: An iterable of tasks. Each task is either:
+                * A dictionary of {parameter name: value}, or
+                * A dictionary of keyword arguments to `CompiledProblem.solve()`, if it has a "parameter_values" key
+                    (e.g., `{"parameter_values": {...}, "x0": ...}`).
+            chunksize: The number of tasks sent to a worker at a time.
+
+        Returns: An iterator of CompiledSolutions, with `sol.problem` set to this pool's problem. A task that breaches
+        the pool's `timeout` or `max_rss` (or whose worker dies) returns a failed solution, with NaN decision
+        variables and a `return_status` of "Timed_Out", "Memory_Limit_Exceeded", or "Worker_Crashed".
+        """
+        tasks = [
+            task if "parameter_values" in task else {"parameter_values": task}
+            for task in tasks
+        ]
+        if self._pool is not None:
+            for sol in self._pool.imap(_solve_task, tasks, chunksize=chunksize):
+                sol.problem = self.problem
+                yield sol
+            return
+
+        if self.start_method == "fork":  # Workers are forked afresh; give them any solvers that tasks need.
+            create_solvers(self.problem, [{**self.solve_kwargs, **task} for task in tasks])
+
+        results = guarded_imap(
+            _solve_task,
+            tasks,
+            n_workers=self.n_workers,
+            timeout=self.timeout,
+            max_rss=self.max_rss,
+            start_method=self.start_method,
+            initializer=_initialize_worker,
+            initargs=(self._problem_filename, self.solve_kwargs),
+        )
+        for task, (status, sol) in zip(tasks, results):
+            if status != "ok":
+                sol = CompiledSolution(
+                    problem=self.problem,
+                    x=np.full(self.problem.n_variables, np.nan),
+                    p=self.problem.parameter_vector(task["parameter_values"]),
+                    f=np.nan,
+                    lam_g=np.full(self.problem.n_constraints, np.nan),
+                    stats={
+                        "success"      : False,
+                        "return_status": _breach_statuses[status],
+                        "iter_count"   : 0,
+                        "t_wall_total" : self.timeout if status == "timed_out" else np.nan,
+                    },
+                )
+            sol.problem = self.problem
+            yield sol
+
+    def map(self,
+            tasks: Iterable[Dict[str, Any]],
+            chunksize: int = 1,
+            ) -> List[CompiledSolution]:
+        """
+        Like `imap()`, but returns a list.
+        """
+        return list(self.imap(tasks, chunksize=chunksize))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+        if self._problem_filename is not None:
+            Path(self._problem_filename).unlink(missing_ok=True)
+            self._problem_filename = None
+
+    def __enter__(self) -> "SolvePool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is not None and self._pool is not None:
+            self._pool.terminate()
+        self.close()
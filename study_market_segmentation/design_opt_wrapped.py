@@ -4,12 +4,96 @@ from aerosandbox.library import aerodynamics as lib_aero
 from aerosandbox.library.weights import torenbeek_weights, raymer_cargo_transport_weights, raymer_miscellaneous
 from aerosandbox.tools import units as u
 import copy
+from pathlib import Path
 from typing import Union, Callable, Optional
+from compiled_problem import CompiledProblem, load_or_build
+
+##### Section: Fuel Properties
+fuel_properties = {
+    "LH2"     : dict(
+        fuel_tank_wall_thickness=0.0612,  # from Brewer, Hydrogen Aircraft Technology pg. 203
+        fuel_density=70,  # kg/m^3
+        fuel_specific_energy=119.93e6,  # J/kg; lower heating value due to liquid start
+        fuel_tank_fuel_mass_fraction=1 / (1 + 0.356),  # from Brewer, Hydrogen Aircraft Technology pg. 203
+        fuel_system_mass_multiplier=2.2,
+        fuel_placement="fuselage",
+    ),
+    "GH2"     : dict(
+        fuel_tank_wall_thickness=0.0612,  # from Brewer, Hydrogen Aircraft Technology pg. 203
+        fuel_density=42,  # kg/m^3
+        fuel_specific_energy=141.80e6,  # J/kg; higher heating value due to gas start
+        fuel_tank_fuel_mass_fraction=0.11,  # Eremenko
+        fuel_system_mass_multiplier=2.0,
+        fuel_placement="fuselage",
+    ),
+    "kerosene": dict(
+        fuel_tank_wall_thickness=0.005,
+        fuel_density=820,  # kg/m^3
+        fuel_specific_energy=43.02e6,  # J/kg
+        fuel_tank_fuel_mass_fraction=0.993,
+        fuel_system_mass_multiplier=1,
+        fuel_placement="wing",
+    ),
+}
+
+##### Section: Reference Engines
+# Size/weight estimates are relative to one of these
+reference_engines = {
+    "GE9X": dict(
+        thrust=110000 * u.lbf,
+        fan_diameter=134 * u.inch,
+        outer_diameter=163.7 * u.inch,
+        mass=21230 * u.lbm,
+        TSFC_lb_lb_hour=0.490  # lb/lb-hr
+    ),
+    "GE90": dict(
+        thrust=97300 * u.lbf,
+        fan_diameter=123 * u.inch,
+        outer_diameter=134 * u.inch,
+        mass=17400 * u.lbm,
+        TSFC_lb_lb_hour=0.520  # lb/lb-hr
+    ),
+}
+
+
+def get_parameter_values(
+        fuel_type: str = "LH2",
+        reference_engine: str = "GE9X",
+) -> dict:
+    """
+    The default values of every parameter of `get_problem()` for a given fuel type and reference engine, as
+    {parameter name: value}.
+
+    Problems built for different fuel types with the same fuel placement differ only in these values, so one built
+    problem can serve all of them.
+    """
+    if fuel_type not in fuel_properties:
+        raise ValueError("Bad value of `fuel_type`!")
+    if reference_engine not in reference_engines:
+        raise ValueError("Bad value of `reference_engine`!")
+
+    return {
+        "mission_range"       : 7500 * u.naut_mile,
+        "n_pax"               : 400,
+        "ultimate_load_factor": 1.5 * 2.5,
+        "CD_increment"        : 0.0060,  # Miscellaneous drag not captured by AeroBuildup
+        **{
+            k: v
+            for k, v in fuel_properties[fuel_type].items()
+            if k != "fuel_placement"
+        },
+        **{
+            f"ref_engine.{k}": v
+            for k, v in reference_engines[reference_engine].items()
+        },
+    }
+
 
 ##### Section: Initialize Optimization
 
 def get_problem(
         fuel_type: str = "LH2",
+        reference_engine: str = "GE9X",
 ):
 
     opti = asb.Opti(
@@ -17,39 +101,27 @@ def get_problem(
     )
 
     ##### Section: Parameters
+    # Everything that a sweep might vary is an `opti.parameter`, so that one built problem serves every sweep point.
+    # This changes IPOPT's path (round-off in `fuel_tank_fuel_mass_fraction` and `ref_engine.thrust` terms, which
+    # CasADi no longer folds into constants), but not the optimum. Near the edge of closure, the iteration count can
+    # move either way: GH2 at 3750 nmi takes 467 iterations (97 with the constants inlined), at 3500 nmi 81 (297).
+    # `benchmarks/benchmark_build_once.py` tracks these counts for every fuel type.
+    parameter_values = get_parameter_values(
+        fuel_type=fuel_type,
+        reference_engine=reference_engine,
+    )
 
-    mission_range = opti.parameter(7500 * u.naut_mile)
+    mission_range = opti.parameter(parameter_values["mission_range"])
     # mission_range = opti.variable(init_guess=2500 * u.naut_mile)
-    n_pax = 400
-
-    # fuel_type = "kerosene"
-    # fuel_type = "LH2"
-    # fuel_type = "GH2"
-
-    reference_engine = "GE9X"
-    # reference_engine = "GE90"
+    n_pax = opti.parameter(parameter_values["n_pax"])
 
     ##### Section: Fuel Properties
-    if fuel_type == "LH2":
-        fuel_tank_wall_thickness = 0.0612  # from Brewer, Hydrogen Aircraft Technology pg. 203
-        fuel_density = 70  # kg/m^3
-        fuel_specific_energy = 119.93e6  # J/kg; lower heating value due to liquid start
-        fuel_tank_fuel_mass_fraction = opti.parameter(1 / (1 + 0.356))  # from Brewer, Hydrogen Aircraft Technology pg. 203
-        fuel_placement = "fuselage"
-    elif fuel_type == "GH2":
-        fuel_tank_wall_thickness = 0.0612  # from Brewer, Hydrogen Aircraft Technology pg. 203
-        fuel_density = 42  # kg/m^3
-        fuel_specific_energy = 141.80e6  # J/kg; higher heating value due to gas start
-        fuel_tank_fuel_mass_fraction = 0.11  # Eremenko
-        fuel_placement = "fuselage"
-    elif fuel_type == "kerosene":
-        fuel_tank_wall_thickness = 0.005
-        fuel_density = 820  # kg/m^3
-        fuel_specific_energy = 43.02e6  # J/kg
-        fuel_tank_fuel_mass_fraction = 0.993
-        fuel_placement = "wing"
-    else:
-        raise ValueError("Bad value of `fuel_type`!")
+    fuel_tank_wall_thickness = opti.parameter(parameter_values["fuel_tank_wall_thickness"])
+    fuel_density = opti.parameter(parameter_values["fuel_density"])
+    fuel_specific_energy = opti.parameter(parameter_values["fuel_specific_energy"])
+    fuel_tank_fuel_mass_fraction = opti.parameter(parameter_values["fuel_tank_fuel_mass_fraction"])
+    fuel_system_mass_multiplier = opti.parameter(parameter_values["fuel_system_mass_multiplier"])
+    fuel_placement = fuel_properties[fuel_type]["fuel_placement"]
 
     ##### Section: Vehicle Definition
 
@@ -557,7 +629,7 @@ def get_problem(
         # freeze=True
     )
 
-    ultimate_load_factor = 1.5 * 2.5
+    ultimate_load_factor = opti.parameter(parameter_values["ultimate_load_factor"])
 
     n_engines = 2
 
@@ -708,15 +780,6 @@ def get_problem(
     # Fuel system (lines, pumps) mass
     fuel_volume = fuel_tank_interior_volume
 
-    if fuel_type == "kerosene":
-        fuel_system_mass_multiplier = 1
-    elif fuel_type == "LH2":
-        fuel_system_mass_multiplier = 2.2
-    elif fuel_type == "GH2":
-        fuel_system_mass_multiplier = 2.0
-    else:
-        raise ValueError("Bad value of `fuel_type`!")
-
     mass_props["fuel_system"] = asb.mass_properties_from_radius_of_gyration(
         mass=(
                      2.405 *
@@ -855,25 +918,11 @@ def get_problem(
 
     # Engine mass
 
-    # Size/weight estimates relative to a GE9X
-    if reference_engine == "GE9X":
-        ref_engine = dict(
-            thrust=110000 * u.lbf,
-            fan_diameter=134 * u.inch,
-            outer_diameter=163.7 * u.inch,
-            mass=21230 * u.lbm,
-            TSFC_lb_lb_hour=0.490  # lb/lb-hr
-        )
-    elif reference_engine == "GE90":
-        ref_engine = dict(
-            thrust=97300 * u.lbf,
-            fan_diameter=123 * u.inch,
-            outer_diameter=134 * u.inch,
-            mass=17400 * u.lbm,
-            TSFC_lb_lb_hour=0.520  # lb/lb-hr
-        )
-    else:
-        raise ValueError("Bad value of `reference_engine`!")
+    # Size/weight estimates relative to a reference engine (see `reference_engines`)
+    ref_engine = {
+        k: opti.parameter(parameter_values[f"ref_engine.{k}"])
+        for k in reference_engines[reference_engine].keys()
+    }
 
     ref_engine["Isp"] = 3600 / ref_engine["TSFC_lb_lb_hour"]
 
@@ -1106,7 +1155,8 @@ def get_problem(
         xyz_ref=mass_props_half_fuel.xyz_cg
     ).run_with_stability_derivatives()
 
-    aero["D"] = aero["D"] + 0.0060 * airplane.s_ref * dyn.op_point.dynamic_pressure()
+    CD_increment = opti.parameter(parameter_values["CD_increment"])
+    aero["D"] = aero["D"] + CD_increment * airplane.s_ref * dyn.op_point.dynamic_pressure()
     aero["CD"] = aero["D"] / dyn.op_point.dynamic_pressure() / airplane.s_ref
 
     opti.subject_to([
@@ -1175,4 +1225,102 @@ def get_problem(
         vstab.aspect_ratio() < 2  # Needs to be imposed due to bad Raymer mass model for tails
     ])
 
-    return locals()
\ No newline at end of file
+    return locals()
+
+
+def get_outputs(vars: dict) -> dict:
+    """
+    The named quantities that are kept on a compiled problem, given the `locals()` returned by `get_problem()`.
+    """
+    outputs = {
+        k: vars[k]
+        for k in [
+            "flight_range",
+            "transport_efficiency_MJ_per_seat_km",
+            "design_mass_TOGW",
+            "LD_cruise",
+            "V_cruise",
+            "Isp",
+            "mach_cruise",
+            "altitude_cruise",
+            "fuselage_cabin_diameter",
+            "wing_span",
+            "fuel_specific_energy",
+            "n_pax",
+        ]
+    }
+    outputs["mass_props_TOGW.mass"] = vars["mass_props_TOGW"].mass
+    outputs["mass_props_empty.mass"] = vars["mass_props_empty"].mass
+    for k, v in vars["mass_props"].items():
+        outputs[f"mass_props.{k}.mass"] = v.mass
+        outputs[f"mass_props.{k}.x_cg"] = v.x_cg
+
+    return outputs
+
+
+def compile_problem(
+        fuel_type: str = "LH2",
+) -> CompiledProblem:
+    """
+    Builds the problem from `get_problem()` and compiles it into a CompiledProblem, with every parameter named as in
+    `get_parameter_values()`.
+    """
+    vars = get_problem(fuel_type=fuel_type)
+
+    parameters = {}
+    for name in get_parameter_values(fuel_type=fuel_type).keys():
+        if name.startswith("ref_engine."):
+            parameters[name] = vars["ref_engine"][name[len("ref_engine."):]]
+        else:
+            parameters[name] = vars[name]
+
+    return CompiledProblem.from_opti(
+        opti=vars["opti"],
+        parameters=parameters,
+        outputs=get_outputs(vars),
+    )
+
+
+polar_cache_files = [
+    Path("cache") / "b737c.json",
+    Path("cache") / "naca0012.json",
+    Path("cache") / "naca0008.json",
+]
+
+_compiled_problems = {}  # fuel placement : CompiledProblem
+
+
+def get_compiled_problem(
+        fuel_type: str = "LH2",
+        reference_engine: str = "GE9X",
+        verbose: bool = False,
+) -> CompiledProblem:
+    """
+    Returns the CompiledProblem for a given fuel type, with its default parameter values set from
+    `get_parameter_values()`.
+
+    Fuel types with the same fuel placement share one built problem. It is built at most once per process, and is
+    loaded from the on-disk cache (`cache/nlp/`) when the model source and the polar caches are unchanged since it was
+    last built.
+    """
+    fuel_placement = fuel_properties[fuel_type]["fuel_placement"]
+
+    if fuel_placement not in _compiled_problems:
+        _compiled_problems[fuel_placement] = load_or_build(
+            build=lambda: compile_problem(fuel_type=fuel_type),
+            source_files=[Path(__file__)] + [
+                f for f in polar_cache_files
+                if f.exists()
+            ],
+            verbose=verbose,
+            fuel_placement=fuel_placement,
+        )
+
+    problem = copy.copy(_compiled_problems[fuel_placement])
+    problem.p0 = problem.parameter_vector(
+        get_parameter_values(
+            fuel_type=fuel_type,
+            reference_engine=reference_engine,
+        )
+    )
+    return problem
@@ -0,0 +1,229 @@
+import aerosandbox.numpy as np
+from aerosandbox.tools import units as u
+from pathlib import Path
+from typing import Dict, List, Tuple
+import design_opt_wrapped
+from design_opt_wrapped import get_compiled_problem, get_parameter_values, polar_cache_files
+from compiled_problem import CompiledSolution, problem_hash
+from warm_start import WarmStartDatabase
+from robust_solve import robust_solve
+from solve_pool import create_solvers, guarded_imap
+from telemetry import TelemetryLog
+from results_store import ResultsStore
+from sweep_checkpoint import SweepCheckpoint
+import payload_range
+from payload_range import design_record, market_coverage
+
+
+def get_market_coverage(
+        fuel_type="kerosene",
+        design_range=7500 * u.naut_mile,
+        backend="mx",
+        verbose=True,
+        warm_starts: WarmStartDatabase = None,
+        telemetry: TelemetryLog = None,
+        results_store: ResultsStore = None,
+        robust: bool = True,
+):
+    print(f"{fuel_type}, {design_range / u.naut_mile} nmi")
+
+    problem = get_compiled_problem(
+        fuel_type=fuel_type,
+    )
+    if robust:  # Retries failed solves; see `robust_solve()`.
+        solve = lambda **kwargs: robust_solve(problem, database=warm_starts, **kwargs)
+    elif warm_starts is not None:
+        solve = lambda **kwargs: warm_starts.solve(problem, **kwargs)
+    else:
+        solve = problem.solve
+    sol = solve(
+        parameter_values={
+            "mission_range": design_range
+        },
+        backend=backend,
+        verbose=verbose,
+        telemetry=telemetry,
+        results_store=results_store,
+    )
+
+    return market_coverage_from_solution(sol)
+
+
+def market_coverage_from_solution(
+        sol: CompiledSolution,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the payload-range (market coverage) curve of a solved design: transport efficiency at full payload up to
+    the design range, then with passengers offloaded beyond it. For many designs at once, use
+    `payload_range.market_coverage()` on their records directly.
+
+    Returns: A tuple of (flight ranges [m], transport efficiencies [MJ/seat-km]).
+    """
+    flight_ranges, transport_efficiencies = market_coverage(design_record(sol))
+    return flight_ranges[0], transport_efficiencies[0]
+
+
+def checkpoint_name(fuel_type: str, design_range: float) -> str:
+    """
+    The name of a (fuel type, design range) point in a SweepCheckpoint.
+    """
+    return f"{fuel_type}_{float(design_range)!r}m"
+
+
+def checkpoint_key(fuel_type: str, design_range: float) -> str:
+    """
+    The key of a (fuel type, design range) point in a SweepCheckpoint: a hash of everything its result depends on (the
+    model, the market-coverage post-processing in this file and in `payload_range`, the polar caches, and the fuel
+    type's parameter values), so that editing any of them invalidates the point.
+    """
+    return problem_hash(
+        source_files=[Path(design_opt_wrapped.__file__), Path(__file__), Path(payload_range.__file__)] + [
+            f for f in polar_cache_files
+            if f.exists()
+        ],
+        fuel_type=fuel_type,
+        design_range=float(design_range),
+        parameter_values=get_parameter_values(fuel_type=fuel_type),
+    )
+
+
+def _get_market_coverage_task(args):
+    fuel_type, design_range, backend, warm_starts, telemetry, results_store, robust, checkpoint = args
+    flight_ranges, transport_efficiencies = get_market_coverage(
+        fuel_type=fuel_type,
+        design_range=design_range,
+        backend=backend,
+        verbose=False,
+        warm_starts=warm_starts,
+        telemetry=telemetry,
+        results_store=results_store,
+        robust=robust,
+    )
+    if checkpoint is not None:  # Saved by the worker, as soon as the point completes.
+        checkpoint.save(
+            checkpoint_name(fuel_type, design_range),
+            key=checkpoint_key(fuel_type, design_range),
+            flight_ranges=flight_ranges,
+            transport_efficiencies=transport_efficiencies,
+        )
+    return flight_ranges, transport_efficiencies
+
+
+def get_market_coverage_grid(
+        fuel_types: List[str],
+        design_ranges: np.ndarray,
+        n_workers: int = None,
+        backend: str = "mx",
+        warm_starts: WarmStartDatabase = None,
+        telemetry: TelemetryLog = None,
+        results_store: ResultsStore = None,
+        robust: bool = True,
+        timeout: float = None,
+        max_rss: float = None,
+        checkpoint: SweepCheckpoint = None,
+) -> Dict[str, Dict[float, Tuple[np.ndarray, np.ndarray]]]:
+    """
+    Computes `get_market_coverage()` for every (fuel type, design range) pair, in parallel.
+
+    With a `checkpoint`, each point is saved as soon as it completes, and points already saved (and still valid; see
+    `checkpoint_key()`) are loaded rather than computed, so an interrupted sweep resumes where it left off.
+
+    The problems (one per fuel placement) and their solvers are loaded in this process before the workers are forked
+    (by `guarded_imap()`), so workers inherit them instead of rebuilding them. Every point runs the same code as a
+    serial call to `get_market_coverage()`, so the results are identical to the serial ones, and are returned in the
+    same order.
+
+    Points are independent solves, rather than a `continuation()` in design range: continuation would serialize each
+    fuel type's points (and their checkpoints), and on a grid this coarse, its one-off KKT build outweighs the
+    iterations it saves (see `benchmarks/benchmark_continuation.py`).
+
+    Args:
+        fuel_types: The fuel types to sweep over.
+        design_ranges: The design ranges [m] to sweep over.
+        n_workers: The number of worker processes. Defaults to the number of CPUs. If 1, runs serially, in this
+            process.
+        backend: The NLP evaluation backend; see `CompiledProblem.nlpsol()`.
+        warm_starts: [Optional] A WarmStartDatabase to seed each solve from, and to store the results in. With
+            several workers, which stored solutions a point sees depends on timing, so results may differ from the
+            serial ones within the solver tolerance.
+        telemetry: [Optional] A TelemetryLog to record every solve to. Workers append to the same file.
+        results_store: [Optional] A ResultsStore to append every solve to. Workers append to the same store.
+        robust: If True, failed solves are retried (`robust_solve()`), drawing neighbours from `warm_starts`.
+        timeout: [Optional] The longest any one point may run [sec], retries included. If this or `max_rss` is
+            given, points run in workers that are killed if they breach either (see `guarded_imap()`), even with one
+            worker; such points are reported, and left out of the results, as are points whose worker dies.
+        max_rss: [Optional] The most memory a worker may use [bytes].
+        checkpoint: [Optional] A SweepCheckpoint to resume from, and to save each point to.
+
+    Returns: A nested dictionary of {fuel type: {design range: (flight ranges, transport efficiencies)}}, as
+    returned by `get_market_coverage()`.
+    """
+    checkpointed = {} if checkpoint is None else load_market_coverage_grid(fuel_types, design_ranges, checkpoint)
+    tasks = [
+        (fuel_type, design_range, backend, warm_starts, telemetry, results_store, robust, checkpoint)
+        for fuel_type in fuel_types
+        for design_range in design_ranges
+        if design_range not in checkpointed.get(fuel_type, {})
+    ]
+
+    guarded = timeout is not None or max_rss is not None
+    if len(tasks) == 0:
+        results = []
+    elif n_workers == 1 and not guarded:
+        results = [("ok", _get_market_coverage_task(task)) for task in tasks]
+    else:
+        for fuel_type in fuel_types:
+            create_solvers(get_compiled_problem(fuel_type=fuel_type), [{"verbose": False, "backend": backend}])
+
+        results = list(guarded_imap(
+            _get_market_coverage_task,
+            tasks,
+            n_workers=n_workers,
+            timeout=timeout,
+            max_rss=max_rss,
+        ))
+
+    computed = {}
+    for (fuel_type, design_range, *_), (status, result) in zip(tasks, results):
+        if status == "ok":
+            computed[(fuel_type, design_range)] = result
+        else:
+            print(f"{fuel_type}, {design_range / u.naut_mile} nmi: {status.replace('_', ' ')}; skipped.")
+
+    data = {fuel_type: {} for fuel_type in fuel_types}
+    for fuel_type in fuel_types:
+        for design_range in design_ranges:
+            if design_range in checkpointed.get(fuel_type, {}):
+                data[fuel_type][design_range] = checkpointed[fuel_type][design_range]
+            elif (fuel_type, design_range) in computed:
+                data[fuel_type][design_range] = computed[(fuel_type, design_range)]
+    return data
+
+
+def load_market_coverage_grid(
+        fuel_types: List[str],
+        design_ranges: np.ndarray,
+        checkpoint: SweepCheckpoint,
+        include_stale: bool = False,
+) -> Dict[str, Dict[float, Tuple[np.ndarray, np.ndarray]]]:
+    """
+    Loads the points of `get_market_coverage_grid()` from a checkpoint, without solving anything.
+
+    Args:
+        fuel_types: The fuel types of the sweep.
+        design_ranges: The design ranges [m] of the sweep.
+        checkpoint: The SweepCheckpoint the sweep saved to.
+        include_stale: If True, points saved before a change to the model (see `checkpoint_key()`) are loaded too.
+
+    Returns: A nested dictionary, as from `get_market_coverage_grid()`, of the points found.
+    """
+    data = {fuel_type: {} for fuel_type in fuel_types}
+    for fuel_type in fuel_types:
+        for design_range in design_ranges:
+            point = checkpoint.load(
+                checkpoint_name(fuel_type, design_range),
+                key=None if include_stale else checkpoint_key(fuel_type, design_range),
+            )
+            if point is not None:
+                data[fuel_type][design_range] = (point["flight_ranges"], point["transport_efficiencies"])
+    return data
@@ -0,0 +1,64 @@
+import aerosandbox as asb
+import aerosandbox.numpy as np
+from aerosandbox.tools import units as u
+from market_coverage import get_market_coverage_grid
+from sweep_checkpoint import SweepCheckpoint
+from fleet_mix import fleet_mix
+
+fuel_types = ["kerosene", "LH2"]
+candidate_design_ranges = np.array([2000, 2750, 3750, 4500, 5500, 6500, 7500]) * u.naut_mile
+max_n_designs = 4
+n_workers = None  # Worker processes for the design solves; None uses every CPU, and 1 runs serially.
+timeout = 600  # [sec] per design; a design that takes longer is left out of the candidates.
+
+### An illustrative route-length distribution (not airline data): log-normal, with a median of 1000 nmi.
+route_lengths = np.linspace(125, 7375, 30) * u.naut_mile  # Bin centers
+demand = np.exp(-np.log(route_lengths / (1000 * u.naut_mile)) ** 2 / (2 * 0.8 ** 2)) / route_lengths
+demand = demand / np.sum(demand) * 1e9  # [seats flown per year]
+
+### Candidate designs. Those already in the market-segmentation checkpoint are loaded; the rest are solved, in
+# parallel, and saved to it.
+data = get_market_coverage_grid(
+    fuel_types=fuel_types,
+    design_ranges=candidate_design_ranges,
+    n_workers=n_workers,
+    timeout=timeout,
+    checkpoint=SweepCheckpoint("cache/market_coverage"),
+)
+
+fleets = {}
+for name, allowed_fuel_types in {
+    "kerosene"        : ["kerosene"],
+    "LH2"             : ["LH2"],
+    "kerosene and LH2": ["kerosene", "LH2"],
+}.items():
+    curves = {
+        f"{fuel_type}, {design_range / u.naut_mile:.0f} nmi": data[fuel_type][design_range]
+        for fuel_type in allowed_fuel_types
+        for design_range in data[fuel_type]
+    }
+    try:
+        fleets[name] = fleet_mix(route_lengths, demand, curves, n_designs=max_n_designs)
+    except ValueError as e:  # E.g., no candidate reaches the longest routes.
+        print(f"{name}: {e}")
+        continue
+    print(f"\nBest fleet of up to {max_n_designs} {name} designs:")
+    print(fleets[name].report())
+
+import matplotlib.pyplot as plt
+import aerosandbox.tools.pretty_plots as p
+
+fig, ax = plt.subplots(figsize=(5, 4))
+for name, fleet in fleets.items():
+    plt.plot(
+        np.arange(1, max_n_designs + 1),
+        fleet.energies_by_n_designs / 1e9,
+        ".-",
+        label=name,
+    )
+plt.xticks(np.arange(1, max_n_designs + 1))
+p.show_plot(
+    "Fleet Energy vs. Number of Designs",
+    "Number of Designs in Fleet",
+    "Total Energy [PJ / year]",
+)
@@ -1,99 +1,40 @@
 import aerosandbox as asb
 import aerosandbox.numpy as np
 from aerosandbox.tools import units as u
-from design_opt_wrapped import get_problem
-
-
-def get_market_coverage(
-        fuel_type="kerosene",
-        design_range=7500 * u.naut_mile
-):
-    print(f"{fuel_type}, {design_range / u.naut_mile} nmi")
-
-    vars = get_problem(
-        fuel_type=fuel_type,
-    )
-    opti: asb.Opti = vars["opti"]
-    sol = opti.solve(
-        parameter_mapping={
-            vars["mission_range"]: design_range
-        }
-    )
-
-    mass_props = sol(vars["mass_props"])
-    mass_props_empty = sol(vars["mass_props_empty"])
-
-    ##### Get the market coverage
-
-    empty_weight = mass_props_empty.mass
-    total_pax_weight = mass_props["passengers"].mass
-    total_fuel_weight = mass_props["fuel"].mass
-
-    ### First, full pax load until the design range
-    fuel_frac = np.linspace(1e-3, 1, 100)
-    fuel_weights = total_fuel_weight * fuel_frac
-
-    flight_ranges_sub = sol(
-        vars["V_cruise"] *
-        vars["LD_cruise"] *
-        vars["Isp"] *
-        np.log(
-            (empty_weight + total_pax_weight + fuel_weights) /
-            (empty_weight + total_pax_weight)
-        )
-    )
-
-    transport_efficiencies_sub = sol(
-        fuel_weights * vars["fuel_specific_energy"] / (
-                vars["n_pax"] * flight_ranges_sub
-        ) / (1e6 / 1e3)
-    )
-
-    ### Then, beyond the design range, start unloading pax
-    pax_frac = np.linspace(1e-3, 1, 100)[::-1]
-    pax_weights = total_pax_weight * pax_frac
-
-    flight_ranges_sup = sol(
-        vars["V_cruise"] *
-        vars["LD_cruise"] *
-        vars["Isp"] *
-        np.log(
-            (empty_weight + pax_weights + total_fuel_weight) /
-            (empty_weight + pax_weights)
-        )
-    )
-
-    transport_efficiencies_sup = sol(
-        total_fuel_weight * vars["fuel_specific_energy"] / (
-                pax_frac * vars["n_pax"] * flight_ranges_sup
-        ) / (1e6 / 1e3)
-    )
-
-    ### Merge
-    flight_ranges = np.concatenate(
-        [flight_ranges_sub, flight_ranges_sup]
-    )
-    transport_efficiencies = np.concatenate(
-        [transport_efficiencies_sub, transport_efficiencies_sup]
-    )
-
-    return flight_ranges, transport_efficiencies
-
+from market_coverage import get_market_coverage_grid, load_market_coverage_grid
+from sweep_checkpoint import SweepCheckpoint
+from telemetry import TelemetryLog
+from market_envelope import market_coverage_envelope
+from results_store import ResultsStore
 
 fuel_types = ["kerosene", "LH2"]
 design_ranges = np.array([2000, 3750, 5500, 7500]) * u.naut_mile
-
-if "data" not in locals():
-    data = {
-        fuel_type: {
-            design_range: get_market_coverage(
-                fuel_type=fuel_type,
-                design_range=design_range
-            )
-            for design_range in design_ranges
-        }
-        for fuel_type in fuel_types
-    }
+n_workers = None  # Worker processes for the sweep; None uses every CPU, and 1 runs serially.
+timeout = 600  # [sec] per point; a point that takes longer is skipped, so that it cannot stall the sweep.
+max_rss = None  # [bytes] per worker; e.g., 8e9.
+plot_only = False  # If True, plots whatever the checkpoint holds, without solving anything.
+plot_envelope = False  # If True, overlays (and prints) the best design at each range, across every design computed.
+
+### Each completed point is saved to the checkpoint, so a re-run only computes missing (or invalidated) points.
+checkpoint = SweepCheckpoint("cache/market_coverage")
+if plot_only:
+    data = load_market_coverage_grid(
+        fuel_types=fuel_types,
+        design_ranges=design_ranges,
+        checkpoint=checkpoint,
+        include_stale=True,
+    )
+else:
+    data = get_market_coverage_grid(
+        fuel_types=fuel_types,
+        design_ranges=design_ranges,
+        n_workers=n_workers,
+        timeout=timeout,
+        max_rss=max_rss,
+        telemetry=TelemetryLog("cache/telemetry.jsonl", study="market_segmentation"),
+        results_store=ResultsStore("cache/results", study="market_segmentation"),
+        checkpoint=checkpoint,
+    )
 
 import matplotlib.pyplot as plt
 import aerosandbox.tools.pretty_plots as p
@@ -117,6 +58,10 @@ to_plot = [
 ]
 
 for fuel_type, design_range in to_plot:
+    if design_range not in data[fuel_type]:  # Not (yet) computed, or skipped
+        print(f"No result for {fuel_type}, {design_range / u.naut_mile} nmi; not plotted.")
+        continue
+
     color = p.adjust_lightness(
             color=kerosene_color if fuel_type == "kerosene" else lh2_color,
             amount=(design_range / (5000 * u.naut_mile)) ** -0.5 - 0.2
@@ -163,6 +108,28 @@ for fuel_type, design_range in to_plot:
                     fontsize=11,
                 )
 
+### The best transport energy achievable at each range, by any design computed (not only those plotted above).
+if plot_envelope:
+    envelope = market_coverage_envelope(data, range_grid=np.linspace(0, 10000, 1001) * u.naut_mile)
+    plt.plot(
+        envelope.range_grid / u.naut_mile,
+        envelope.values,
+        "--",
+        color="k",
+        alpha=0.6,
+        linewidth=1,
+        zorder=5,
+        label="Best of all designs",
+    )
+    print("Best design by range:")
+    for segment in envelope.segments():
+        if segment["label"] is not None:
+            fuel_type, design_range = segment["label"]
+            print(
+                f"{segment['range_start'] / u.naut_mile:7.0f} - {segment['range_end'] / u.naut_mile:7.0f} nmi: "
+                f"{fuel_type}, {design_range / u.naut_mile:.0f} nmi design"
+            )
+
 plt.xlim(0, 10000)
 plt.ylim(0, 1.25)
 p.set_ticks(2500, 500, 0.25, 0.05)
@@ -0,0 +1,83 @@
+import numpy as np
+import os
+import re
+from pathlib import Path
+from typing import Union, Dict, List, Optional
+
+
+class SweepCheckpoint:
+    """
+    An on-disk store of the completed points of a sweep, so that an interrupted sweep can be resumed, and its results
+    plotted, without solving anything again.
+
+    Each point is one small `.npz` file of named arrays, written atomically as soon as the point completes, so a crash
+    loses at most the points in progress, and many worker processes can write to one checkpoint. Each point is saved
+    with a key - typically a hash of everything its result depends on (e.g., `compiled_problem.problem_hash()`) - and
+    a point whose key no longer matches is treated as missing:
+
+        >>> checkpoint = SweepCheckpoint("cache/market_coverage")
+        >>> if checkpoint.load("LH2_5500nmi", key=key) is None:
+        >>>     checkpoint.save("LH2_5500nmi", key=key, flight_ranges=..., transport_efficiencies=...)
+    """
+
+    def __init__(self,
+                 directory: Union[str, Path],
+                 ):
+        self.directory = Path(directory)
+
+    def filename(self, name: str) -> Path:
+        return self.directory / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}.npz"
+
+    def save(self,
+             name: str,
+             key: str = "",
+             **arrays: np.ndarray,
+             ) -> None:
+        """
+        Saves the result of a point, as named arrays. The write is atomic.
+        """
+        filename = self.filename(name)
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        tmp_filename = filename.with_name(f"{filename.stem}.{os.getpid()}.tmp.npz")
+        np.savez(
+            tmp_filename,
+            _key=np.array(key),
+            **arrays,
+        )
+        os.replace(tmp_filename, filename)
+
+    def load(self,
+             name: str,
+             key: str = None,
+             ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Loads the result of a point, as a dictionary of its named arrays.
+
+        Args:
+            name: The name of the point.
+            key: [Optional] The key the point must have been saved with. If None, any saved point is returned.
+
+        Returns: The arrays, or None if the point is missing, unreadable, or saved with a different key.
+        """
+        filename = self.filename(name)
+        if not filename.exists():
+            return None
+        try:
+            with np.load(filename) as data:
+                if key is not None and str(data["_key"]) != key:
+                    return None
+                return {k: data[k] for k in data.files if k != "_key"}
+        except Exception:  # A corrupt point (e.g., from a full disk) is just a missing one.
+            return None
+
+    def names(self) -> List[str]:
+        """
+        Returns the (file-safe) names of all saved points.
+        """
+        return sorted(
+            f.stem for f in self.directory.glob("*.npz")
+            if not f.name.endswith(".tmp.npz")
+        )
+
+    def __len__(self) -> int:
+        return len(self.names())
@@ -0,0 +1,206 @@
+import numpy as np
+import json
+import os
+import time
+from pathlib import Path
+from typing import Union, Dict, List, Any
+from compiled_problem import callback_timings
+
+iteration_fields = [
+    "obj",  # Objective value
+    "inf_pr",  # Primal infeasibility
+    "inf_du",  # Dual infeasibility
+    "mu",  # Barrier parameter
+    "d_norm",  # Size of the primal step (before the line search)
+    "alpha_pr",  # Step size taken in the primal variables
+    "alpha_du",  # Step size taken in the dual variables
+    "regularization_size",  # Hessian regularization added by IPOPT
+]
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _to_json(v) for k, v in value.items()}
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        return [_to_json(v) for v in value]
+    elif isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    elif isinstance(value, (int, np.integer)):
+        return int(value)
+    elif isinstance(value, (float, np.floating)):
+        return float(value)
+    else:
+        return value
+
+
+def solve_record(
+        sol: Any,
+        t_wall_total: float = None,
+        **metadata,
+) -> Dict[str, Any]:
+    """
+    Builds the telemetry record of one solve, from IPOPT's own bookkeeping in the solver stats (so nothing is scraped
+    from the console log, and the solve need not be verbose).
+
+    Args:
+        sol: A solved CompiledSolution, or an `asb.OptiSol` (anything with a `stats()` method).
+        t_wall_total: [Optional] The wall time of the solve [sec], as measured by the caller. Only needed where the
+            stats lack it: a CompiledSolution has it, but an `asb.OptiSol` does not.
+        **metadata: Any other JSON-serializable fields to record (e.g., `study="market_segmentation"`).
+
+    Returns: A dictionary with keys:
+        * "timestamp", "pid": When, and in which process, the record was made.
+        * "problem", "backend", "parameters": For a CompiledSolution, the problem's `graph_hash()`, the evaluation
+            backend, and the value of every parameter, so that records from a sweep can be told apart.
+        * "success", "return_status", "iter_count": As in the solver stats.
+        * "t_wall_total": The wall time of the solve [sec].
+        * "callbacks": The cumulative time in each NLP callback, as returned by `callback_timings()`.
+        * "t_wall_callbacks": The total wall time in the NLP callbacks [sec].
+        * "t_wall_solver": The rest of the solve's wall time [sec] - the time IPOPT spends in itself, nearly all of
+            which is the linear solver (factorizing the KKT matrix).
+        * "iterations": The per-iteration history, as {field: list of values}, for each of `iteration_fields`.
+        * Any `metadata`.
+    """
+    stats = sol.stats()
+    timings = callback_timings(stats)
+    callbacks = {k: v for k, v in timings.items() if k != "total"}
+    if t_wall_total is None:
+        t_wall_total = stats.get("t_wall_total", timings.get("total", {}).get("t_wall", np.nan))
+    t_wall_callbacks = sum(v["t_wall"] for v in callbacks.values())
+
+    record = {
+        "timestamp": time.time(),
+        "pid"      : os.getpid(),
+    }
+    problem = getattr(sol, "problem", None)
+    if problem is not None:
+        record["problem"] = problem.graph_hash()
+        record["backend"] = stats.get("backend")
+        record["parameters"] = dict(zip(problem.parameter_names, sol.p))
+    record.update({
+        "success"         : stats.get("success"),
+        "return_status"   : stats.get("return_status"),
+        "iter_count"      : stats.get("iter_count"),
+        "t_wall_total"    : t_wall_total,
+        "callbacks"       : callbacks,
+        "t_wall_callbacks": t_wall_callbacks,
+        "t_wall_solver"   : t_wall_total - t_wall_callbacks,
+        "iterations"      : {
+            k: v
+            for k, v in stats.get("iterations", {}).items()
+            if k in iteration_fields
+        },
+        **metadata,
+    })
+    return _to_json(record)
+
+
+class TelemetryLog:
+    """
+    A JSON Lines file of solve telemetry, one record (see `solve_record()`) per line.
+
+    Pass one as the `telemetry` argument of `CompiledProblem.solve()` to record every solve, including failed ones.
+    Since `solve()` passes it through, this also works for anything that forwards solve arguments - `SolvePool`,
+    `continuation()`, `WarmStartDatabase.solve()`, and the sweeps built on them:
+
+        >>> telemetry = TelemetryLog("cache/telemetry.jsonl")
+        >>> with SolvePool(problem, telemetry=telemetry) as pool:
+        >>>     sols = pool.map(tasks)
+        >>> iterations_table(telemetry.read())
+
+    Each record is appended with a single `write()` to a file opened in append mode, so many worker processes can
+    share one log without interleaving their lines.
+    """
+
+    def __init__(self,
+                 filename: Union[str, Path] = "cache/telemetry.jsonl",
+                 **metadata,
+                 ):
+        """
+        Args:
+            filename: The path of the log. It is created if needed, and appended to otherwise.
+            **metadata: Fields added to every record written to this log (e.g., `study="market_segmentation"`).
+        """
+        self.filename = Path(filename)
+        self.metadata = metadata
+
+    def write(self,
+              sol: Any,
+              t_wall_total: float = None,
+              **metadata,
+              ) -> Dict[str, Any]:
+        """
+        Appends the record of a solve to the log, and returns it. Arguments follow `solve_record()`.
+        """
+        record = solve_record(sol, t_wall_total=t_wall_total, **{**self.metadata, **metadata})
+        self.filename.parent.mkdir(parents=True, exist_ok=True)
+        line = (json.dumps(record) + "\n").encode()
+        fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        return record
+
+    def read(self) -> List[Dict[str, Any]]:
+        """
+        Returns every record in the log, oldest first.
+        """
+        if not self.filename.exists():
+            return []
+        with open(self.filename, "r") as f:
+            return [
+                json.loads(line)
+                for line in f
+                if line.strip()
+            ]
+
+
+def iterations_table(records: List[Dict[str, Any]]):
+    """
+    Flattens the per-iteration history of many solves into a pandas DataFrame, with one row per IPOPT iteration.
+
+    Columns are "solve" (the index of the record), "iteration", each of `iteration_fields`, and the scalar
+    parameters of the solve (prefixed "p.").
+    """
+    import pandas as pd
+
+    frames = []
+    for i, record in enumerate(records):
+        iterations = record.get("iterations", {})
+        n = len(next(iter(iterations.values()), []))
+        frame = pd.DataFrame({
+            "solve"    : np.full(n, i),
+            "iteration": np.arange(n),
+            **{k: iterations[k] for k in iteration_fields if k in iterations},
+        })
+        for k, v in record.get("parameters", {}).items():
+            frame[f"p.{k}"] = v
+        frames.append(frame)
+    if len(frames) == 0:
+        return pd.DataFrame(columns=["solve", "iteration"] + iteration_fields)
+    return pd.concat(frames, ignore_index=True)
+
+
+def time_breakdown(records: List[Dict[str, Any]]):
+    """
+    Totals where the wall time of many solves went, as a pandas DataFrame with one row per NLP callback plus
+    "solver" (IPOPT itself, mostly the linear solver), and columns "n_calls", "t_wall" [sec], "t_wall_per_call"
+    [sec], and "fraction" (of the total wall time).
+    """
+    import pandas as pd
+
+    totals = {}
+    for record in records:
+        for name, timing in record.get("callbacks", {}).items():
+            total = totals.setdefault(name, {"n_calls": 0, "t_wall": 0.})
+            total["n_calls"] += timing["n_calls"]
+            total["t_wall"] += timing["t_wall"]
+        total = totals.setdefault("solver", {"n_calls": 0, "t_wall": 0.})
+        total["n_calls"] += record.get("iter_count", 0)
+        total["t_wall"] += record["t_wall_solver"]
+
+    table = pd.DataFrame.from_dict(totals, orient="index", columns=["n_calls", "t_wall"])
+    table["t_wall_per_call"] = table["t_wall"] / np.maximum(table["n_calls"], 1)
+    table["fraction"] = table["t_wall"] / max(table["t_wall"].sum(), 1e-100)
+    return table.sort_values("t_wall", ascending=False)
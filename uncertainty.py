@@ -0,0 +1,272 @@
+import numpy as np
+import time
+from typing import Dict, List, Any
+from compiled_problem import CompiledSolution
+
+
+class UncertaintyResult:
+    """
+    The result of `propagate()`: samples of each output, summary statistics, and (optionally) a check of the
+    linearization against full re-solves.
+
+    Attributes:
+        parameters: The names of the uncertain parameters.
+        outputs: The names of the outputs.
+        nominal: The nominal (solved) value of each output and parameter, as {name: value}.
+        parameter_samples: The sampled parameter values, as {parameter name: array of samples}.
+        samples: The predicted output values, as {output name: array of samples}.
+        sensitivities: The derivatives used, as {output name: {parameter name: d(output)/d(parameter)}}.
+        validation: A list with one dictionary per validation re-solve, with keys "sample" (the sample index),
+            "success", "predicted" and "solved" (each a dictionary of {output name: value}), and "time".
+    """
+
+    def __init__(self,
+                 parameters: List[str],
+                 outputs: List[str],
+                 nominal: Dict[str, float],
+                 parameter_samples: Dict[str, np.ndarray],
+                 samples: Dict[str, np.ndarray],
+                 sensitivities: Dict[str, Dict[str, float]],
+                 variances: Dict[str, float],
+                 validation: List[Dict[str, Any]],
+                 ):
+        self.parameters = parameters
+        self.outputs = outputs
+        self.nominal = nominal
+        self.parameter_samples = parameter_samples
+        self.samples = samples
+        self.sensitivities = sensitivities
+        self._variances = variances
+        self.validation = validation
+
+    def summary(self,
+                percentiles: List[float] = (5, 50, 95),
+                ) -> Dict[str, Dict[str, float]]:
+        """
+        Returns summary statistics of each output, as {output name: {statistic: value}}. The statistics are:
+            * "nominal": The value at the solved point design.
+            * "mean", "std", and "p<N>" for each of `percentiles`: From the samples.
+            * "contribution.<parameter>": The fraction of the output variance due to each parameter (from the
+                linearization, assuming the parameters are independent).
+        """
+        summary = {}
+        for output in self.outputs:
+            samples = self.samples[output]
+            variance = sum(
+                self.sensitivities[output][parameter] ** 2 * self._variances[parameter]
+                for parameter in self.parameters
+            )
+            summary[output] = {
+                "nominal": self.nominal[output],
+                "mean"   : float(np.mean(samples)),
+                "std"    : float(np.std(samples)),
+                **{
+                    f"p{percentile:g}": float(np.percentile(samples, percentile))
+                    for percentile in percentiles
+                },
+                **{
+                    f"contribution.{parameter}": (
+                        self.sensitivities[output][parameter] ** 2 * self._variances[parameter] / variance
+                        if variance > 0 else 0.
+                    )
+                    for parameter in self.parameters
+                },
+            }
+        return summary
+
+    def report(self) -> str:
+        """
+        Returns a printable table of the summary statistics, the largest contributors to each output's variance, and
+        the validation errors.
+        """
+        summary = self.summary()
+        lines = [
+            f"{'Output'.ljust(38)} {'Nominal'.rjust(11)} {'Mean'.rjust(11)} {'Std.'.rjust(11)} "
+            f"{'p5'.rjust(11)} {'p95'.rjust(11)}  Main contributors"
+        ]
+        for output, stats in summary.items():
+            contributions = sorted(
+                [(stats[f"contribution.{parameter}"], parameter) for parameter in self.parameters],
+                reverse=True,
+            )
+            lines.append(
+                f"{output.ljust(38)} {stats['nominal']:11.5g} {stats['mean']:11.5g} {stats['std']:11.5g} "
+                f"{stats['p5']:11.5g} {stats['p95']:11.5g}  " +
+                ", ".join(f"{parameter} ({fraction:.0%})" for fraction, parameter in contributions[:3])
+            )
+
+        if len(self.validation) > 0:
+            successes = [v for v in self.validation if v["success"]]
+            lines.append("")
+            lines.append(
+                f"Linearization check: {len(successes)}/{len(self.validation)} re-solves converged, "
+                f"{sum(v['time'] for v in self.validation):.1f} s."
+            )
+            for output in self.outputs:
+                errors = [
+                    abs(v["predicted"][output] - v["solved"][output]) /
+                    max(abs(v["solved"][output] - self.nominal[output]), abs(self.nominal[output]) * 1e-12)
+                    for v in successes
+                ]
+                if len(errors) > 0:
+                    lines.append(
+                        f"{output.ljust(38)} max. error = {max(errors):.1%} of the change from nominal "
+                        f"({max(abs(v['predicted'][output] - v['solved'][output]) for v in successes):.3g} "
+                        f"absolute)"
+                    )
+        return "\n".join(lines)
+
+
+def propagate(
+        sol: CompiledSolution,
+        distributions: Dict[str, Any],
+        outputs: List[str],
+        n_samples: int = 10000,
+        n_validation: int = 0,
+        seed: int = 0,
+        **solve_kwargs,
+) -> UncertaintyResult:
+    """
+    Propagates uncertainty in parameters to outputs of an optimized design, to first order.
+
+    Each output is linearized about the optimum with its optimal sensitivities (`CompiledSolution.sensitivities()`),
+    which account for the design re-optimizing in response to each parameter. Samples are then drawn from the
+    parameter distributions and mapped through the linearization, which costs nothing compared to a solve - so this
+    replaces Monte Carlo over full NLP solves. Optionally, a few of the samples are re-solved in full to check the
+    linearization.
+
+    Args:
+        sol: A converged solution of the point design, at the nominal parameter values.
+        distributions: The distribution of each uncertain parameter, as {parameter name: distribution}. Any object
+            with `rvs(size=, random_state=)` and `var()` methods works, such as a frozen `scipy.stats` distribution
+            (e.g., `scipy.stats.norm(loc=70, scale=3.5)`). Parameters are sampled independently.
+        outputs: The names of the outputs to propagate to.
+        n_samples: The number of samples to draw.
+        n_validation: The number of samples to also re-solve in full (warm-started from `sol`), to check the
+            linearization.
+        seed: The random seed, for repeatable samples.
+        **solve_kwargs: Any keyword arguments of `CompiledProblem.solve()`, used for the validation re-solves.
+
+    Returns: An UncertaintyResult.
+    """
+    parameters = list(distributions.keys())
+    random_state = np.random.default_rng(seed)
+    sensitivities = sol.sensitivities(outputs, parameters)
+    nominal = {
+        name: sol(name)
+        for name in outputs + parameters
+    }
+
+    parameter_samples = {
+        parameter: np.array(
+            distributions[parameter].rvs(size=n_samples, random_state=random_state),
+            dtype=float,
+        )
+        for parameter in parameters
+    }
+
+    def predict(i):
+        return {
+            output: nominal[output] + sum(
+                sensitivities[output][parameter] * (parameter_samples[parameter][i] - nominal[parameter])
+                for parameter in parameters
+            )
+            for output in outputs
+        }
+
+    samples = predict(slice(None))
+
+    validation = []
+    solve_kwargs = {
+        "verbose"            : False,
+        "behavior_on_failure": "return_last",
+        **solve_kwargs,
+    }
+    for i in range(min(n_validation, n_samples)):
+        start = time.perf_counter()
+        resolved = sol.problem.solve(
+            parameter_values={
+                parameter: parameter_samples[parameter][i]
+                for parameter in parameters
+            },
+            x0=sol.x,
+            **solve_kwargs,
+        )
+        validation.append({
+            "sample"   : i,
+            "success"  : bool(resolved.stats()["success"]),
+            "predicted": predict(i),
+            "solved"   : {output: resolved(output) for output in outputs},
+            "time"     : time.perf_counter() - start,
+        })
+
+    return UncertaintyResult(
+        parameters=parameters,
+        outputs=outputs,
+        nominal=nominal,
+        parameter_samples=parameter_samples,
+        samples=samples,
+        sensitivities=sensitivities,
+        variances={
+            parameter: float(distributions[parameter].var())
+            for parameter in parameters
+        },
+        validation=validation,
+    )
+
+
+if __name__ == '__main__':
+    from scipy import stats
+    from design_opt import get_compiled_problem
+    import matplotlib.pyplot as plt
+    import aerosandbox.tools.pretty_plots as p
+
+    problem = get_compiled_problem(verbose=True)
+    sol = problem.solve(verbose=False)
+
+    ### Input uncertainties, as coefficients of variation about the nominal value
+    coefficients_of_variation = {
+        "fuel_tank_fuel_mass_fraction"      : 0.05,
+        "fuel_density"                      : 0.01,
+        "Isp"                               : 0.03,
+        "seat_mass_fraction"                : 0.10,
+        "apu_mass_fraction"                 : 0.10,
+        "payload_proportional_mass_fraction": 0.10,
+        "fuel_system_mass_coefficient"      : 0.10,
+        "wing_mass_factor"                  : 0.05,
+        "hstab_mass_coefficient"            : 0.10,
+        "vstab_mass_coefficient"            : 0.10,
+        "fuselage_mass_factor"              : 0.05,
+    }
+    distributions = {
+        k: stats.norm(loc=sol(k), scale=abs(sol(k)) * cv)
+        for k, cv in coefficients_of_variation.items()
+        if k in problem.parameter_names
+    }
+
+    result = propagate(
+        sol,
+        distributions=distributions,
+        outputs=[
+            "fuel_burn_g_per_seat_km",
+            "transport_efficiency_MJ_per_seat_km",
+            "mass_props_TOGW.mass",
+        ],
+        n_samples=10000,
+        n_validation=5,
+    )
+    print(result.report())
+
+    fig, ax = plt.subplots(1, 3, figsize=(12, 4))
+    for a, (output, label) in zip(ax, {
+        "fuel_burn_g_per_seat_km"            : "Fuel Burn [g/pax-km]",
+        "transport_efficiency_MJ_per_seat_km": "Transport Energy [MJ/pax-km]",
+        "mass_props_TOGW.mass"               : "TOGW [kg]",
+    }.items()):
+        a.hist(result.samples[output], bins=50, density=True, alpha=0.7)
+        a.axvline(result.nominal[output], color="k", linestyle="--")
+        a.set_xlabel(label)
+        a.set_yticks([])
+    p.show_plot(
+        "Uncertainty in the Point Design",
+    )
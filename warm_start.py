@@ -0,0 +1,174 @@
+import numpy as np
+import hashlib
+import os
+from pathlib import Path
+from typing import Union, Dict, List, Any, Optional
+from compiled_problem import CompiledProblem, CompiledSolution
+
+
+class WarmStartDatabase:
+    """
+    A persistent store of converged solutions, used to seed new solves from the nearest solution already found.
+
+    Solutions are stored per problem (keyed by `CompiledProblem.graph_hash()`, since a decision vector is only
+    meaningful for the problem it came from), and indexed by their parameter vector. That vector holds every
+    parameter of the problem - mission range, n_pax, the fuel properties (so fuel types are told apart), the tank
+    fuel mass fraction, and so on - so the nearest neighbour is the most similar design problem.
+
+    Each solution is one small file, written atomically, so many worker processes can share one database:
+
+        >>> database = WarmStartDatabase()
+        >>> sol = database.solve(problem, parameter_values={"mission_range": 5000 * u.naut_mile})
+    """
+
+    def __init__(self,
+                 directory: Union[str, Path] = "cache/warm_start",
+                 ):
+        self.directory = Path(directory)
+        self._index = {}  # graph hash : {"files": set, "p": array, "x": array, "lam_g": array}
+
+    def add(self,
+            sol: CompiledSolution,
+            ) -> None:
+        """
+        Stores a solution. Solutions that did not converge are ignored.
+        """
+        if not sol.stats()["success"]:
+            return
+        directory = self.directory / sol.problem.graph_hash()
+        directory.mkdir(parents=True, exist_ok=True)
+        name = hashlib.sha256(sol.p.tobytes()).hexdigest()[:16]
+        filename = directory / f"{name}.npz"
+        tmp_filename = directory / f"{name}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_filename,
+            p=sol.p,
+            x=sol.x,
+            lam_g=sol.lam_g,
+            iterations=sol.stats()["iter_count"],
+        )
+        os.replace(tmp_filename, filename)
+
+    def __len__(self) -> int:
+        return len([
+            f for f in self.directory.glob("*/*.npz")
+            if not f.name.endswith(".tmp.npz")
+        ])
+
+    def _entries(self, problem: CompiledProblem) -> Dict[str, np.ndarray]:
+        """
+        Returns all stored solutions of a problem as stacked arrays, loading any that were added (by this or another
+        process) since the last call.
+        """
+        key = problem.graph_hash()
+        if key not in self._index:
+            self._index[key] = {
+                "files": set(),
+                "p"    : np.zeros((0, problem.n_parameters)),
+                "x"    : np.zeros((0, problem.n_variables)),
+                "lam_g": np.zeros((0, problem.bounds.numel_out(0))),
+            }
+        entries = self._index[key]
+
+        directory = self.directory / key
+        new_files = sorted(
+            f for f in directory.glob("*.npz")
+            if f not in entries["files"] and not f.name.endswith(".tmp.npz")
+        )
+        if len(new_files) > 0:
+            loaded = {k: [] for k in ["p", "x", "lam_g"]}
+            for f in new_files:
+                with np.load(f) as data:  # Closes the file once its arrays are read.
+                    for k in loaded:
+                        loaded[k].append(data[k])
+            for k in loaded:
+                entries[k] = np.concatenate([entries[k], np.stack(loaded[k])])
+            entries["files"] |= set(new_files)
+        return entries
+
+    def nearest(self,
+                problem: CompiledProblem,
+                parameter_values: Dict[str, Union[float, np.ndarray]] = None,
+                ) -> Optional[Dict[str, Any]]:
+        """
+        Finds the stored solution whose parameters are nearest to the given ones.
+
+        Distance is the RMS relative difference over all parameters, so that parameters of very different magnitudes
+        (e.g., mission range [m] and tank fuel mass fraction [-]) count equally.
+
+        Args:
+            problem: The CompiledProblem to be solved.
+            parameter_values: A dictionary of {parameter name: value}, as in `CompiledProblem.solve()`.
+
+        Returns: A dictionary with keys "x", "lam_g", "p", and "distance"; or None if nothing is stored for this
+        problem.
+        """
+        neighbours = self.neighbours(problem, parameter_values, n_neighbours=1)
+        return neighbours[0] if len(neighbours) > 0 else None
+
+    def neighbours(self,
+                   problem: CompiledProblem,
+                   parameter_values: Dict[str, Union[float, np.ndarray]] = None,
+                   n_neighbours: int = 1,
+                   ) -> List[Dict[str, Any]]:
+        """
+        Like `nearest()`, but returns up to `n_neighbours` stored solutions, nearest first.
+        """
+        entries = self._entries(problem)
+        if len(entries["p"]) == 0:
+            return []
+
+        p = problem.parameter_vector(parameter_values)
+        scale = np.maximum(
+            np.maximum(np.abs(entries["p"]), np.abs(p)),
+            1e-100,
+        )
+        distances = np.sqrt(np.mean(((entries["p"] - p) / scale) ** 2, axis=1))
+        return [
+            {
+                "x"       : entries["x"][i],
+                "lam_g"   : entries["lam_g"][i],
+                "p"       : entries["p"][i],
+                "distance": float(distances[i]),
+            }
+            for i in np.argsort(distances, kind="stable")[:n_neighbours]
+        ]
+
+    def solve(self,
+              problem: CompiledProblem,
+              parameter_values: Dict[str, Union[float, np.ndarray]] = None,
+              use_duals: bool = False,
+              **kwargs,
+              ) -> CompiledSolution:
+        """
+        Solves a problem starting from the nearest stored solution (or from the problem's own initial guess, if
+        there is none), and stores the result.
+
+        Args:
+            problem: The CompiledProblem to solve.
+            parameter_values: A dictionary of {parameter name: value}, as in `CompiledProblem.solve()`.
+            use_duals: If True, the constraint multipliers are warm-started too (IPOPT's `warm_start_init_point`).
+                This helps most when the stored solution is very near; otherwise, the primal warm start alone is
+                usually more robust.
+            **kwargs: Any other keyword arguments of `CompiledProblem.solve()`.
+
+        Returns: A CompiledSolution. `sol.stats()["warm_start_distance"]` is the distance to the solution it was
+        seeded from (NaN for a cold start).
+        """
+        neighbour = self.nearest(problem, parameter_values)
+        if neighbour is not None:
+            kwargs["x0"] = neighbour["x"]
+            if use_duals:
+                kwargs["lam_g0"] = neighbour["lam_g"]
+                kwargs["options"] = {
+                    "ipopt.warm_start_init_point": "yes",
+                    **kwargs.get("options", {}),
+                }
+
+        sol = problem.solve(
+            parameter_values=parameter_values,
+            **kwargs,
+        )
+        sol.stats()["warm_start_distance"] = np.nan if neighbour is None else neighbour["distance"]
+        self.add(sol)
+        return sol